@@ -0,0 +1,181 @@
+from numpy import array, asarray, dot, zeros, errstate
+from numpy.linalg import inv
+
+from l33tC4D.space.Zone import NONE, INTERSECT, CONTAIN
+from Zone import Zone
+
+class Frustum( Zone ):
+    """view volume of a camera, bounded by six planes
+
+       can be interfered with space octree like a space zone and intersected
+       with ether nodes like an ether zone
+    """
+    BOUNDS_INTERFERE = False # space nodes are tested against planes
+
+    def __init__( self, matrix ):
+        """make frustum from 4x4 clip matrix, projection times modelview,
+           taking world coords to clip coords
+        """
+        Zone.__init__( self )
+        matrix = asarray( matrix, 'd' )
+        self.matrix = matrix
+
+        # each plane is a, b, c, d with a * x + b * y + c * z + d >= 0
+        # inside, scaled so that gives distance from plane
+        self.planes = []
+        for row, sign in ( (0, 1), (0, -1), (1, 1), (1, -1), (2, 1),
+                           (2, -1) ):
+            plane = matrix[3] + sign * matrix[row]
+            plane /= ( plane[:3]**2 ).sum() ** 0.5
+            self.planes.append( tuple(plane.tolist()) )
+
+        # corners are corners of clip cube taken back to world coords
+        corners = dot( array([(x, y, z, 1.0) for x in (-1, 1) for y in (-1, 1)
+                              for z in (-1, 1)]), inv(matrix).T )
+        self.corners = corners[:, :3] / corners[:, 3:]
+
+    def __repr__( self ):
+        return "<frustum min=(%.1f %.1f %.1f) max=(%.1f %.1f %.1f)>" % (
+            tuple(self.corners.min(0)) + tuple(self.corners.max(0)) )
+
+    def sub_frustum( self, left, bottom, right, top ):
+        """returns frustum of part of view between given normalized device
+           coords, each -1 to 1 across view
+        """
+        # scale and shift clip coords so region fills clip cube
+        width, height = right - left, top - bottom
+        region = array( [(2.0 / width, 0, 0, -(left + right) / width),
+                         (0, 2.0 / height, 0, -(bottom + top) / height),
+                         (0, 0, 1, 0),
+                         (0, 0, 0, 1)] )
+        return Frustum( dot(region, self.matrix) )
+
+    def polygon_zones( self, space, polygon, limit=1.0 ):
+        """returns set of zones of space octree whose bounds centres project
+           inside polygon given as list of normalized device coords
+
+           interferes octree once with frustum of polygon's bounding
+           rectangle, then tests centres of zones found against polygon
+        """
+        xs, ys = zip( *polygon )
+        if not ( min(xs) < max(xs) and min(ys) < max(ys) ):
+            return set()
+
+        region = self.sub_frustum( min(xs), min(ys), max(xs), max(ys) )
+        kissed, contained = space.interfere( region, limit=limit )
+        candidates = list( kissed | contained )
+        if not candidates:
+            return set()
+
+        bounds = array( [(tuple(zone.bounds[0]), tuple(zone.bounds[1]))
+                         for zone in candidates] )
+        device, front = self.project( bounds.mean(1) )
+        inside = front & inside_polygon( device, polygon )
+        return set( zone for zone, flag in zip(candidates, inside.tolist())
+                    if flag )
+
+    def project( self, points ):
+        """project (n, 3) array of world coords to normalized device coords
+
+           returns ( (n, 2) array of device coords, array of flags of points
+           in front of eye )
+        """
+        points = asarray( points, 'd' ).reshape( -1, 3 )
+        clip = dot( points, self.matrix[:, :3].T ) + self.matrix[:, 3]
+        w = clip[:, 3]
+        with errstate( divide="ignore", invalid="ignore" ):
+            device = clip[:, :2] / w[:, None]
+        return device, w > 0.0
+
+    def classify_box( self, centroid, radius ):
+        """returns CONTAIN if frustum contains cube of given radius around
+           centroid, INTERSECT if it may intersect it, or NONE
+        """
+        x, y, z = centroid
+        code = CONTAIN
+        for a, b, c, d in self.planes:
+            distance = a * x + b * y + c * z + d
+            extent = radius * ( abs(a) + abs(b) + abs(c) )
+
+            # cube entirely outside one plane is outside frustum
+            if distance < -extent:
+                return NONE
+
+            # cube straddling a plane is not contained
+            if distance < extent:
+                code = INTERSECT
+
+        return code
+
+    ###
+    ### space zone interface
+    ###
+
+    def classify( self, space ):
+        """returns CONTAIN, INTERSECT or NONE code against space node
+        """
+        return self.classify_box( space.centroid, space.size / 2.0 )
+
+    def interfere( self, space ):
+        """determines if this zone intersects or contains given space
+
+           returns true if zone contains space
+           returns false if zone intersects given space
+           otherwise returns none
+        """
+        code = self.classify( space )
+        if code == NONE:
+            return None
+        return code == CONTAIN
+
+    ###
+    ### ether zone interface
+    ###
+
+    def get_bounds( self ):
+        """return (min, max) coords containing this zone
+        """
+        return ( tuple(self.corners.min(0).tolist()),
+                 tuple(self.corners.max(0).tolist()) )
+
+    def intersect( self, position, radius ):
+        """determine whether this zone intersects given box
+
+           -> ( (<zone>, <intersection>, <normal>), ... )
+        """
+        code = self.classify_box( position, radius )
+        if code == NONE:
+            return ()
+        if code == CONTAIN:
+            return ((self, self.CONTAINS, None),)
+
+        # if all corners are inside box this frustum is contained by it
+        position = asarray( position, 'd' )
+        if ( abs(self.corners - position) <= radius ).all():
+            return ((self, self.CONTAINED, None),)
+
+        return ((self, self.CROSSES, None),)
+
+def window_to_device( points, width, height ):
+    """returns list of window coords, counted from top left, as normalized
+       device coords of window of given size
+    """
+    return [ (2.0 * x / width - 1.0, 1.0 - 2.0 * y / height)
+             for x, y in points ]
+
+def inside_polygon( points, polygon ):
+    """returns flags of (n, 2) array of points inside polygon given as list
+       of x, y corners, by even odd rule
+    """
+    points = asarray( points, 'd' ).reshape( -1, 2 )
+    polygon = [ (float(x), float(y)) for x, y in polygon ]
+    x, y = points[:, 0], points[:, 1]
+    inside = zeros( len(points), bool )
+    for (x0, y0), (x1, y1) in zip( polygon, polygon[1:] + polygon[:1] ):
+        if y0 == y1:
+            continue
+
+        # flip points left of where each edge crosses their row
+        crosses = ( y0 > y ) != ( y1 > y )
+        inside ^= crosses & ( x < x0 + (y - y0) * (x1 - x0) / (y1 - y0) )
+    return inside
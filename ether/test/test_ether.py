@@ -18,7 +18,7 @@ box_x = Box( position=(10, 3, 0), size=5 )
 print "inserted box x into ether: %s" % str( ether_demon.insert(box_x) )
 
 # move box x and try again
-box_x.position._coords[1,0] = -5
+box_x.position[1] = -5
 print "inserted box x into ether: %s" % str( ether_demon.insert(box_x) )
 
 # remove box
@@ -4,6 +4,8 @@ import gtk.gtkgl
 from OpenGL.GL import *
 from OpenGL.GLU import *
 
+from l33tC4D.vector.Quaternion import Quaternion
+
 from Window import Window
 
 class GL_Camera( Window ):
@@ -19,10 +21,11 @@ class GL_Camera( Window ):
         #print "init 0.1"
 
         # for rotating view
-        self.rotation = [ 0, 0, 0 ]
+        self.orientation = Quaternion()
 
-        # flag to track pointer up or down
+        # flag to track pointer up or down and where it was last seen
         self.pointer_down = False
+        self.pointer = None
 
         # eye position and focus
         self.eye = ( 0.0, 0.0, -6.0 )
@@ -105,14 +108,24 @@ class GL_Camera( Window ):
     def handle_motion( self, x, y ):
         """do something when mouse pointer is moved
 
-           by default rotates view in x-y, override to change
+           by default orbits view a degree per pixel dragged, override to
+           change
         """
-        if self.pointer_down:
-            self.rotation[0] = x
-            self.rotation[1] = y
+        if self.pointer_down and self.pointer is not None:
+            dx, dy = x - self.pointer[0], y - self.pointer[1]
+            self.orbit( dx, dy )
             self.redraw()
             #self._gl_area.queue_draw()
 
+    def orbit( self, yaw, pitch ):
+        """turn view by given degrees around screen y and x axes
+        """
+        turn = Quaternion().rotate( yaw, (0.0, 1.0, 0.0) )
+        turn.rotate( pitch, (1.0, 0.0, 0.0) )
+
+        # drag turns around screen axes so applies after current orientation
+        self.orientation = turn.compose( self.orientation ).normalize()
+
     def handle_press( self, x, y ):
         """do something when pointer button is pressed
         """
@@ -166,9 +179,7 @@ class GL_Camera( Window ):
                 glLoadIdentity()
                 gluLookAt( *self.focus )
                 glTranslatef( *self.eye )
-                glRotatef( self.rotation[0], 0.0, 1.0, 0.0 )
-                glRotatef( self.rotation[1], 1.0, 0.0, 0.0 )
-                glRotatef( self.rotation[2], 0.0, 0.0, 1.0 )
+                glMultMatrixd( self.orientation.matrix3.gl )
 
                 # call draw handler to draw world
                 self.handle_draw()
@@ -223,6 +234,7 @@ class GL_Camera( Window ):
         gtk_thread = self.GTK_Thread( self, mark=True )
         try:
             self.handle_motion( event.x, event.y )
+            self.pointer = event.x, event.y
         finally:
             gtk_thread.leave()
 
@@ -230,6 +242,7 @@ class GL_Camera( Window ):
         gtk_thread = self.GTK_Thread( self, mark=True )
         try:
             self.pointer_down = True
+            self.pointer = event.x, event.y
             self.handle_press( event.x, event.y )
         finally:
             gtk_thread.leave()
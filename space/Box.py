@@ -8,6 +8,7 @@ from Vertex import Vertex
 class Box( Zone ):
     """a simple cube zone rendered with glut solid cube
     """
+    BOUNDS_INTERFERE = True
 
     def __init__( self, centroid=(0, 0, 0), size=10.0 ):
         self.centroid = Vertex( *centroid )
@@ -30,6 +31,14 @@ class Box( Zone ):
         return "<box x='%.2f' y='%.2f' z='%.2f' size='%.2f' />" % (
             tuple(self.centroid) + (self.size,) )
 
+    def update_bounds( self ):
+        """recalculate bounds in place after centroid or size change
+        """
+        radius = self.size / 2.0
+        self.bounds[0].set( *[c - radius for c in self.centroid] )
+        self.bounds[1].set( *[c + radius for c in self.centroid] )
+        self._bounds_changed()
+
     def draw( self ):
         """draw a cube using glut solid cube
         """
@@ -1,6 +1,49 @@
 from Zone import Zone
 from Vertex import Vertex
 
+def clip_segment( start, end, centroid, size ):
+    """clip segment from start to end against cube of given size around
+       centroid using slab method
+
+       returns ( <near>, <far> ) fractions of way along segment it enters
+       and leaves cube, or None if segment misses cube
+    """
+    radius = size / 2.0
+    return clip_box( start, end, [c - radius for c in centroid],
+                     [c + radius for c in centroid] )
+
+def clip_box( start, end, min_bound, max_bound ):
+    """clip segment from start to end against box between given min and max
+       bounds using slab method
+
+       returns ( <near>, <far> ) fractions of way along segment it enters
+       and leaves box, or None if segment misses box
+    """
+    near, far = 0.0, 1.0
+    for a, b, low, high in zip( start, end, min_bound, max_bound ):
+        low -= a
+        high -= a
+        d = float( b - a )
+
+        # segment parallel to slab must start between its planes
+        if d == 0.0:
+            if low > 0.0 or high < 0.0:
+                return None
+            continue
+
+        # narrow range of fractions to where segment is between planes
+        low, high = low / d, high / d
+        if low > high:
+            low, high = high, low
+        if low > near:
+            near = low
+        if high < far:
+            far = high
+        if near > far:
+            return None
+
+    return near, far
+
 class Edge( Zone ):
     """a line in space connecting two vertices
     """
@@ -17,6 +60,13 @@ class Edge( Zone ):
         max_bound = [ max(a, b) for a, b in zip(*self.vertices) ]
         return Vertex( *min_bound ), Vertex( *max_bound )
 
+    def update_bounds( self ):
+        """recalculate bounds in place after vertices move
+        """
+        for bound, new_bound in zip( self.bounds, self.generate_bounds() ):
+            bound.set( *new_bound )
+        self._bounds_changed()
+
     def __getitem__( self, index ):
         return self.vertices[index]
 
@@ -26,27 +76,8 @@ class Edge( Zone ):
            returns true if zone contains space (never happens)
            returns false if zone intersects given space
            otherwise returns none
-
-           *lazy* - actually tests against sphere with diameter of space
-           size rather than cube
         """
-        # test if ends of edge are within radius of space centroid
-        radius = space.size * 0.8660254037844386 # sqrt(3) / 2
-        for end in self.vertices:
-            if end.distance( space.centroid ) <= radius:
-                return False
-        
-        # then project centroid onto edge and test if distance is less than
-        # radius
-        closest = space.centroid.project( edge=self )
-        if closest.distance( space.centroid ) > radius:
-            return None            
-
-        # if it is test that distance between edges is greater than distance
-        # from projected point to either edge
-        between = self[0].distance( self[1] )
-        for end in self.vertices:
-            if end.distance( closest ) >= between:
-                return None
+        if clip_segment( self[0], self[1], space.centroid, space.size ) is None:
+            return None
 
         return False
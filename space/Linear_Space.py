@@ -0,0 +1,304 @@
+from numpy import ( array, argsort, searchsorted, flatnonzero, concatenate,
+                    int64 )
+
+from Vertex import Vertex
+
+MAX_DEPTH = 18 # levels below root a location code can address
+LEVEL_BITS = 5 # low bits of sort key holding level of node
+
+class Space_Node( object ):
+    """position and size of one node of a linear space octree
+
+       passed to zone interfere in place of a Space node, a single instance
+       is moved around the tree rather than making one per node visited
+    """
+    __slots__ = [ "centroid", "size" ]
+
+    def __init__( self ):
+        self.centroid = Vertex( 0.0, 0.0, 0.0 )
+        self.size = 0.0
+
+    def __repr__( self ):
+        return "<space node x=%.2f y=%.2f z=%.2f size=%.2f/>" % (
+            tuple(self.centroid) + (self.size,) )
+
+    def place( self, x, y, z, size ):
+        self.centroid.set( x, y, z )
+        self.size = size
+        return self
+
+class Linear_Space( object ):
+    """octree covering an area of 3d space stored in flat arrays
+
+       same insert, remove, interfere and prune interface as Space, but
+       nodes are not objects: a node is its location code, a leading 1 bit
+       followed by the morton code of its position, 3 bits (zyx, 1 for
+       positive) per level below root; only nodes holding zones are stored
+
+       zones are kept in csr form: zone_order lists zone slots grouped by
+       node, and node_start[i] is the offset of the zones of node_keys[i];
+       node keys sort each node before its descendants, so the zones of a
+       whole subtree are also one contiguous run of zone_order
+    """
+
+    def __init__( self, centroid=(0.0, 0.0, 0.0), size=2.0**10 ):
+        self.centroid = Vertex( *centroid )
+        self.size = size
+
+        # zones by slot with sort key of their node, removed zones leave
+        # None until pruned
+        self._zones = []
+        self._keys = []
+        self._slots = {}
+
+        # csr arrays, rebuilt after zones are inserted or removed
+        self.node_keys = None
+        self.node_start = None
+        self.zone_order = None
+        self._dirty = True
+
+        # node handed to zone interfere
+        self._node = Space_Node()
+
+    def __repr__( self ):
+        return "<linear space x=%.2f y=%.2f z=%.2f size=%.2f/>" % (
+            tuple(self.centroid) + (self.size,) )
+
+    def __len__( self ):
+        return len( self._slots )
+
+    def print_tree( self ):
+        self._build()
+        for i, key in enumerate( self.node_keys.tolist() ):
+            level = key & ( (1 << LEVEL_BITS) - 1 )
+            code = key >> LEVEL_BITS >> 3 * ( MAX_DEPTH - level )
+            print "  " * level + "*%s" % oct( code )
+            for slot in self.zone_order[self.node_start[i]:
+                                        self.node_start[i + 1]].tolist():
+                print "  " * level + " " + str( self._zones[slot] )
+
+    def insert( self, zone, limit=2.0**1 ):
+        """insert a new zone into octree
+
+           will descend tree until smallest containing space node is reached
+           or size limit is reached
+        """
+        code, level = 1, 0
+        (x, y, z), size = self.centroid, self.size
+        while level < MAX_DEPTH:
+
+            # find which children zone intersects
+            child = None
+            for i, cx, cy, cz in self._children( x, y, z, size ):
+                node = self._node.place( cx, cy, cz, size / 2.0 )
+                if zone.interfere( space=node ) is not None:
+
+                    # if zone intersects more than one child this is the
+                    # smallest containing node
+                    if child is not None:
+                        child = None
+                        break
+                    child = i, cx, cy, cz
+
+            # stop at size limit or smallest containing node
+            if child is None or size <= limit:
+                break
+
+            i, x, y, z = child
+            code, level, size = ( code << 3 ) | i, level + 1, size / 2.0
+
+        self._add_zone( zone, code, level )
+
+    def _add_zone( self, zone, code, level ):
+        """private method to manage adding zone to node with given code
+        """
+        assert zone.space is None
+        zone.space = self
+        self._slots[zone] = len( self._zones )
+        self._zones.append( zone )
+        self._keys.append( self._key(code, level) )
+        self._dirty = True
+
+    def remove( self, zone ):
+        """remove given zone from space octree
+        """
+        if zone.space is not self:
+            raise KeyError( "zone not in space octree!" )
+
+        slot = self._slots.pop( zone )
+        self._zones[slot] = None
+        zone.space = None
+        self._dirty = True
+
+    def interfere( self, zone, limit=1.0 ):
+        """returns zones kissing and intersecting given zone down to size limit
+
+           returns: tuple( set(<kissing zones>), set(<intersecting zones>) )
+        """
+        self._build()
+        kisses = set()
+        intersects = set()
+        x, y, z = self.centroid
+        self._interfere( zone, limit, 1, 0, x, y, z, self.size, (),
+                         kisses, intersects )
+        return kisses, intersects
+
+    def _interfere( self, zone, limit, code, level, x, y, z, size, baggage,
+                    kisses, intersects ):
+        """add zones kissing and intersecting zone in node with given code
+           to sets
+        """
+        first, own, last = self._node_range( code, level )
+
+        # nothing to find in empty subtree without baggage
+        if first == last and not baggage:
+            return
+
+        node = self._node.place( x, y, z, size )
+        zone_interference = zone.interfere( space=node )
+        if zone_interference is None:
+            return
+
+        # if zone contains this node add all zones in subtree and any
+        # baggage zones that reach it
+        if zone_interference:
+            intersects.update( self._zones_in(first, last) )
+            for b in baggage:
+                if b.interfere( space=node ) is not None:
+                    intersects.add( b )
+            return
+
+        # otherwise zone intersects this node, sort baggage into zones
+        # containing it and zones to carry down to children
+        forward_baggage = []
+        for b in baggage:
+            b_interference = b.interfere( space=node )
+            if b_interference is not None:
+                if not b_interference:
+                    forward_baggage.append( b )
+                else:
+                    intersects.add( b )
+
+        # down to size limit interfere each child carrying zones of this
+        # node and forward baggage
+        if size > limit and level < MAX_DEPTH:
+            forward_baggage.extend( self._zones_in(first, own) )
+            for i, cx, cy, cz in self._children( x, y, z, size ):
+                self._interfere( zone, limit, (code << 3) | i, level + 1,
+                                 cx, cy, cz, size / 2.0, forward_baggage,
+                                 kisses, intersects )
+            return
+
+        # at size limit everything in subtree and forward baggage kisses
+        kisses.update( self._zones_in(first, last) )
+        kisses.update( forward_baggage )
+
+    def get_child_zones( self ):
+        """returns set of all zones below root node
+
+           does *not* include zones contained by root
+        """
+        self._build()
+        first, own, last = self._node_range( 1, 0 )
+        return set( self._zones_in(own, last) )
+
+    def prune( self ):
+        """drop removed zones from arrays
+
+           empty nodes are never stored, so there are no nodes to prune
+        """
+        live = [ slot for slot, zone in enumerate( self._zones )
+                 if zone is not None ]
+        self._zones = [ self._zones[slot] for slot in live ]
+        self._keys = [ self._keys[slot] for slot in live ]
+        self._slots = dict( (zone, slot) for slot, zone
+                            in enumerate(self._zones) )
+        self._dirty = True
+
+    def is_empty( self ):
+        """returns true if space contains no zones
+        """
+        return len( self._slots ) < 1
+
+    ###
+    ### getter methods for properties
+    ###
+
+    def _get_zones( self ):
+        self._build()
+        first, own, last = self._node_range( 1, 0 )
+        return set( self._zones_in(first, own) )
+
+    def _get_node_count( self ):
+        self._build()
+        return len( self.node_keys )
+
+    ###
+    ### properties
+    ###
+
+    zones = property( _get_zones, doc="set of zones contained by root node" )
+    node_count = property( _get_node_count,
+                           doc="number of nodes holding zones" )
+
+    ###
+    ### private helper functions
+    ###
+
+    def _key( self, code, level ):
+        """returns sort key for node, morton code of node shifted to full
+           depth with level in low bits so parents sort before children
+        """
+        return ( code << 3 * (MAX_DEPTH - level) << LEVEL_BITS ) | level
+
+    def _children( self, x, y, z, size ):
+        """yield index and centroid of each child of node
+        """
+        r = size / 4.0
+        for i in range( 8 ):
+            yield ( i,
+                    x + r if i & 1 else x - r,
+                    y + r if i & 2 else y - r,
+                    z + r if i & 4 else z - r )
+
+    def _build( self ):
+        """sort live zones by node and rebuild csr arrays
+        """
+        if not self._dirty:
+            return
+
+        keys = array( self._keys, int64 )
+        live = flatnonzero( array([zone is not None
+                                   for zone in self._zones], bool) )
+        order = live[argsort( keys[live], kind="mergesort" )]
+        sorted_keys = keys[order]
+
+        # first zone of each run of equal keys starts a node
+        starts = array( [], int64 )
+        if len( order ):
+            starts = concatenate( ([0], flatnonzero(sorted_keys[1:]
+                                                    != sorted_keys[:-1]) + 1) )
+        self.node_keys = sorted_keys[starts]
+        self.node_start = concatenate( (starts, [len(order)]) ).astype( int64 )
+        self.zone_order = order
+        self._dirty = False
+
+    def _node_range( self, code, level ):
+        """returns indices of first node in subtree, first node below this
+           node and first node after subtree
+        """
+        key = self._key( code, level )
+        first = int( searchsorted(self.node_keys, key) )
+        own = first
+        if own < len( self.node_keys ) and self.node_keys[own] == key:
+            own += 1
+        end = ( code + 1 ) << 3 * ( MAX_DEPTH - level ) << LEVEL_BITS
+        last = int( searchsorted(self.node_keys, end) )
+        return first, own, last
+
+    def _zones_in( self, first, last ):
+        """returns zones of nodes first up to last
+        """
+        start, stop = self.node_start[first], self.node_start[last]
+        zones = self._zones
+        return [ zones[slot] for slot in self.zone_order[start:stop].tolist() ]
@@ -1,16 +1,56 @@
+import gc
+from math import ceil, log
+from heapq import heappush, heappop
+from numpy import ( array, asarray, ceil as ceil_array, floor, zeros, empty,
+                    argsort, flatnonzero, concatenate, newaxis )
+
 from Vertex import Vertex
+from Edge import clip_segment, clip_box
+from Zone import NONE, INTERSECT, CONTAIN, classify_bounds
+
+MAX_BULK_DEPTH = 18 # deepest level bulk load places zones at
+
+# direction of each child centroid from parent centroid, addressed zyx
+CHILD_SIGNS = array( [(1 if i & 1 else -1, 1 if i & 2 else -1,
+                       1 if i & 4 else -1) for i in range(8)], 'd' )
+
+# baggage of root node, zones with their bounds and batched flags
+NO_BAGGAGE = ( [], empty((0, 2, 3)), empty(0, bool) )
+
+class Loose_Bounds( object ):
+    """cube interfered with zones in place of a space node, used for the
+       enlarged bounds of loose space nodes and bounding cubes of zones
+    """
+    __slots__ = [ "centroid", "size" ]
+
+    def __init__( self, centroid, size ):
+        self.centroid = centroid
+        self.size = size
 
 class Space( object ):
     """node in an octree covering an area of 3d space
 
        provides quick interference calculations for things like selection
        and collision detection 
+
+       with looseness above 1 the octree is loose: each node holds zones
+       whose centre lies in it and whose bounds fit its cube enlarged by
+       looseness, so zones sink to a depth matching their size rather than
+       sticking where they straddle a centre plane
     """
 
-    def __init__( self, parent=None, centroid=(0.0, 0.0, 0.0), size=2.0**10 ):
+    def __init__( self, parent=None, centroid=(0.0, 0.0, 0.0), size=2.0**10,
+                  looseness=1.0 ):
         self.centroid = Vertex( *centroid )
         self.size = size
 
+        # factor node cube is enlarged by and enlarged cube zones are
+        # interfered with, just this node in a tight octree
+        self.looseness = looseness
+        self.loose_bounds = self
+        if looseness > 1.0:
+            self.loose_bounds = Loose_Bounds( self.centroid, size * looseness )
+
         # parent space node
         self.parent = parent
 
@@ -20,6 +60,14 @@ class Space( object ):
         # list of child nodes addressed in binary - zyx
         self.children = None
 
+        # zones with bounds arrays, built when first interfered
+        self._zone_arrays = None
+
+        # number of zones contained by this node and its children, and list
+        # of them built when first asked for
+        self.zone_count = 0
+        self._subtree_zones = None
+
     def __repr__( self ):
         return "<space x=%.2f y=%.2f z=%.2f size=%.2f/>" % (
             tuple(self.centroid) + (self.size,) )
@@ -41,23 +89,21 @@ class Space( object ):
            throws a Collision_Exception if new zone would intersect with
            existing zone
         """
+        if self.looseness > 1.0:
+            self._insert_loose( zone, limit )
+            return
+
         # if this space node has no children spawn some
         if self.children is None:
             self.spawn()
 
         # if only one child intersects this zone, insert into that child,
-        # otherwise add to this space's contained set
-        child = None
-        for space in self.children:
-            if zone.interfere( space=space ) is not None:
-
-                # if this is not first child space zone intersects, the
-                # current space is the smallest containing space node
-                if child is not None:
-                    self._add_zone( zone )
-                    return
-                
-                child = space
+        # otherwise this space is the smallest containing space node
+        touched = flatnonzero( self.classify_children(zone) != NONE )
+        if len( touched ) != 1:
+            self._add_zone( zone )
+            return
+        child = self.children[touched[0]]
 
         # if the size limit has not been reached insert into containing
         if self.size > limit:
@@ -67,12 +113,52 @@ class Space( object ):
         # if size limit has been reached just add zone to this space
         self._add_zone( zone )
 
+    def _insert_loose( self, zone, limit ):
+        """insert zone into loose octree
+
+           descends into child holding centre of zone's bounds until size
+           limit is reached or zone no longer fits child's enlarged cube
+        """
+        min_bound, max_bound = [ tuple(bound) for bound in zone.bounds ]
+        centre = [ (low + high) / 2.0 for low, high
+                   in zip(min_bound, max_bound) ]
+
+        space = self
+        while space.size > limit:
+            radius = space.size / 4.0
+            reach = radius * self.looseness
+
+            # child holding centre, positive side of each centre plane
+            # taking ties
+            i, child = 0, []
+            for axis, p, c in zip( range(3), centre, space.centroid ):
+                if p >= c:
+                    i |= 1 << axis
+                    child.append( c + radius )
+                else:
+                    child.append( c - radius )
+
+            # stop if zone sticks out of child's enlarged cube
+            for c, low, high in zip( child, min_bound, max_bound ):
+                if low < c - reach or high > c + reach:
+                    break
+            else:
+                if space.children is None:
+                    space.spawn()
+                space = space.children[i]
+                continue
+            break
+
+        space._add_zone( zone )
+
     def _add_zone( self, zone ):
         """private method to manage adding zone to space node
         """
         assert zone.space is None
         zone.space = self
         self.zones.add( zone )
+        self._zone_arrays = None
+        self._update_ancestors( 1 )
 
     def remove( self, zone ):
         """remove given zone from space octree
@@ -82,92 +168,357 @@ class Space( object ):
 
         # remove zone from space node's contained set
         zone.space.zones.remove( zone )
+        zone.space._zone_arrays = None
+        zone.space._update_ancestors( -1 )
 
         # set zone's containing space to none
         zone.space = None
-        
-    def interfere( self, zone, limit=1.0, _baggage=set() ):
+
+    def move( self, zone, limit=2.0**1 ):
+        """re-place zone in octree after it has moved or changed shape
+
+           walks up from zone's current space node only until its new bounds
+           fit, collapsing nodes left empty on the way, then inserts from
+           there; for zones interfering by bounds the zone ends up where
+           inserting from root would put it
+        """
+        space = zone.space
+        if space is None:
+            raise KeyError( "zone not in space octree!" )
+
+        zone.update_bounds()
+        self.remove( zone )
+
+        # walk up until zone fits, dropping all empty children of each node
+        # left behind
+        while space.parent is not None and not space._fits( zone ):
+            space._collapse()
+            space = space.parent
+
+        space.insert( zone, limit=limit )
+
+    def interfere( self, zone, limit=1.0 ):
         """returns zones kissing and intersecting given zone down to size limit
 
-           stops recursively interfering when space node of given size is
-           reached
+           stops interfering when space node of given size is reached; walks
+           tree with an explicit stack adding to a single pair of sets
+
+           zone and baggage zones are classified against all 8 children of
+           a node at once, in one numpy expression for zones interfering by
+           bounds
+
+           bounds of contained zones are cached per node, so a zone whose
+           bounds change in place must call update_bounds or be re-placed
+           with move before the next interfere
 
            returns: tuple( set(<kissing zones>), set(<intersecting zones>) )
         """
+        if self.looseness > 1.0:
+            return self._interfere_loose( zone, limit )
+
         kisses = set()
         intersects = set()
-        
-        # interfere this space with given zone
-        zone_interference = zone.interfere( space=self )
-
-        # if zone does not intersect or contain this space return empty sets
-        if zone_interference is None:
-            return kisses, intersects
-
-        # if zone contains this space add all zones contained by this space and
-        # its child spaces to the current intersection set
-        if zone_interference:
-            intersects |= self.zones | self.get_child_zones()
-
-            # if any zones in baggage intersect or contain this space add
-            # them to intersection set
-            for z in _baggage:
-                if z.interfere( space=self ) is not None:
-                    intersects.add( z )
-                    
-            return kisses, intersects
-
-        # otherwise zone intersects this space
-        # calculate which baggage zones intersect or contain this space
-        forward_baggage = set()
-        for z in _baggage:
-            z_interference = z.interfere( space = self )
-            if z_interference is not None:
-
-                # if baggage zone intersects this space add it to forward
-                # baggage set to test against child spaces
-                if not z_interference:
-                    forward_baggage.add( z )
-
-                # otherwise baggage zone contains this space, add it to
-                # intersection set
-                else:
-                    intersects.add( z )                    
-        
-        # if size limit has not been reached interfere each child space with
-        # this space's contained zones and forward baggage as baggage, and
-        # union returned sets
-        if self.size > limit:
 
-            # if space node has no children spawn some
-            if self.children is None:
-                self.spawn()
-                
-            for space in self.children:
-                k, i = space.interfere( zone=zone, limit=limit,
-                                        _baggage=self.zones | forward_baggage )
-                kisses |= k
-                intersects |= i
+        bounds = None
+        if zone.BOUNDS_INTERFERE:
+            bounds = zone.bounds_array()
+
+        # stack of space nodes still to interfere, with zone's code against
+        # node, baggage zones of ancestors and their codes against node
+        stack = [ (self, zone.classify(self), NO_BAGGAGE, empty(0)) ]
+        while stack:
+            space, code, baggage, codes = stack.pop()
+            zones = baggage[0]
+
+            # zone can only miss the root, children it misses are not pushed
+            if code == NONE:
+                continue
+
+            # if zone contains this space add all zones contained by this
+            # space and its child spaces to the intersection set, and any
+            # baggage zones that intersect or contain this space
+            if code == CONTAIN:
+                intersects.update( space.subtree_zones() )
+                for i in flatnonzero( codes != NONE ).tolist():
+                    intersects.add( zones[i] )
+                continue
+
+            # otherwise zone intersects this space
+            # baggage zones containing this space are intersected, baggage
+            # zones intersecting it are tested against child spaces
+            for i in flatnonzero( codes == CONTAIN ).tolist():
+                intersects.add( zones[i] )
+            forward = flatnonzero( codes == INTERSECT )
+
+            # if size limit has not been reached push each child space zone
+            # touches with this space's contained zones and forward baggage
+            # as baggage
+            if space.size > limit:
+                own_zones, own_bounds, own_batched = space._get_zone_arrays()
+                forward_baggage = (
+                    [zones[i] for i in forward.tolist()] + own_zones,
+                    concatenate( (baggage[1][forward], own_bounds) ),
+                    concatenate( (baggage[2][forward], own_batched) ) )
+
+                # nothing can be found below a space without zones or baggage
+                if not forward_baggage[0] and not space.zone_count:
+                    continue
+                if space.children is None:
+                    space.spawn()
+
+                child_codes = space.classify_children( zone, bounds )
+                baggage_codes = space._classify_baggage( forward_baggage,
+                                                         child_codes )
+                for i, child in enumerate( space.children ):
+                    if child_codes[i] != NONE:
+                        stack.append( (child, child_codes[i], forward_baggage,
+                                       baggage_codes[:, i]) )
+
+                continue
+
+            # otherwise size limit has been reached, add any forward baggage
+            # and zones contained by this space and its children to kissing
+            # set
+            kisses.update( space.subtree_zones() )
+            for i in forward.tolist():
+                kisses.add( zones[i] )
+
+        return kisses, intersects
+
+    def _interfere_loose( self, zone, limit ):
+        """returns zones kissing and intersecting given zone in loose octree
+
+           zones of nodes above size limit whose enlarged cube zone touches
+           are tested one at a time against their bounding cubes, zones
+           contained by them intersect and zones touching them kiss; all
+           zones below nodes zone contains intersect and below nodes at size
+           limit kiss, as in tight octree
+        """
+        kisses = set()
+        intersects = set()
 
-            return kisses, intersects
+        bounds = None
+        if zone.BOUNDS_INTERFERE:
+            bounds = zone.bounds_array()
+
+        stack = [ self ]
+        while stack:
+            space = stack.pop()
+            if not space.zone_count:
+                continue
+
+            code = zone.classify( space.loose_bounds )
+            if code == NONE:
+                continue
+            if code == CONTAIN:
+                intersects.update( space.subtree_zones() )
+                continue
+            if space.size <= limit:
+                kisses.update( space.subtree_zones() )
+                continue
+
+            zones, zone_bounds = space._get_zone_arrays()[:2]
+            if zones:
+                codes = _classify_cubes( zone, bounds, zone_bounds )
+                for z, c in zip( zones, codes ):
+                    if c == CONTAIN:
+                        intersects.add( z )
+                    elif c == INTERSECT:
+                        kisses.add( z )
+
+            if space.children is not None:
+                stack.extend( space.children )
 
-        # otherwise size limit has been reached, add any forward baggage and
-        # zones contained by this space and its children to kissing set
-        # and return
-        kisses |= self.zones | self.get_child_zones() | forward_baggage
         return kisses, intersects
-        
+
+    def march( self, edge, limit=1.0, first=False, radius=0.0 ):
+        """returns zones edge passes down to size limit, front to back
+
+           visits space nodes edge passes in order along edge, children
+           sorted by where edge enters them, finding zones as interfere does;
+           zones are ordered by where edge enters node they are found in,
+           then by where their centre falls along edge
+
+           if first is true returns only the zone whose bounds, grown by
+           radius, edge enters nearest its start, giving nearest pick
+        """
+        start, end = tuple( edge[0] ), tuple( edge[1] )
+        if first:
+            return self._march_first( start, end, radius )
+
+        # enlarged cubes of loose nodes overlap so can't be walked in order,
+        # order all zones edge passes instead
+        if self.looseness > 1.0:
+            kissed, contained = self._interfere_loose( edge, limit )
+            return sorted( kissed | contained,
+                           key=lambda z: _along(start, end, z) )
+
+        found = set()
+        marched = []
+
+        # stack of entry fraction of space nodes still to visit with
+        # baggage zones of their ancestors, nearest on top
+        clip = clip_segment( start, end, self.centroid, self.size )
+        stack = []
+        if clip is not None:
+            stack.append( (clip[0], self, []) )
+        while stack:
+            near, space, baggage = stack.pop()
+            zones = []
+
+            # baggage zones containing this space are passed, baggage zones
+            # intersecting it are tested against child spaces
+            forward_baggage = []
+            for z in baggage:
+                code = z.classify( space )
+                if code == CONTAIN:
+                    zones.append( z )
+                elif code == INTERSECT:
+                    forward_baggage.append( z )
+
+            # push children edge passes furthest first, with this space's
+            # contained zones and forward baggage as baggage
+            if space.size > limit:
+                forward_baggage.extend( space.zones )
+                if space.zone_count or forward_baggage:
+                    if space.children is None:
+                        space.spawn()
+                    children = []
+                    for child in space.children:
+                        clip = clip_segment( start, end, child.centroid,
+                                             child.size )
+                        if clip is not None:
+                            children.append( (clip[0], child,
+                                              forward_baggage) )
+                    children.sort( key=lambda child: -child[0] )
+                    stack.extend( children )
+
+            # otherwise size limit has been reached, forward baggage and
+            # zones contained by this space and its children are passed
+            else:
+                zones.extend( space.subtree_zones() )
+                zones.extend( forward_baggage )
+
+            # zones may be found again further along edge
+            zones = [ z for z in zones if z not in found ]
+            if not zones:
+                continue
+            found.update( zones )
+            zones.sort( key=lambda z: _along(start, end, z) )
+            marched.extend( zones )
+
+        return marched
+
+    def _march_first( self, start, end, radius ):
+        """returns list of zone whose bounds grown by radius segment from
+           start to end enters first, or empty list
+
+           visits nodes nearest first by where segment enters them, testing
+           their own zones against segment, and stops once the nearest hit
+           is in front of every node left to visit
+        """
+        nearest, hit = None, None
+
+        # heap of entry fraction of space nodes still to visit, root is
+        # always visited as it holds zones outside its cube
+        heap = [ (0.0, 0, self) ]
+        pushed = 1
+        while heap:
+            near, i, space = heappop( heap )
+            if hit is not None and near > hit:
+                break
+
+            for zone in space.zones:
+                min_bound, max_bound = zone.bounds
+                clip = clip_box( start, end,
+                                 [c - radius for c in min_bound],
+                                 [c + radius for c in max_bound] )
+                if clip is not None and ( hit is None or clip[0] < hit ):
+                    nearest, hit = zone, clip[0]
+
+            # zones of children lie within their cubes, enlarged in a loose
+            # octree, grown by radius
+            if space.children is None:
+                continue
+            for child in space.children:
+                if not child.zone_count:
+                    continue
+                bounds = child.loose_bounds
+                clip = clip_segment( start, end, bounds.centroid,
+                                     bounds.size + 2.0 * radius )
+                if clip is not None:
+                    heappush( heap, (clip[0], pushed, child) )
+                    pushed += 1
+
+        if nearest is None:
+            return []
+        return [ nearest ]
+
+    def classify_children( self, zone, bounds=None ):
+        """returns CONTAIN, INTERSECT or NONE code of zone against each child
+
+           zones interfering by bounds are classified against all children
+           in one numpy expression, optionally from given (2, 3) bounds
+        """
+        if not zone.BOUNDS_INTERFERE:
+            return array( [zone.classify(space) for space in self.children] )
+
+        if bounds is None:
+            bounds = zone.bounds_array()
+        return classify_bounds( bounds[0], bounds[1], self._child_centroids(),
+                                self.size / 2.0 )
 
     def get_child_zones( self ):
         """returns set of all zones contained by this space's children
 
            does *not* include zones contained by this space
         """
-        zones = set()
-        if self.children is not None:
-            for space in self.children:
-                zones |= space.zones | space.get_child_zones()
-        return zones
+        return set( self.iter_child_zones() )
+
+    def count_zones( self ):
+        """returns number of zones contained by this space and its children
+        """
+        return self.zone_count
+
+    def subtree_zones( self ):
+        """returns list of zones contained by this space and its children
+
+           list is kept until a zone is inserted or removed below this space,
+           so must not be changed
+        """
+        if self._subtree_zones is None:
+            zones = list( self.zones )
+
+            # use lists already built below this space, skipping empty nodes
+            stack = [ self ]
+            while stack:
+                space = stack.pop()
+                if space.children is None:
+                    continue
+                for child in space.children:
+                    if not child.zone_count:
+                        continue
+                    if child._subtree_zones is not None:
+                        zones.extend( child._subtree_zones )
+                    else:
+                        zones.extend( child.zones )
+                        stack.append( child )
+
+            self._subtree_zones = zones
+        return self._subtree_zones
+
+    def iter_child_zones( self ):
+        """yield each zone contained by this space's children
+
+           does *not* include zones contained by this space
+        """
+        if self.children is None:
+            return
+
+        for space in self.children:
+            if space.zone_count:
+                for zone in space.subtree_zones():
+                    yield zone
 
     def spawn( self ):
         """generate a set of child space nodes for this node
@@ -180,13 +531,13 @@ class Space( object ):
 
         size = self.size / 2.0
         radius = size / 2.0
+        cx, cy, cz = self.centroid
 
-        for z in [-1, 1]:
-            for y in [-1, 1]:
-                for x in [-1, 1]:
-                    delta = Vertex( *[a * radius for a in x, y, z] )
-                    centroid = self.centroid + delta
-                    space = Space( parent=self, centroid=centroid, size=size )
+        for z in [cz - radius, cz + radius]:
+            for y in [cy - radius, cy + radius]:
+                for x in [cx - radius, cx + radius]:
+                    space = Space( parent=self, centroid=(x, y, z), size=size,
+                                   looseness=self.looseness )
                     self.children.append( space )
                         
     def prune( self ):
@@ -206,11 +557,256 @@ class Space( object ):
 
         self.children = None
         
+    def _child_centroids( self ):
+        """returns (8, 3) array of child centroids
+        """
+        return asarray( tuple(self.centroid) ) + CHILD_SIGNS * self.size / 4.0
+
+    def _get_zone_arrays( self ):
+        """returns list of zones contained by this node, (n, 2, 3) array of
+           their bounds and flags of those classified by bounds
+        """
+        if self._zone_arrays is None:
+            zones = list( self.zones )
+            bounds = array( [(tuple(zone.bounds[0]), tuple(zone.bounds[1]))
+                             for zone in zones], 'd' ).reshape( -1, 2, 3 )
+            batched = array( [zone.BOUNDS_INTERFERE for zone in zones],
+                             bool )
+            self._zone_arrays = zones, bounds, batched
+        return self._zone_arrays
+
+    def _classify_baggage( self, baggage, child_codes ):
+        """returns (n, 8) array of codes of baggage zones against children
+
+           zones not classified by bounds are only interfered with children
+           whose child code isn't NONE
+        """
+        zones, bounds, batched = baggage
+        codes = classify_bounds( bounds[:, 0, newaxis], bounds[:, 1, newaxis],
+                                 self._child_centroids(), self.size / 2.0 )
+        children = [ (i, space) for i, space in enumerate( self.children )
+                     if child_codes[i] != NONE ]
+        for z in flatnonzero( ~batched ).tolist():
+            for i, space in children:
+                codes[z, i] = zones[z].classify( space )
+        return codes
+
+    def _update_ancestors( self, change ):
+        """add change to zone count of this space and its ancestors and drop
+           their zone lists
+        """
+        space = self
+        while space is not None:
+            space.zone_count += change
+            space._subtree_zones = None
+            space = space.parent
+
+    def _collapse( self ):
+        """drop children of this node if they are all empty
+        """
+        if self.children is None:
+            return
+
+        for space in self.children:
+            if not space.is_empty():
+                return
+
+        self.children = None
+
+    def _fits( self, zone ):
+        """returns true if zone's bounds lie strictly inside this node, so no
+           sibling of this node or its ancestors can intersect them
+
+           in a loose octree returns true if centre of zone's bounds lies in
+           this node and its bounds fit this node's enlarged cube
+        """
+        radius = self.size / 2.0
+        reach = radius * self.looseness
+        min_bound, max_bound = zone.bounds
+        for c, minb, maxb in zip( self.centroid, min_bound, max_bound ):
+            if self.looseness > 1.0:
+                centre = ( minb + maxb ) / 2.0
+                if ( centre < c - radius or centre >= c + radius
+                     or minb < c - reach or maxb > c + reach ):
+                    return False
+            elif minb <= c - radius or maxb >= c + radius:
+                return False
+        return True
+
     def is_empty( self ):
         """returns true if space contains no zones and has no children
         """
         if self.children is None and len(self.zones) < 1:
             return True
         
-        return False            
-        
+        return False
+
+def bulk_load( zones, limit=2.0**1, centroid=None, size=None, bounds=None,
+               looseness=1.0 ):
+    """build space octree holding all given zones at once
+
+       zones are placed from their bounds: each goes in the deepest node
+       down to size limit whose children only one of intersects, which is
+       where inserting it would put it for zones interfering by bounds;
+       zones are sorted by morton code of that node and the tree is built a
+       level at a time from the occupied codes
+
+       centroid and size default to a root node just enclosing the bounds
+       of all zones; bounds may be given as (n, 2, 3) array of min, max
+       coords to skip reading them from zones
+
+       with looseness above 1 builds a loose octree, placing zones where
+       inserting them into it would
+
+       garbage collection is paused while building, as collecting during
+       creation of the many nodes, which all reference their parents, took
+       most of the time
+
+       returns root space node
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _bulk_load( list(zones), limit, centroid, size, bounds,
+                           looseness )
+    finally:
+        if enabled:
+            gc.enable()
+
+def _bulk_load( zones, limit, centroid, size, bounds, looseness ):
+    """builds space octree for bulk_load
+    """
+    if bounds is None:
+        bounds = [ [list(zone.bounds[0]), list(zone.bounds[1])]
+                   for zone in zones ]
+    bounds = asarray( bounds, 'd' ).reshape( len(zones), 2, 3 )
+    min_bounds, max_bounds = bounds[:, 0], bounds[:, 1]
+
+    # size root from extent of data, a power of 2 multiple of limit so node
+    # sizes line up with limit, and slightly larger so all zones lie inside
+    if len( zones ) and centroid is None:
+        low, high = min_bounds.min( 0 ), max_bounds.max( 0 )
+        centroid = tuple( (low + high) / 2.0 )
+        if size is None:
+            extent = max( (high - low).max() * 1.000001, limit )
+            size = limit * 2.0 ** ceil( log(extent / limit, 2) )
+    if centroid is None:
+        centroid = ( 0.0, 0.0, 0.0 )
+    if size is None:
+        size = 2.0**10
+    root = Space( centroid=centroid, size=size, looseness=looseness )
+
+    # depth of deepest level node size stays above limit at
+    depth = 0
+    while size / 2.0**depth > limit and depth < MAX_BULK_DEPTH:
+        depth += 1
+
+    # range of cells at deepest level each zone intersects, cells include
+    # their maximum face as space nodes do
+    width = size / 2.0**depth
+    origin = array( centroid, 'd' ) - size / 2.0
+    low = ceil_array( (min_bounds - origin) / width - 1.0 ).astype( 'i8' )
+    high = ceil_array( (max_bounds - origin) / width ).astype( 'i8' ) - 1
+    low = low.clip( 0, None )
+    high = high.clip( None, 2**depth - 1 )
+
+    # zones fit one node down to level where their cell ranges first
+    # differ, zones outside root stay in root
+    differ = ( low ^ high ).max( 1 )
+    levels = zeros( len(zones), 'i8' )
+    for bit in range( depth ):
+        levels[differ >= 2**bit] = bit + 1
+    levels = depth - levels
+    levels[( low > high ).any( 1 )] = 0
+    cells = low
+
+    # in loose octree zones follow cell holding their centre down while
+    # they fit enlarged cube of its node
+    if looseness > 1.0:
+        centres = ( min_bounds + max_bounds ) / 2.0
+        cells = floor( (centres - origin) / width ).astype( 'i8' )
+        cells = cells.clip( 0, 2**depth - 1 )
+        levels = zeros( len(zones), 'i8' )
+        for level in range( 1, depth + 1 ):
+            node = size / 2.0**level
+            centroids = origin + ( (cells >> (depth - level)) + 0.5 ) * node
+            reach = node * looseness / 2.0
+            fits = ( (min_bounds >= centroids - reach).all( 1 )
+                     & (max_bounds <= centroids + reach).all( 1 )
+                     & (levels == level - 1) )
+            levels[fits] = level
+
+    # interleave cell bits into morton codes, zyx, and truncate to code of
+    # node each zone goes in
+    codes = zeros( len(zones), 'i8' )
+    for bit in range( depth ):
+        for axis in range( 3 ):
+            codes |= ( (cells[:, axis] >> bit) & 1 ) << ( 3 * bit + axis )
+    codes >>= 3 * ( depth - levels )
+
+    # sort zones by node, parents before children
+    order = argsort( (codes << 3 * (depth - levels) << 5) | levels,
+                     kind="mergesort" )
+
+    # spawn nodes a level at a time down to deepest occupied level, keeping
+    # nodes of each level by code
+    nodes = [ {0: root} ]
+    for level in range( 1, levels.max() + 1 if len(zones) else 1 ):
+        below = flatnonzero( levels >= level )
+        parents = set( (codes[below] >> 3 * (levels[below] - level + 1))
+                       .tolist() )
+        level_nodes = {}
+        for code in sorted( parents ):
+            parent = nodes[-1][code]
+            parent.spawn()
+            for i, child in enumerate( parent.children ):
+                level_nodes[(code << 3) | i] = child
+        nodes.append( level_nodes )
+
+    # add zones in morton order
+    levels, codes = levels.tolist(), codes.tolist()
+    for slot in order.tolist():
+        zone = zones[slot]
+        assert zone.space is None
+        space = nodes[levels[slot]][codes[slot]]
+        zone.space = space
+        space.zones.add( zone )
+
+    # count zones of each node in one pass from deepest level up
+    for level_nodes in reversed( nodes ):
+        for space in level_nodes.itervalues():
+            space.zone_count += len( space.zones )
+            if space.parent is not None:
+                space.parent.zone_count += space.zone_count
+
+    return root
+
+def _along( start, end, zone ):
+    """returns fraction of way along segment from start to end the centre of
+       zone's bounds projects onto
+    """
+    min_bound, max_bound = zone.bounds
+    t, length = 0.0, 0.0
+    for a, b, low, high in zip( start, end, min_bound, max_bound ):
+        t += ( (low + high) / 2.0 - a ) * ( b - a )
+        length += ( b - a ) * ( b - a )
+    if length == 0.0:
+        return 0.0
+    return t / length
+
+def _classify_cubes( zone, bounds, zone_bounds ):
+    """returns codes of zone against bounding cubes of (n, 2, 3) array of
+       zone bounds, in one numpy expression if zone's bounds are given
+    """
+    centroids = zone_bounds.mean( 1 )
+    sizes = ( zone_bounds[:, 1] - zone_bounds[:, 0] ).max( 1 )
+    if bounds is not None:
+        return classify_bounds( bounds[0], bounds[1], centroids,
+                                sizes ).tolist()
+
+    cube = Loose_Bounds( None, 0.0 )
+    codes = []
+    for centroid, size in zip( centroids.tolist(), sizes.tolist() ):
+        cube.centroid, cube.size = centroid, size
+        codes.append( zone.classify(cube) )
+    return codes
@@ -5,14 +5,20 @@ from Zone import Zone
 class Vertex( Vector3, Zone ):
     """a point in 3d space
     """
+    BOUNDS_INTERFERE = True
 
     def __init__( self, x, y, z ):
-        Vector3.__init__( self, x=x, y=y, z=z )
+        Vector3.__init__( self, (x, y, z) )
         Zone.__init__( self, min_vertex=self, max_vertex=self )
 
         
     def __repr__( self ):
-        return "<vertex x=%.2f y=%.2f z=%.2f />" % tuple( self._coords )
+        return "<vertex x=%.2f y=%.2f z=%.2f />" % tuple( self )
+
+    def copy( self ):
+        """return new vertex at same position
+        """
+        return Vertex( *self )
 
     def interfere( self, space ):
         """determines if this zone intersects or contains given space
@@ -27,18 +33,21 @@ class Vertex( Vector3, Zone ):
 
         return None
 
-    def distance( self, vertex ):
-        """returns distance from this vertex to another vertex
-        """
-        d = self - vertex
-        return d.magnitude
+    def project( self, edge, out=None ):
+        """returns vertex projected onto line through given edge
 
-    def project( self, edge ):
-        """returns new vertex projected onto given edge
+           writes projected position into out if given instead of making
+           new vertex
         """
-        leg = Vector3( *(self - edge[0]) )
-        base = Vector3( *(edge[1] - edge[0]) )
-        t = leg.project( base )
-        delta = t + (edge[0] - self)
-        return self + delta
-        
+        x, y, z = self
+        ax, ay, az = edge[0]
+        bx, by, bz = edge[1]
+
+        # fraction of way along edge from projecting leg onto base
+        ux, uy, uz = bx - ax, by - ay, bz - az
+        t = ( ((x - ax) * ux + (y - ay) * uy + (z - az) * uz)
+              / (ux * ux + uy * uy + uz * uz) )
+
+        if out is None:
+            return Vertex( ax + ux * t, ay + uy * t, az + uz * t )
+        return out.set( ax + ux * t, ay + uy * t, az + uz * t )
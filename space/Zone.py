@@ -1,7 +1,57 @@
+from numpy import asarray, newaxis, where
+
+# codes returned classifying a zone against a space node
+NONE = -1 # zone does not touch space
+INTERSECT = 0 # zone intersects space
+CONTAIN = 1 # zone contains space
+
+def classify_bounds( min_bounds, max_bounds, centroids, sizes ):
+    """classify zone bounds against space nodes in one numpy expression
+
+       arrays broadcast against each other over leading axes, so one node
+       can be tested against (n, 3) arrays of zone bounds or one zone
+       against (8, 3) array of child centroids; follows the inclusive
+       minimum, exclusive maximum rules of bounds_intersect_space
+
+       returns array of CONTAIN, INTERSECT or NONE codes
+    """
+    radius = asarray( sizes, 'd' )[..., newaxis] / 2.0
+    low = centroids - radius
+    high = centroids + radius
+
+    contain = ( (min_bounds <= low).all(-1) & (max_bounds >= high).all(-1) )
+    intersect = ( (high >= min_bounds).all(-1) & (low < max_bounds).all(-1) )
+    return where( contain, CONTAIN, where(intersect, INTERSECT, NONE) )
+
+def select_zones( zones ):
+    """set given zones selected, calling selection hook once per zone class
+    """
+    for cls, group in _by_class( zones, False ):
+        cls.handle_select_batch( group )
+
+def deselect_zones( zones ):
+    """set given zones deselected, calling deselection hook once per zone
+       class
+    """
+    for cls, group in _by_class( zones, True ):
+        cls.handle_deselect_batch( group )
+
+def _by_class( zones, selected ):
+    """flip selected flag of zones and group them by class
+    """
+    groups = {}
+    for zone in zones:
+        assert zone.selected is selected
+        zone.selected = not selected
+        groups.setdefault( zone.__class__, [] ).append( zone )
+    return groups.items()
 
 class Zone( object ):
     """superclass for phenomena that can be placed in octree of space nodes
     """
+    # set by subclasses whose interfere is decided by bounds alone, so they
+    # can be classified with classify_bounds in batches
+    BOUNDS_INTERFERE = False
 
     def __init__( self, min_vertex, max_vertex ):
         """
@@ -34,6 +84,21 @@ class Zone( object ):
 
         return None
 
+    def classify( self, space ):
+        """returns CONTAIN, INTERSECT or NONE code from interfere with space
+        """
+        interference = self.interfere( space )
+        if interference is None:
+            return NONE
+        if interference:
+            return CONTAIN
+        return INTERSECT
+
+    def bounds_array( self ):
+        """returns min, max bounds as (2, 3) array
+        """
+        return asarray( [tuple(self.bounds[0]), tuple(self.bounds[1])], 'd' )
+
     def bounds_contain_space( self, space ):
         """returns true if this zone's bounding box contains given space
         """
@@ -74,6 +139,20 @@ class Zone( object ):
 
         return True
 
+    def update_bounds( self ):
+        """recalculate bounds after zone moves or changes shape
+
+           default only drops cached bounds, for zones whose bounds track
+           them already
+        """
+        self._bounds_changed()
+
+    def _bounds_changed( self ):
+        """drop bounds arrays cached by containing space node
+        """
+        if self.space is not None:
+            self.space._zone_arrays = None
+
     def draw( self ):
         """draw this zone to opengl
         """
@@ -97,6 +176,22 @@ class Zone( object ):
         # call deselection hook
         self.handle_deselect()
 
+    @classmethod
+    def handle_select_batch( cls, zones ):
+        """do something when given zones of this class are selected together
+
+           default calls selection hook of each zone
+        """
+        for zone in zones:
+            zone.handle_select()
+
+    @classmethod
+    def handle_deselect_batch( cls, zones ):
+        """do something when given zones of this class are deselected together
+        """
+        for zone in zones:
+            zone.handle_deselect()
+
     def handle_select( self ):
         """do something when selected
         """
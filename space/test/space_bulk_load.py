@@ -0,0 +1,40 @@
+###
+### compare bulk loading space octree against inserting zones one at a time
+###
+import sys
+from random import Random
+from time import time
+
+from l33tC4D.space.Space import Space, bulk_load
+from l33tC4D.space.Vertex import Vertex
+
+def make_vertices( count, spread=500.0 ):
+    """returns list of random vertices
+    """
+    random = Random( 0 )
+    return [ Vertex(*[random.uniform(-spread, spread) for i in range(3)])
+             for i in range( count ) ]
+
+if __name__ == "__main__":
+    count = 100000
+    if len( sys.argv ) > 1:
+        count = int( sys.argv[1] )
+    limit = 2.0**3
+
+    vertices = make_vertices( count )
+    start = time()
+    bulk_load( vertices, limit=limit )
+    bulk = time() - start
+
+    # inserting all would take minutes, time a tenth
+    for vertex in vertices:
+        vertex.space = None
+    space = Space( size=2.0**10 )
+    start = time()
+    for vertex in vertices[:count // 10]:
+        space.insert( vertex, limit=limit )
+    insert = ( time() - start ) * 10
+
+    print "%-8s %10s %12s" % ( "load", "seconds", "zones/s" )
+    print "%-8s %10.2f %12.0f" % ( "bulk", bulk, count / bulk )
+    print "%-8s %10.2f %12.0f" % ( "insert", insert, count / insert )
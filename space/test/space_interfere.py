@@ -0,0 +1,85 @@
+###
+### compare iterative space interfere against previous recursive version
+###
+import sys
+from time import time
+
+from l33tC4D.space.Space import Space
+from test_linear_space import make_zones
+
+def recursive_interfere( space, zone, limit=1.0, _baggage=set() ):
+    """previous recursive space interfere, unions new sets at each level
+    """
+    kisses = set()
+    intersects = set()
+
+    zone_interference = zone.interfere( space=space )
+    if zone_interference is None:
+        return kisses, intersects
+
+    if zone_interference:
+        intersects |= space.zones | recursive_child_zones( space )
+        for z in _baggage:
+            if z.interfere( space=space ) is not None:
+                intersects.add( z )
+        return kisses, intersects
+
+    forward_baggage = set()
+    for z in _baggage:
+        z_interference = z.interfere( space=space )
+        if z_interference is not None:
+            if not z_interference:
+                forward_baggage.add( z )
+            else:
+                intersects.add( z )
+
+    if space.size > limit:
+        if space.children is None:
+            space.spawn()
+        for child in space.children:
+            k, i = recursive_interfere( child, zone, limit,
+                                        space.zones | forward_baggage )
+            kisses |= k
+            intersects |= i
+        return kisses, intersects
+
+    kisses |= space.zones | recursive_child_zones( space ) | forward_baggage
+    return kisses, intersects
+
+def recursive_child_zones( space ):
+    """previous recursive get child zones
+    """
+    zones = set()
+    if space.children is not None:
+        for child in space.children:
+            zones |= child.zones | recursive_child_zones( child )
+    return zones
+
+def time_queries( interfere, space, queries, limit ):
+    """returns seconds to interfere each query and list of results
+    """
+    results = []
+    start = time()
+    for query in queries:
+        results.append( interfere(space, query, limit=limit) )
+    return time() - start, results
+
+if __name__ == "__main__":
+    count = 4000
+    if len( sys.argv ) > 1:
+        count = int( sys.argv[1] )
+
+    space = Space( size=2.0**8 )
+    for zone in make_zones( 0, count=count ):
+        space.insert( zone, limit=2.0**2 )
+    queries = make_zones( 1, count=50 )
+
+    print "%-8s %10s %10s %10s" % ( "limit", "recursive", "iterative",
+                                    "speedup" )
+    for limit in 2.0**6, 2.0**3, 2.0**0:
+        old, old_results = time_queries( recursive_interfere, space,
+                                         queries, limit )
+        new, new_results = time_queries( Space.interfere, space, queries,
+                                         limit )
+        assert old_results == new_results
+        print "%-8g %10.4f %10.4f %10.2f" % ( limit, old, new, old / new )
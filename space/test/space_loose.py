@@ -0,0 +1,95 @@
+###
+### compare queries on tight and loose space octrees
+###
+import math
+import sys
+from random import Random
+from time import time
+
+from l33tC4D.space.Space import Space
+from l33tC4D.space.Vertex import Vertex
+from l33tC4D.space.Edge import Edge
+from l33tC4D.space.Box import Box
+from l33tC4D.ether.Frustum import Frustum
+
+def make_scene( count, spread=200.0 ):
+    """returns list of boxes around box default size of 10 and vertices
+    """
+    random = Random( 0 )
+    def point():
+        return [ random.uniform(-spread, spread) for i in range(3) ]
+    zones = [ Box(point(), min(random.lognormvariate(math.log(10.0), 0.8),
+                               spread)) for i in range(count // 2) ]
+    zones += [ Vertex(*point()) for i in range(count - count // 2) ]
+    return zones
+
+def make_queries( spread=200.0 ):
+    """returns pick edges, vertices and frustum looking at centre of scene
+    """
+    random = Random( 1 )
+    def point( z ):
+        return Vertex( random.uniform(-spread, spread),
+                       random.uniform(-spread, spread), z )
+    picks = [ Edge(point(-2 * spread), point(2 * spread)) for i in range(20) ]
+    points = [ point(random.uniform(-spread, spread)) for i in range(20) ]
+
+    # 60 degree perspective from z=300 towards origin
+    near, far = 50.0, 5000.0
+    f = 1.0 / math.tan( math.radians(30.0) )
+    frustum = Frustum( [(f, 0, 0, 0), (0, f, 0, 0),
+                        (0, 0, (far + near) / (near - far),
+                         2 * far * near / (near - far) - 300.0
+                         * (far + near) / (near - far)),
+                        (0, 0, -1, 300.0)] )
+    return ( ("pick", picks, 2.0**1), ("point", points, 2.0**1),
+             ("frustum", [frustum], 2.0**3) )
+
+def time_queries( space, queries, limit ):
+    """returns seconds to interfere each query and mean zones found
+    """
+    found = 0
+    start = time()
+    for query in queries:
+        kissed, contained = space.interfere( query, limit=limit )
+        found += len( kissed ) + len( contained )
+    return time() - start, found / float( len(queries) )
+
+def time_nearest( space, picks, radius=1.0 ):
+    """returns seconds to march each pick for nearest zone and mean zones
+       picked
+    """
+    found = 0
+    start = time()
+    for pick in picks:
+        found += len( space.march(pick, first=True, radius=radius) )
+    return time() - start, found / float( len(picks) )
+
+if __name__ == "__main__":
+    count = 10000
+    if len( sys.argv ) > 1:
+        count = int( sys.argv[1] )
+
+    zones = make_scene( count )
+    queries = make_queries()
+    print "%-8s %8s %8s %8s %10s %10s %10s" % ( "loose", "insert s", "root",
+                                                "depth", "query", "seconds",
+                                                "zones" )
+    for looseness in 1.0, 1.5, 2.0:
+        for zone in zones:
+            zone.space = None
+        space = Space( size=2.0**10, looseness=looseness )
+        start = time()
+        for zone in zones:
+            space.insert( zone, limit=2.0**1 )
+        inserting = time() - start
+
+        root = len( space.zones )
+        depth = sum( math.log(space.size / zone.space.size, 2)
+                     for zone in zones ) / len( zones )
+        for name, query, limit in queries:
+            seconds, found = time_queries( space, query, limit )
+            print "%-8g %8.2f %8d %8.2f %10s %10.4f %10.1f" % (
+                looseness, inserting, root, depth, name, seconds, found )
+        seconds, found = time_nearest( space, queries[0][1] )
+        print "%-8g %8.2f %8d %8.2f %10s %10.4f %10.1f" % (
+            looseness, inserting, root, depth, "nearest", seconds, found )
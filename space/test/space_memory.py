@@ -0,0 +1,80 @@
+###
+### compare memory per node and speed of pointer and linear space octrees
+###
+import sys
+from random import Random
+from time import time
+
+from l33tC4D.space.Space import Space
+from l33tC4D.space.Linear_Space import Linear_Space
+from l33tC4D.space.Vertex import Vertex
+
+def make_vertices( count, spread=500.0 ):
+    """returns list of random vertices
+    """
+    random = Random( 0 )
+    return [ Vertex(*[random.uniform(-spread, spread) for i in range(3)])
+             for i in range( count ) ]
+
+def sizeof( obj ):
+    """returns bytes of object and its instance dict
+    """
+    size = sys.getsizeof( obj )
+    if hasattr( obj, "__dict__" ):
+        size += sys.getsizeof( obj.__dict__ )
+    return size
+
+def space_bytes( space ):
+    """returns node count and bytes used by nodes of pointer octree
+    """
+    nodes, size = 0, 0
+    stack = [ space ]
+    while stack:
+        space = stack.pop()
+        nodes += 1
+        size += sizeof( space ) + sizeof( space.centroid )
+        size += space.centroid._coords.nbytes + sys.getsizeof( space.zones )
+        if space.children is not None:
+            size += sys.getsizeof( space.children )
+            stack.extend( space.children )
+    return nodes, size
+
+def linear_bytes( space ):
+    """returns node count and bytes used by arrays of linear octree
+    """
+    size = sizeof( space )
+    for a in space.node_keys, space.node_start, space.zone_order:
+        size += sys.getsizeof( a )
+    for l in space._zones, space._keys, space._slots:
+        size += sys.getsizeof( l )
+    return space.node_count, size
+
+def time_tree( space, vertices, queries ):
+    """returns seconds to insert vertices and interfere queries
+    """
+    start = time()
+    for vertex in vertices:
+        space.insert( vertex, limit=2.0**3 )
+    inserted = time()
+    for query in queries:
+        space.interfere( query, limit=2.0**5 )
+    return inserted - start, time() - inserted
+
+if __name__ == "__main__":
+    count = 2000
+    if len( sys.argv ) > 1:
+        count = int( sys.argv[1] )
+
+    print "%-8s %8s %10s %10s %10s %10s" % ( "tree", "nodes", "bytes",
+                                             "bytes/node", "insert s",
+                                             "query s" )
+    for name, tree, measure in ( ("pointer", Space, space_bytes),
+                                 ("linear", Linear_Space, linear_bytes) ):
+        space = tree( size=2.0**10 )
+        queries = make_vertices( 100 )
+        inserting, querying = time_tree( space, make_vertices(count),
+                                         queries )
+        nodes, size = measure( space )
+        print "%-8s %8d %10d %10.1f %10.4f %10.4f" % ( name, nodes, size,
+                                                       size / float(nodes),
+                                                       inserting, querying )
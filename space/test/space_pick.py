@@ -0,0 +1,78 @@
+###
+### compare picking with sphere tested edges, exact edges and marching
+###
+import sys
+from random import Random
+from time import time
+
+from l33tC4D.space.Space import Space
+from l33tC4D.space.Vertex import Vertex
+from l33tC4D.space.Edge import Edge
+
+class Sphere_Edge( Edge ):
+    """edge interfering with sphere around space as edges used to
+    """
+
+    def interfere( self, space ):
+        radius = space.size * 0.8660254037844386 # sqrt(3) / 2
+        for end in self.vertices:
+            if end.distance( space.centroid ) <= radius:
+                return False
+
+        closest = space.centroid.project( edge=self )
+        if closest.distance( space.centroid ) > radius:
+            return None
+
+        between = self[0].distance( self[1] )
+        for end in self.vertices:
+            if end.distance( closest ) >= between:
+                return None
+
+        return False
+
+def make_rays( count, spread=100.0 ):
+    """returns list of random start, end points crossing space
+    """
+    random = Random( 1 )
+    def point( z ):
+        return [ random.uniform(-spread, spread),
+                 random.uniform(-spread, spread), z ]
+    return [ (point(-2 * spread), point(2 * spread)) for i in range(count) ]
+
+def time_picks( pick, rays ):
+    """returns seconds to pick with each ray and mean zones picked
+    """
+    picked = 0
+    start = time()
+    for a, b in rays:
+        picked += pick( a, b )
+    return time() - start, picked / float( len(rays) )
+
+if __name__ == "__main__":
+    count = 20000
+    if len( sys.argv ) > 1:
+        count = int( sys.argv[1] )
+    limit = 2.0**1
+
+    random = Random( 0 )
+    space = Space( size=2.0**9 )
+    for i in range( count ):
+        space.insert( Vertex(*[random.uniform(-100.0, 100.0)
+                               for j in range(3)]), limit=limit )
+    rays = make_rays( 50 )
+
+    def sphere( a, b ):
+        return len( space.interfere(Sphere_Edge(Vertex(*a), Vertex(*b)),
+                                    limit=limit)[0] )
+    def exact( a, b ):
+        return len( space.interfere(Edge(Vertex(*a), Vertex(*b)),
+                                    limit=limit)[0] )
+    def nearest( a, b ):
+        return len( space.march(Edge(Vertex(*a), Vertex(*b)), limit=limit,
+                                first=True, radius=1.0) )
+
+    print "%-8s %10s %10s" % ( "pick", "seconds", "zones" )
+    for name, pick in ( ("sphere", sphere), ("exact", exact),
+                        ("nearest", nearest) ):
+        seconds, picked = time_picks( pick, rays )
+        print "%-8s %10.4f %10.1f" % ( name, seconds, picked )
@@ -14,3 +14,37 @@ d = c.project( ab )
 assert d.x == 2.0
 assert d.y == 0.0
 assert d.z == 0.0
+
+# project into existing vertex without making a new one
+e = Vertex( 9, 9, 9 )
+assert c.project( ab, out=e ) is e
+assert tuple( e ) == tuple( d )
+
+###
+### test batched classification matches classifying zones one at a time
+###
+from l33tC4D.space.Space import Space
+from l33tC4D.space.Box import Box
+
+space = Space( size=8.0 )
+space.spawn()
+for zone in ( Vertex(1, -1, 1), Vertex(0, 0, 0), Box((1, 1, 1), 2.0),
+              Box((0, 0, 0), 12.0), Box((2, 2, 2), 4.0), ab ):
+    assert ( space.classify_children(zone).tolist()
+             == [zone.classify(child) for child in space.children] )
+
+###
+### test clipping segment against cube
+###
+from l33tC4D.space.Edge import clip_segment, clip_box
+
+assert clip_segment( (-4, 0, 0), (4, 0, 0), (0, 0, 0), 4.0 ) == ( 0.25, 0.75 )
+assert clip_segment( (-4, 3, 0), (4, 3, 0), (0, 0, 0), 4.0 ) is None
+assert clip_segment( (-4, -4, 0), (4, 4, 0), (1, 1, 1), 2.0 ) == ( 0.5, 0.75 )
+assert ( clip_box((-4, 0, 0), (4, 0, 0), (-1, -1, -1), (3, 1, 1))
+         == (0.375, 0.875) )
+assert clip_box( (0, 0, -4), (0, 0, 4), (0, 0, 0), (0, 0, 0) ) == ( 0.5, 0.5 )
+
+# exact against cube, not sphere around it
+assert ab.interfere( Space(centroid=(2, 1.5, 0), size=4.0) ) is False
+assert ab.interfere( Space(centroid=(2, 1.5, 0), size=2.0) ) is None
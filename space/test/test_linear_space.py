@@ -0,0 +1,93 @@
+import unittest
+from random import Random
+
+from l33tC4D.space.Space import Space
+from l33tC4D.space.Linear_Space import Linear_Space
+from l33tC4D.space.Vertex import Vertex
+from l33tC4D.space.Edge import Edge
+from l33tC4D.space.Box import Box
+
+def make_zones( seed, count=200, spread=100.0 ):
+    """returns list of random vertices, edges and boxes
+    """
+    random = Random( seed )
+    def point():
+        return [ random.uniform(-spread, spread) for i in range(3) ]
+
+    zones = []
+    for i in range( count ):
+        if i % 4 == 0:
+            zones.append( Edge(Vertex(*point()), Vertex(*point())) )
+        elif i % 4 == 1:
+            zones.append( Box(point(), random.uniform(1.0, 60.0)) )
+        else:
+            zones.append( Vertex(*point()) )
+    return zones
+
+class Test_Linear_Space( unittest.TestCase ):
+    """tests linear space octree against pointer space octree
+    """
+
+    def setUp( self ):
+        # same zones inserted into both trees
+        self.space = Space( size=2.0**8 )
+        self.linear = Linear_Space( size=2.0**8 )
+        self.zones = make_zones( 0 )
+        self.linear_zones = make_zones( 0 )
+        for zone, linear_zone in zip( self.zones, self.linear_zones ):
+            self.space.insert( zone, limit=2.0**2 )
+            self.linear.insert( linear_zone, limit=2.0**2 )
+
+    def assert_same( self, sets, linear_sets ):
+        """check sets hold matching zones of each tree
+        """
+        index = dict( (zone, i) for i, zone in enumerate(self.zones) )
+        linear_index = dict( (zone, i) for i, zone
+                             in enumerate(self.linear_zones) )
+        for s, linear_s in zip( sets, linear_sets ):
+            self.assertEqual( sorted(index[z] for z in s),
+                              sorted(linear_index[z] for z in linear_s) )
+
+    def test_interfere( self ):
+        """test interfering gives same zones as pointer octree
+        """
+        for query in make_zones( 1, count=40 ):
+            for limit in 2.0**6, 2.0**3, 2.0**0:
+                self.assert_same( self.space.interfere(query, limit=limit),
+                                  self.linear.interfere(query, limit=limit) )
+
+        self.assert_same( (self.space.zones, self.space.get_child_zones()),
+                          (self.linear.zones, self.linear.get_child_zones()) )
+
+    def test_remove( self ):
+        """test removed zones aren't found and prune keeps the rest
+        """
+        for zone, linear_zone in zip( self.zones[::3], self.linear_zones[::3] ):
+            self.space.remove( zone )
+            self.linear.remove( linear_zone )
+        self.assertEqual( self.linear.remove(self.linear_zones[1]), None )
+        self.space.remove( self.zones[1] )
+        self.assertRaises( KeyError, self.linear.remove, self.linear_zones[1] )
+
+        query = Vertex( 0.0, 0.0, 0.0 )
+        before = self.linear.interfere( query, limit=2.0**4 )
+        self.assert_same( self.space.interfere(query, limit=2.0**4), before )
+
+        self.linear.prune()
+        after = self.linear.interfere( query, limit=2.0**4 )
+        self.assertEqual( before, after )
+        self.assertEqual( len(self.linear), len(self.zones) - 68 )
+
+    def test_nodes( self ):
+        """test only nodes holding zones are stored
+        """
+        nodes = self.linear.node_count
+        self.assert_( 0 < nodes <= len(self.zones) )
+        self.assertEqual( len(self.linear.node_start), nodes + 1 )
+        self.assertEqual( self.linear.node_start[-1], len(self.zones) )
+        self.assertEqual( sorted(self.linear.zone_order.tolist()),
+                          range(len(self.zones)) )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,16 @@
 import unittest
+import math
 
-from l33tC4D.space.Space import Space
+from l33tC4D.space.Space import Space, bulk_load
 from l33tC4D.space.Vertex import Vertex
-from l33tC4D.space.Edge import Edge
+from l33tC4D.space.Edge import Edge, clip_box
+from l33tC4D.space.Box import Box
+from l33tC4D.ether.Frustum import Frustum, inside_polygon, window_to_device
+from l33tC4D.space.Zone import Zone, select_zones, deselect_zones
+try:
+    from l33tC4D.space.Zone_Camera import Zone_Camera
+except ImportError:
+    Zone_Camera = None # gtk not installed
 
 class Test_Space( unittest.TestCase ):
     """tests space octree
@@ -77,6 +85,360 @@ class Test_Space( unittest.TestCase ):
         self.space.prune()
         self.space.print_tree()
 
+    def test_child_zones( self ):
+        """test streaming child zones and interfering empty space
+        """
+        self.a = Vertex( 3, 4, 5 )
+        self.b = Vertex( -3, 4, 5 )
+        self.space.insert( self.a, limit=2.0**2 )
+        self.space.insert( self.b, limit=2.0**2 )
+
+        self.assertEqual( sorted(self.space.iter_child_zones()),
+                          sorted([self.a, self.b]) )
+        self.assertEqual( self.space.get_child_zones(),
+                          set([self.a, self.b]) )
+
+        # interfering where no zones are doesn't grow tree
+        empty = Space( size=2.0**8 )
+        kissed, contained = empty.interfere( zone=self.a, limit=2.0**0 )
+        self.assert_( len(kissed) == 0 and len(contained) == 0 )
+        self.assert_( empty.children is None )
+
+    def test_move( self ):
+        """test moving zones places them as inserting from root does
+        """
+        zones = [ Vertex(i * 7 - 50, i * 3 - 20, 40 - i * 5) for i in range(16) ]
+        zones.append( Box((10, -10, 20), 6.0) )
+        for zone in zones:
+            self.space.insert( zone, limit=2.0**2 )
+
+        # drag some zones a little and some a long way
+        for i, zone in enumerate( zones[::2] ):
+            offset = ( 0.5, -0.25, 0.1 ) if i % 2 else ( -60.0, 60.0, 30.0 )
+            target = zone.centroid if isinstance( zone, Box ) else zone
+            target.add( Vertex(*offset) )
+            self.space.move( zone, limit=2.0**2 )
+
+        fresh = Space( size=2.0**8 )
+        for zone in zones:
+            space = zone.space
+            zone.space = None
+            fresh.insert( zone, limit=2.0**2 )
+            self.assertEqual( (tuple(space.centroid), space.size),
+                              (tuple(zone.space.centroid), zone.space.size) )
+
+        # moving last zone out of a branch collapses its empty nodes
+        lone = Space( size=2.0**8 )
+        a = Vertex( 100, 100, 100 )
+        lone.insert( a, limit=2.0**2 )
+        a.set( -100, -100, -100 )
+        lone.move( a, limit=2.0**2 )
+        self.assert_( lone.children[7].is_empty() )
+        self.assert_( not lone.children[0].is_empty() )
+        self.assertRaises( KeyError, fresh.move, Vertex(0, 0, 0) )
+
+    def test_outside( self ):
+        """test zone outside root interferes with nothing at any limit
+        """
+        space = Space( size=4.0 )
+        space.insert( Vertex(1, 1, 1) )
+        self.assertEqual( space.interfere(Vertex(100, 100, 100), limit=8.0),
+                          (set(), set()) )
+        self.assertEqual( space.interfere(Vertex(100, 100, 100)),
+                          (set(), set()) )
+
+    def test_bounds_cache( self ):
+        """test zones changed in place and zones with own interfere are
+           classified by their own bounds and interfere
+        """
+        box = Box( (10, 10, 10), 2.0 )
+        self.space.insert( box, limit=2.0**6 )
+        query = Box( (20, 20, 20), 2.0 )
+        self.assertEqual( self.space.interfere(query),
+                          (set(), set()) )
+
+        box.centroid.set( 20, 20, 20 )
+        box.update_bounds()
+        kissed, contained = self.space.interfere( query )
+        self.assert_( box in kissed | contained )
+
+        # subclass overriding interfere is not classified by its bounds
+        class Hidden( Zone ):
+            def interfere( self, space ):
+                return None
+        hidden = Hidden( Vertex(-100, -100, -100), Vertex(100, 100, 100) )
+        self.space.insert( hidden, limit=2.0**6 )
+        kissed, contained = self.space.interfere( query )
+        self.assert_( hidden not in kissed | contained )
+
+    def test_bulk_load( self ):
+        """test bulk load places zones where inserting them does
+        """
+        zones = [ Vertex(i * 7 - 50, i * 3 - 20, 40 - i * 5) for i in range(16) ]
+        zones += [ Vertex(0, 0, 0), Vertex(64, 64, 64), Vertex(-64, 0, 32) ]
+        zones += [ Box((10, -10, 20), 6.0), Box((-30, 5, 5), 40.0) ]
+
+        bulk_load( zones, limit=2.0**2, size=2.0**8, centroid=(0, 0, 0) )
+        placed = [ (tuple(zone.space.centroid), zone.space.size)
+                   for zone in zones ]
+
+        for zone in zones:
+            zone.space = None
+            self.space.insert( zone, limit=2.0**2 )
+        self.assertEqual( placed, [(tuple(zone.space.centroid),
+                                    zone.space.size) for zone in zones] )
+
+        # sized from extent of zones when no size given
+        for zone in zones:
+            zone.space = None
+        space = bulk_load( zones, limit=2.0**2 )
+        self.assertEqual( space.size, 2.0**8 )
+        self.assertEqual( len(space.zones | space.get_child_zones()),
+                          len(zones) )
+
+        # zone count of each node covers zones held by it and below it
+        stack = [ space ]
+        while stack:
+            node = stack.pop()
+            children = node.children or []
+            self.assertEqual( node.zone_count, len(node.zones)
+                              + sum(child.zone_count for child in children) )
+            stack.extend( children )
+        self.assertEqual( space.zone_count, len(zones) )
+
+    def test_march( self ):
+        """test marching edge finds zones front to back
+        """
+        zones = [ Vertex(0.5, 0.5, z * 10 + 0.5) for z in range(-5, 5) ]
+        zones += [ Vertex(40, 40, 40), Box((0, 0, 60), 8.0) ]
+        for zone in zones:
+            self.space.insert( zone, limit=2.0**1 )
+
+        edge = Edge( Vertex(0.1, 0.1, -100), Vertex(0.1, 0.1, 100) )
+        marched = self.space.march( edge, limit=2.0**1 )
+        kissed, contained = self.space.interfere( edge, limit=2.0**1 )
+        self.assertEqual( set(marched), kissed | contained )
+        self.assertEqual( marched, zones[:10] + zones[11:] )
+
+        # nearest pick finds first zone edge hits, from either end, missing
+        # vertices unless their bounds are grown
+        self.assertEqual( self.space.march(edge, limit=2.0**1, first=True,
+                                           radius=0.5),
+                          zones[:1] )
+        self.assertEqual( self.space.march(edge, limit=2.0**1, first=True),
+                          zones[-1:] )
+        back = Edge( edge[1], edge[0] )
+        self.assertEqual( self.space.march(back, limit=2.0**1, first=True,
+                                           radius=0.5),
+                          zones[-1:] )
+        miss = Edge( Vertex(20, 20, -100), Vertex(20, 20, 100) )
+        self.assertEqual( self.space.march(miss, first=True, radius=0.5), [] )
+
+    def test_frustum( self ):
+        """test culling zones outside frustum
+        """
+        zones = [ Vertex(x, y, z) for x in range(-100, 101, 20)
+                  for y in range(-100, 101, 20) for z in range(-100, 101, 20) ]
+        for zone in zones:
+            self.space.insert( zone, limit=2.0**1 )
+
+        # perspective looking down -z with 90 degree field of view
+        near, far = 1.0, 100.0
+        f = 1.0 / math.tan( math.radians(45.0) )
+        frustum = Frustum( [(f, 0, 0, 0), (0, f, 0, 0),
+                            (0, 0, (far + near) / (near - far),
+                             2 * far * near / (near - far)),
+                            (0, 0, -1, 0)] )
+        for bound, expected in zip( frustum.get_bounds(),
+                                    ((-100, -100, -100), (100, 100, -1)) ):
+            for coord, e in zip( bound, expected ):
+                self.assertAlmostEqual( coord, e )
+
+        drawn, contained = self.space.interfere( frustum, limit=2.0**1 )
+        drawn |= contained
+        inside = set( zone for zone in zones if zone.z <= -near
+                      and abs(zone.x) <= -zone.z and abs(zone.y) <= -zone.z )
+        self.assert_( inside <= drawn )
+        self.assert_( all(zone.z <= 0 for zone in drawn) )
+        self.assert_( len(drawn) < len(zones) / 2 )
+        self.assertEqual( self.space.count_zones(), len(zones) )
+
+        # view volume enclosing whole space accepts it without descending
+        box = Frustum( [(1 / 200.0, 0, 0, 0), (0, 1 / 200.0, 0, 0),
+                        (0, 0, -1 / 200.0, 0), (0, 0, 0, 1)] )
+        kissed, contained = self.space.interfere( box, limit=2.0**1 )
+        self.assertEqual( (len(kissed), len(contained)), (0, len(zones)) )
+
+        # ether boxes are intersected too
+        self.assertEqual( frustum.intersect((0, 0, 50), 10), () )
+        self.assertEqual( frustum.intersect((0, 0, -50), 400)[0][1],
+                          frustum.CONTAINED )
+        self.assertEqual( frustum.intersect((0, 0, -50), 5)[0][1],
+                          frustum.CONTAINS )
+
+    def test_zone_counts( self ):
+        """test subtree counts and zone lists follow inserts and removes
+        """
+        zones = [ Vertex(i * 7 - 50, i * 3 - 20, 40 - i * 5) for i in range(16) ]
+        for zone in zones:
+            self.space.insert( zone, limit=2.0**2 )
+
+        def check( space ):
+            zones = list( space.zones ) + list( space.iter_child_zones() )
+            self.assertEqual( sorted(space.subtree_zones()), sorted(zones) )
+            self.assertEqual( space.zone_count, len(zones) )
+            for child in space.children or ():
+                check( child )
+        check( self.space )
+
+        # only ancestors of changed node drop their lists
+        a = zones[0]
+        ancestors = []
+        space = a.space
+        while space is not None:
+            ancestors.append( space )
+            space = space.parent
+        others = [ child for space in ancestors[1:] for child in space.children
+                   if child not in ancestors and child.zone_count ]
+        kept = [ child.subtree_zones() for child in others ]
+
+        self.space.remove( a )
+        self.assert_( all(space._subtree_zones is None for space in ancestors) )
+        self.assert_( all(child.subtree_zones() is zones for child, zones
+                          in zip(others, kept)) )
+        check( self.space )
+
+        zones[1].set( 60, 60, 60 )
+        self.space.move( zones[1], limit=2.0**2 )
+        check( self.space )
+        self.assertEqual( self.space.count_zones(), len(zones) - 1 )
+
+    def test_loose( self ):
+        """test zones sink in loose octree and are still found
+        """
+        zones = [ Box((x, y, z), 4.0) for x in range(-60, 61, 30)
+                  for y in range(-60, 61, 30) for z in (-30, 0, 30) ]
+        zones += [ Vertex(i * 7 - 50, i * 3 - 20, 40 - i * 5) for i in range(16) ]
+        loose = Space( size=2.0**8, looseness=2.0 )
+        for zone in zones:
+            loose.insert( zone, limit=2.0**1 )
+        self.assertEqual( len(loose.zones), 0 )
+        self.assert_( all(zone.space.size <= 8.0 for zone in zones) )
+
+        # queries find every zone whose bounds overlap theirs
+        for query in ( Box((0, 0, 0), 70.0), Box((15, 15, 15), 35.0),
+                       Vertex(1, 1, 1), Vertex(-50, -20, 40) ):
+            kissed, contained = loose.interfere( query, limit=2.0**1 )
+            (qmin, qmax) = [ tuple(bound) for bound in query.bounds ]
+            for zone in zones:
+                zmin, zmax = [ tuple(bound) for bound in zone.bounds ]
+                if all( a <= d and c <= b for a, b, c, d
+                        in zip(qmin, qmax, zmin, zmax) ):
+                    self.assert_( zone in kissed | contained )
+
+        # nearest pick finds zone ray enters first, as testing all does
+        for ray in ( Edge(Vertex(-100, -100, -100), Vertex(100, 100, 100)),
+                     Edge(Vertex(60, -100, 30), Vertex(60, 100, 30)),
+                     Edge(Vertex(-31, 100, 1), Vertex(-31, -100, 1)) ):
+            clips = [ (clip_box(ray[0], ray[1], *zone.bounds), zone)
+                      for zone in zones ]
+            nearest = min( (clip[0], zone) for clip, zone in clips
+                           if clip is not None )[1]
+            self.assertEqual( loose.march(ray, first=True), [nearest] )
+
+        # moving and bulk loading place zones where inserting does
+        zones[0].centroid.set( 31, -29, 2 )
+        loose.move( zones[0], limit=2.0**1 )
+        placed = [ zone.space for zone in zones ]
+        for zone in zones:
+            zone.space = None
+        bulk_load( zones, limit=2.0**1, centroid=(0, 0, 0), size=2.0**8,
+                   looseness=2.0 )
+        self.assertEqual( [(tuple(space.centroid), space.size)
+                           for space in placed],
+                          [(tuple(zone.space.centroid), zone.space.size)
+                           for zone in zones] )
+
+    def test_region_select( self ):
+        """test selecting zones inside part of view in one traversal
+        """
+        zones = [ Box((x, y, z), 4.0) for x in range(-60, 61, 12)
+                  for y in range(-60, 61, 12) for z in (-90, -60, -30) ]
+        for zone in zones:
+            self.space.insert( zone, limit=2.0**1 )
+
+        near, far = 1.0, 200.0
+        frustum = Frustum( [(1, 0, 0, 0), (0, 1, 0, 0),
+                            (0, 0, (far + near) / (near - far),
+                             2 * far * near / (near - far)),
+                            (0, 0, -1, 0)] )
+
+        def inside( polygon ):
+            device, front = frustum.project( [tuple(zone.centroid)
+                                              for zone in zones] )
+            return set( zone for zone, flag in zip(zones, front
+                        & inside_polygon(device, polygon)) if flag )
+
+        # lasso around top right of view, in window coords of 200 x 200
+        # window counted from top left
+        window = [ (100, 100), (180, 90), (150, 10) ]
+        lasso = window_to_device( window, 200, 200 )
+        for coords, expected in zip( lasso, [(0.0, 0.0), (0.8, 0.1),
+                                             (0.5, 0.9)] ):
+            for a, b in zip( coords, expected ):
+                self.assertAlmostEqual( a, b )
+        expected = inside( lasso )
+        self.assert_( expected )
+        self.assertEqual( frustum.polygon_zones(self.space, lasso,
+                                                limit=2.0**1), expected )
+        self.assertEqual( frustum.polygon_zones(self.space, lasso[:2]), set() )
+
+        # one traversal of frustum of lasso's bounds finds few candidates
+        region = frustum.sub_frustum( 0.0, 0.0, 0.8, 0.9 )
+        kissed, contained = self.space.interfere( region, limit=2.0**1 )
+        self.assert_( len(kissed | contained) < len(zones) / 4 )
+
+        # selection changes are applied a batch at a time
+        select_zones( expected )
+        self.assert_( all(zone.selected and zone.diffuse == zone.selected_color
+                          for zone in expected) )
+        deselect_zones( expected )
+        self.assert_( not any(zone.selected for zone in expected) )
+        self.assertRaises( AssertionError, deselect_zones, expected )
+
+        if Zone_Camera is None:
+            self.skipTest( "gtk not installed" )
+
+        class Lasso_Camera( Zone_Camera ):
+            size = ( 200, 200 )
+            def __init__( self, space ):
+                self.space = space
+                self.selected = set()
+                self.cull_limit = None
+                self.redraws = 0
+            def get_frustum( self ):
+                return frustum
+            def redraw( self ):
+                self.redraws += 1
+
+        camera = Lasso_Camera( self.space )
+        camera.select_lasso( window )
+        self.assertEqual( camera.selected, expected )
+        self.assert_( all(zone.diffuse == zone.selected_color
+                          for zone in expected) )
+
+        # new selection replaces old, restoring colors of zones left
+        camera.select_rectangle( 100, 100, 180, 10 )
+        rectangle = inside( [(0.0, 0.0), (0.8, 0.0), (0.8, 0.9), (0.0, 0.9)] )
+        self.assertEqual( camera.selected, rectangle )
+        self.assert_( not any(zone.selected for zone in expected - rectangle) )
+
+        # empty region clears selection
+        camera.select_rectangle( 100, 100, 100, 10 )
+        self.assertEqual( camera.selected, set() )
+        self.assert_( not any(zone.selected for zone in zones) )
+        self.assertEqual( camera.redraws, 3 )
+
 
 if __name__ == '__main__':
     unittest.main()
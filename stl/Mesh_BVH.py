@@ -0,0 +1,234 @@
+from numpy import ( array, asarray, ascontiguousarray, empty, zeros, arange,
+                    repeat, concatenate, cross, minimum, maximum, bincount,
+                    argsort, inf, flatnonzero, sqrt, where, ones, errstate )
+
+class Mesh_BVH( object ):
+    """bounding volume hierarchy over the triangles of a mesh for ray picking
+
+       nodes are stored in flat arrays, with the two children of a node
+       stored next to each other, and the triangles of each leaf stored
+       contiguously in hierarchy order
+
+       built top down a depth at a time, splitting each node where the
+       surface area heuristic is lowest among BINS bins along the longest
+       axis of its centroids
+    """
+    BINS = 16 # number of candidate split planes per node
+    LEAF_SIZE = 8 # nodes with this many triangles or fewer become leaves
+    EPSILON = 1e-12 # determinant below which ray is parallel to triangle
+
+    def __init__( self, triangles ):
+        """build hierarchy over (n, 3, 3) array of triangle vertex coords
+        """
+        triangles = asarray( triangles, 'd' )
+        self.size = len( triangles )
+
+        tri_min = triangles.min( 1 )
+        tri_max = triangles.max( 1 )
+        centroids = ( tri_min + tri_max ) / 2.0
+
+        # triangle indices in hierarchy order, partitioned as nodes are split
+        self.order = arange( self.size )
+
+        # a split node always has two non-empty children, so there are
+        # fewer than 2n nodes
+        nodes = max( 2 * self.size - 1, 1 )
+        self.child = -ones( nodes, 'i' ) # leaf nodes have child of -1
+        self.start = zeros( nodes, 'i' ) # first triangle of node
+        self.count = zeros( nodes, 'i' ) # number of triangles in node
+        self.node_min = zeros( (nodes, 3), 'f' )
+        self.node_max = zeros( (nodes, 3), 'f' )
+        self.count[0] = self.size
+
+        # split every node at each depth at once
+        used = 1
+        active = zeros( 1 if self.size > self.LEAF_SIZE else 0, 'i' )
+        while len( active ):
+            active, splits = self._split( active, centroids, tri_min,
+                                          tri_max )
+
+            # children of each node are stored next to each other
+            left = used + 2 * arange( len(active) )
+            used += 2 * len( active )
+            self.child[active] = left
+            self.start[left] = self.start[active]
+            self.count[left] = splits - self.start[active]
+            self.start[left + 1] = splits
+            self.count[left + 1] = self.count[active] - self.count[left]
+
+            children = concatenate( (left[:, None], left[:, None] + 1),
+                                    1 ).ravel()
+            active = children[self.count[children] > self.LEAF_SIZE]
+
+        # bounds of nodes from triangles in hierarchy order
+        nodes = arange( used )
+        if self.size > 0:
+            self.node_min[:used] = self._segment_reduce(
+                minimum, tri_min[self.order], nodes )
+            self.node_max[:used] = self._segment_reduce(
+                maximum, tri_max[self.order], nodes )
+
+        # store compact arrays
+        self.order = array( self.order, 'i' )
+        self.triangles = ascontiguousarray( triangles[self.order], 'f' )
+        self.child = self.child[:used].copy()
+        self.start = self.start[:used].copy()
+        self.count = self.count[:used].copy()
+        self.node_min = self.node_min[:used].copy()
+        self.node_max = self.node_max[:used].copy()
+
+    def _segment_reduce( self, ufunc, values, nodes ):
+        """reduce values over contiguous, ascending triangle ranges of nodes
+        """
+        # reduce over start:end of each node, discarding end:start of next
+        bounds = empty( 2 * len(nodes), 'i' )
+        bounds[0::2] = self.start[nodes]
+        bounds[1::2] = self.start[nodes] + self.count[nodes]
+        padded = concatenate( (values, values[:1]) )
+        return ufunc.reduceat( padded, bounds )[0::2]
+
+    def _split( self, active, centroids, tri_min, tri_max ):
+        """partition triangles of each active node along best binned sah split
+
+           returns nodes that can be split and index of first triangle of
+           right child of each
+        """
+        bins = self.BINS
+
+        # longest axis of centroids of each node, nodes with all centroids
+        # at one point can't be split
+        c_min = self._segment_reduce( minimum, centroids[self.order], active )
+        c_max = self._segment_reduce( maximum, centroids[self.order], active )
+        axis = ( c_max - c_min ).argmax( 1 )
+        rows = arange( len(active) )
+        extent = ( c_max - c_min )[rows, axis]
+        keep = extent > 0.0
+        active, axis, extent = active[keep], axis[keep], extent[keep]
+        low = c_min[keep][arange(len(active)), axis]
+        if len( active ) == 0:
+            return active, zeros( 0, 'i' )
+
+        # positions of triangles in active nodes, in ascending order
+        starts, counts = self.start[active], self.count[active]
+        ends = counts.cumsum()
+        node = repeat( arange(len(active)), counts )
+        positions = arange( ends[-1] ) + repeat( starts - (ends - counts),
+                                                 counts )
+
+        # sort triangles of each node by bin
+        indices = self.order[positions]
+        binned = ( (centroids[indices, axis[node]] - low[node])
+                   * (bins / extent[node]) ).astype( 'i' )
+        binned[binned >= bins] = bins - 1
+        key = node * bins + binned
+        sort = argsort( key, kind='mergesort' )
+        key = key[sort]
+        indices = indices[sort]
+        self.order[positions] = indices
+
+        # bounds of each occupied bin of each node, empty bins are inverted
+        counts = bincount( key, minlength=len(active) * bins )
+        occupied = flatnonzero( counts )
+        offsets = concatenate( ((0,), counts.cumsum()[:-1]) )[occupied]
+        bin_min = empty( (len(active) * bins, 3) )
+        bin_max = empty( (len(active) * bins, 3) )
+        bin_min.fill( inf )
+        bin_max.fill( -inf )
+        bin_min[occupied] = minimum.reduceat( tri_min[indices], offsets )
+        bin_max[occupied] = maximum.reduceat( tri_max[indices], offsets )
+        bin_min = bin_min.reshape( -1, bins, 3 )
+        bin_max = bin_max.reshape( -1, bins, 3 )
+        counts = counts.reshape( -1, bins )
+
+        # surface area heuristic for splitting after each bin
+        left_count = counts.cumsum( 1 )[:, :-1]
+        right_count = self.count[active][:, None] - left_count
+        left_area = self._area(
+            minimum.accumulate(bin_min, 1)[:, :-1],
+            maximum.accumulate(bin_max, 1)[:, :-1] )
+        right_area = self._area(
+            minimum.accumulate(bin_min[:, ::-1], 1)[:, ::-1][:, 1:],
+            maximum.accumulate(bin_max[:, ::-1], 1)[:, ::-1][:, 1:] )
+        with errstate( invalid='ignore' ):
+            cost = left_area * left_count + right_area * right_count
+        cost[(left_count == 0) | (right_count == 0)] = inf
+
+        best = cost.argmin( 1 )
+        return active, starts + left_count[arange(len(active)), best]
+
+    def _area( self, b_min, b_max ):
+        d = b_max - b_min
+        return ( d[..., 0] * d[..., 1] + d[..., 1] * d[..., 2]
+                 + d[..., 2] * d[..., 0] )
+
+    def intersect( self, origin, direction, max_distance=inf ):
+        """find nearest triangle hit by ray
+
+           all nodes at each depth are tested against the ray at once, then
+           all triangles of leaves hit are tested at once
+
+           returns ( <triangle index>, <distance>, (<u>, <v>) ) where u and v
+           are barycentric coords of hit relative to second and third
+           vertex, or None if no triangle is hit
+        """
+        origin = asarray( origin, 'd' )
+        direction = asarray( direction, 'd' )
+        length = sqrt( (direction**2).sum() )
+        if length == 0.0 or self.size == 0:
+            return None
+        direction = direction / length
+
+        # ray parallel to an axis gets a tiny direction along it rather than
+        # dividing by zero
+        inverse = 1.0 / where( direction == 0.0, 1e-30, direction )
+
+        # descend through nodes hit by ray, collecting leaves
+        leaves = []
+        frontier = zeros( 1, 'i' )
+        while len( frontier ):
+            low = ( self.node_min[frontier] - origin ) * inverse
+            high = ( self.node_max[frontier] - origin ) * inverse
+            near = minimum( low, high ).max( 1 )
+            far = maximum( low, high ).min( 1 )
+
+            frontier = frontier[ (near <= far) & (far >= 0.0)
+                                 & (near <= max_distance) ]
+            children = self.child[frontier]
+            leaves.append( frontier[children < 0] )
+            children = children[children >= 0]
+            frontier = concatenate( (children, children + 1) )
+
+        leaves = concatenate( leaves )
+        if len( leaves ) == 0:
+            return None
+
+        # gather triangles in leaves
+        counts = self.count[leaves]
+        ends = counts.cumsum()
+        candidates = ( arange(ends[-1]) + repeat(self.start[leaves]
+                                                  - (ends - counts), counts) )
+        triangles = self.triangles[candidates].astype( 'd' )
+
+        # moller trumbore intersection of ray with each triangle
+        v0 = triangles[:, 0]
+        e1 = triangles[:, 1] - v0
+        e2 = triangles[:, 2] - v0
+        p = cross( direction, e2 )
+        determinant = ( e1 * p ).sum( 1 )
+        parallel = abs( determinant ) < self.EPSILON
+        determinant[parallel] = 1.0
+        s = origin - v0
+        u = ( s * p ).sum( 1 ) / determinant
+        q = cross( s, e1 )
+        v = ( direction * q ).sum( 1 ) / determinant
+        t = ( e2 * q ).sum( 1 ) / determinant
+
+        hit = ( ~parallel & (u >= 0.0) & (v >= 0.0) & (u + v <= 1.0)
+                & (t >= 0.0) & (t <= max_distance) )
+        if not hit.any():
+            return None
+
+        t[~hit] = inf
+        nearest = t.argmin()
+        return ( int(self.order[candidates[nearest]]), float(t[nearest]),
+                 (float(u[nearest]), float(v[nearest])) )
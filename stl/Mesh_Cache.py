@@ -0,0 +1,196 @@
+import os
+from struct import Struct
+from hashlib import sha1
+from mmap import mmap, ACCESS_READ
+from tempfile import mkstemp
+from numpy import ndarray, ascontiguousarray
+
+class Mesh_Cache( object ):
+    """content addressed cache of preprocessed stl meshes on disk
+
+       each entry is named by the hash of the stl file it was parsed from
+       and the tolerance it was welded with, and holds the float32
+       triangles, welded vertices and faces and bounds of the mesh in a
+       flat binary layout that is memory mapped when loaded
+
+       stl files are only hashed the first time they are seen with a given
+       path, size and mtime
+
+       least recently used entries are evicted to keep the cache within
+       its disk budget, along with hashes no entry is named by
+    """
+    MAGIC = "l33tmesh"
+    VERSION = 1
+    HEADER = Struct( "<8sIII6d" ) # magic, version, size, vertex count, bounds
+    ALIGN = 16 # arrays start at multiples of this many bytes
+    SUFFIX = ".mesh"
+
+    def __init__( self, directory, budget=2**30 ):
+        self.directory = directory # directory holding cache entries
+        self.budget = budget # max bytes of entries to keep
+
+        # directory of content hashes indexed by path, size and mtime
+        self._key_directory = os.path.join( directory, "keys" )
+        if not os.path.isdir( self._key_directory ):
+            os.makedirs( self._key_directory )
+
+    def key( self, stl_filename ):
+        """return content hash of stl file
+        """
+        stat = os.stat( stl_filename )
+        stat_key = sha1( repr((os.path.abspath(stl_filename), stat.st_size,
+                               stat.st_mtime)) ).hexdigest()
+        key_filename = os.path.join( self._key_directory, stat_key )
+
+        # read hash if file hasn't changed since it was last hashed
+        if os.path.exists( key_filename ):
+            key = self._read( key_filename )
+            if key:
+                return key
+
+        # otherwise hash contents of file
+        content = sha1()
+        stl_file = open( stl_filename, 'rb' )
+        try:
+            chunk = stl_file.read( 2**20 )
+            while chunk:
+                content.update( chunk )
+                chunk = stl_file.read( 2**20 )
+        finally:
+            stl_file.close()
+        key = content.hexdigest()
+
+        self._write( key_filename, (key,) )
+        return key
+
+    def load( self, stl_filename, tolerance ):
+        """map cached mesh for stl file welded with given tolerance
+
+           returns ( <map>, <triangles>, <vertices>, <faces>, <bounds> ) or
+           None if stl file is not cached
+        """
+        entry_filename = self._entry_filename( self.key(stl_filename),
+                                               tolerance )
+        if not os.path.exists( entry_filename ):
+            return None
+
+        # files too short for a header, such as empty files which can't be
+        # mapped, are dropped as any other bad entry
+        entry_file = open( entry_filename, 'rb' )
+        try:
+            if os.fstat( entry_file.fileno() ).st_size < self.HEADER.size:
+                entry_file.close()
+                os.remove( entry_filename )
+                return None
+            entry_map = mmap( entry_file.fileno(), 0, access=ACCESS_READ )
+        finally:
+            entry_file.close()
+
+        # check header and length match before viewing arrays
+        entry = None
+        header = self.HEADER.unpack_from( entry_map, 0 )
+        magic, version, size, count = header[:4]
+        offsets = self._layout( size, count )
+        if( magic == self.MAGIC and version == self.VERSION
+            and len(entry_map) == offsets[-1] ):
+            entry = ( entry_map,
+                      ndarray( (size, 4, 3), "<f4", entry_map,
+                               offset=offsets[0] ),
+                      ndarray( (count, 3), "<f4", entry_map,
+                               offset=offsets[1] ),
+                      ndarray( (size, 3), "<i4", entry_map,
+                               offset=offsets[2] ),
+                      ( header[4:7], header[7:10] ) )
+
+        # remove entries that don't match
+        if entry is None:
+            entry_map.close()
+            os.remove( entry_filename )
+            return None
+
+        # mark entry as recently used
+        os.utime( entry_filename, None )
+
+        return entry
+
+    def store( self, stl_filename, tolerance, triangles, vertices, faces,
+               bounds ):
+        """write mesh parsed from stl file and welded with given tolerance
+           to cache and evict old entries
+        """
+        size, count = len( triangles ), len( vertices )
+        header = self.HEADER.pack( self.MAGIC, self.VERSION, size, count,
+                                   *(tuple(bounds[0]) + tuple(bounds[1])) )
+        chunks = [ header ]
+        offset = len( header )
+        for array, kind in ( (triangles, "<f4"), (vertices, "<f4"),
+                             (faces, "<i4") ):
+            padding = -offset % self.ALIGN
+            data = ascontiguousarray( array, kind ).tostring()
+            chunks.extend( ("\0" * padding, data) )
+            offset += padding + len( data )
+
+        self._write( self._entry_filename(self.key(stl_filename),
+                                          tolerance), chunks )
+        self.evict()
+
+    def evict( self ):
+        """remove least recently used entries until cache is within budget
+        """
+        entries = []
+        total = 0
+        for name in os.listdir( self.directory ):
+            if name.endswith( self.SUFFIX ):
+                stat = os.stat( os.path.join(self.directory, name) )
+                entries.append( (stat.st_mtime, stat.st_size, name) )
+                total += stat.st_size
+
+        entries.sort()
+        while entries and total > self.budget:
+            mtime, size, name = entries.pop( 0 )
+            os.remove( os.path.join(self.directory, name) )
+            total -= size
+
+        # drop hashes of files no entry is left for
+        hashes = set( name.split("-", 1)[0] for mtime, size, name in entries )
+        for name in os.listdir( self._key_directory ):
+            key_filename = os.path.join( self._key_directory, name )
+            if self._read( key_filename ) not in hashes:
+                os.remove( key_filename )
+
+    def _entry_filename( self, key, tolerance ):
+        return os.path.join( self.directory, "%s-%r%s" % (
+            key, float(tolerance), self.SUFFIX) )
+
+    def _layout( self, size, count ):
+        """return offsets of triangles, vertices and faces and total length
+        """
+        offsets = []
+        offset = self.HEADER.size
+        for length in ( size * 48, count * 12, size * 12 ):
+            offset += -offset % self.ALIGN
+            offsets.append( offset )
+            offset += length
+        offsets.append( offset )
+        return offsets
+
+    def _read( self, filename ):
+        """return contents of small file
+        """
+        read_file = open( filename, 'r' )
+        try:
+            return read_file.read()
+        finally:
+            read_file.close()
+
+    def _write( self, filename, chunks ):
+        """write chunks to temporary file and rename it into place
+        """
+        fd, temp_filename = mkstemp( dir=os.path.dirname(filename) )
+        temp_file = os.fdopen( fd, 'wb' )
+        try:
+            for chunk in chunks:
+                temp_file.write( chunk )
+        finally:
+            temp_file.close()
+        os.rename( temp_filename, filename )
@@ -0,0 +1,151 @@
+import os
+from tempfile import mkstemp, gettempdir
+from threading import Condition
+from multiprocessing import Pool
+from numpy import memmap, zeros
+
+from STL_Mesh import STL_Mesh
+
+def _parse_shared( stl_filename, shared_dir ):
+    """parse stl file in worker process and write triangles to shared memory
+
+       returns (<stl filename>, <shared filename>, <size>) on success or
+       (<stl filename>, None, <exception>) on failure
+    """
+    try:
+        mesh = STL_Mesh( stl_filename )
+        fd, shared_filename = mkstemp( suffix=".tri", dir=shared_dir )
+
+        # remove shared file if it can't be written, nothing else will
+        try:
+            shared_file = os.fdopen( fd, 'wb' )
+            try:
+                mesh.triangles.astype( 'd', copy=False ).tofile( shared_file )
+            finally:
+                shared_file.close()
+        except:
+            os.remove( shared_filename )
+            raise
+        return stl_filename, shared_filename, mesh.size
+    except Exception, e:
+        return stl_filename, None, e
+
+class STL_Loader( object ):
+    """parses batches of stl files across a pool of worker processes
+
+       workers write parsed triangles to files in shared memory, which are
+       mapped by this process rather than pickled back to it
+
+       callbacks are called from the pool's result thread as each file
+       finishes, so gui code must enter the gtk thread before using meshes
+    """
+    # tmpfs directory backed by shared memory
+    SHARED_DIR = "/dev/shm"
+
+    def __init__( self, processes=None ):
+        self.shared_dir = self.SHARED_DIR
+        if not os.path.isdir( self.shared_dir ):
+            self.shared_dir = gettempdir()
+
+        # worker processes, one per core by default
+        self.pool = Pool( processes )
+
+        # loaded meshes and errors indexed by stl filename, and filenames in
+        # order they were given
+        self.meshes = {}
+        self.errors = {}
+        self._submitted = []
+
+        # number of files still being parsed
+        self._pending = 0
+        self._finished = Condition()
+
+    def load( self, stl_filenames, callback=None ):
+        """start parsing given stl files in worker processes
+
+           callback( <stl filename>, <mesh> ) is called as each file is loaded
+        """
+        for stl_filename in stl_filenames:
+            self._finished.acquire()
+            try:
+                self._pending += 1
+                self._submitted.append( stl_filename )
+            finally:
+                self._finished.release()
+
+            self.pool.apply_async(
+                _parse_shared, (stl_filename, self.shared_dir),
+                callback=lambda result: self._finish( result, callback ) )
+
+    def wait( self ):
+        """block until all files have been parsed
+
+           returns dict of meshes indexed by stl filename, raises error of
+           first file given that failed to parse, if any
+        """
+        self._finished.acquire()
+        try:
+            while self._pending > 0:
+                self._finished.wait()
+        finally:
+            self._finished.release()
+
+        for stl_filename in self._submitted:
+            if stl_filename in self.errors:
+                raise self.errors[stl_filename]
+
+        return self.meshes
+
+    def close( self ):
+        """wait for workers to finish and shut down pool
+        """
+        self.pool.close()
+        self.pool.join()
+
+    def _finish( self, result, callback ):
+        """map shared triangles of parsed file into new mesh
+        """
+        stl_filename, shared_filename, size = result
+        mesh = None
+        try:
+            if shared_filename is None:
+                self.errors[stl_filename] = size
+            else:
+                # file can be unlinked once mapped
+                try:
+                    if size > 0:
+                        triangles = memmap( shared_filename, 'd', 'r+',
+                                            shape=(size, 4, 3) )
+                    else:
+                        triangles = zeros( (0, 4, 3), 'd' )
+                finally:
+                    os.remove( shared_filename )
+
+                mesh = STL_Mesh( stl_filename, triangles=triangles )
+                self.meshes[stl_filename] = mesh
+
+                if callback is not None:
+                    callback( stl_filename, mesh )
+
+        except Exception, e:
+            self.errors[stl_filename] = e
+
+        finally:
+            self._finished.acquire()
+            try:
+                self._pending -= 1
+                self._finished.notify_all()
+            finally:
+                self._finished.release()
+
+def load_meshes( stl_filenames, processes=None, callback=None ):
+    """parse stl files across a pool of processes
+
+       returns dict of meshes indexed by stl filename
+    """
+    loader = STL_Loader( processes )
+    try:
+        loader.load( stl_filenames, callback )
+        return loader.wait()
+    finally:
+        loader.close()
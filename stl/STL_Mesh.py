@@ -1,14 +1,48 @@
 from struct import unpack
+from os import fstat
+from mmap import mmap, ACCESS_READ
+from array import array
+from ctypes import c_void_p
 from OpenGL.GL import( glGenLists, glNewList, glEndList, glCallList,
                        glBegin, glEnd, glNormal3f, glVertex3f, glMaterialfv,
-                       GL_COMPILE, GL_TRIANGLES, GL_FRONT, GL_SPECULAR,
-                       GL_SHININESS, GL_DIFFUSE )
-from numpy import zeros
+                       glGenBuffers, glBindBuffer, glBufferData,
+                       glEnableClientState, glDisableClientState,
+                       glNormalPointer, glVertexPointer, glDrawArrays,
+                       GL_ARRAY_BUFFER, GL_STATIC_DRAW,
+                       GL_NORMAL_ARRAY, GL_VERTEX_ARRAY, GL_FLOAT,
+                       GL_COMPILE, GL_TRIANGLES, GL_FRONT,
+                       GL_SPECULAR, GL_SHININESS, GL_DIFFUSE )
+from OpenGL.GL import glGetDoublev, GL_MODELVIEW_MATRIX
+from numpy import ( zeros, dtype, frombuffer, flatnonzero, ndarray, unique,
+                    floor, ascontiguousarray, empty, sqrt, dot )
+
+import decimate
+from Mesh_BVH import Mesh_BVH
+
+# record layout of one triangle in the body of a binary stl file
+STL_TRIANGLE = dtype( [("normal", "<f4", (3,)),
+                       ("vertices", "<f4", (3, 3)),
+                       ("attribute", "<u2")] )
 
 class STL_Mesh( object ):
     """loads triangle mesh from an stl file and draws it with opengl calls
     """
 
+    CHUNK_SIZE = 2**16 # bytes of ascii stl file to tokenize at once
+    WELD_TOLERANCE = 1e-5 # vertices closer than this are welded together
+    CACHE = None # mesh cache to read preprocessed meshes from, if any
+
+    # fraction of triangles kept at each coarser level of detail
+    LOD_RATIOS = ( 0.25, 0.0625, 0.015625 )
+
+    # each coarser level is drawn when projected size of mesh, its radius
+    # over its distance from the eye, falls below matching size
+    LOD_SIZES = ( 0.1, 0.025, 0.00625 )
+
+    # render paths
+    LIST = "list" # compile immediate mode calls into display list
+    BUFFER = "buffer" # upload vertex buffer objects and draw in one call
+
     # diffuse colors
     RED = ( 0.7, 0.0, 0.1, 1.0 )
     GREEN = ( 0.0, 0.7, 0.1, 1.0 )
@@ -16,22 +50,170 @@ class STL_Mesh( object ):
     YELLOW = ( 0.7, 0.8, 0.1, 1.0 )
     GREY = ( 0.4, 0.4, 0.5, 1.0 )
 
-    def __init__( self, stl_filename ):
+    def __init__( self, stl_filename, mapped=False, triangles=None ):
         self.triangles = None # list of triangles in mesh
         self.size = None # number of triangles in mesh
         self.list_name = None # gl display list name
 
+        # render path, falls back to list if buffer objects are unavailable
+        self.render = self.BUFFER
+        self.vertex_buffer = None # gl buffer name of interleaved normals,
+                                  # vertices
+        self.buffer_size = None # number of vertices to draw
+
+        # indexed form of mesh generated by weld()
+        self.vertices = None # unique vertex coords
+        self.faces = None # indices of 3 vertices of each triangle
+        self.normals = None # normal of each triangle
+
+        self.bounds = None # (min, max) coords containing mesh
+
+        # coarser meshes generated by make_levels()
+        self.levels = []
+
+        # bounding volume hierarchy over triangles, built by pick()
+        self.bvh = None
+
+        # if mapped triangles are a read only view into memory mapped file
+        self.mapped = mapped
+        self._map = None
+        self._mapped_arrays = () # names of arrays viewing memory map
+
         self.specular = ( 1.0, 1.0, 1.0, 1.0 )
         self.shininess = 100.0
         self.diffuse = self.RED
 
+        # if triangles are given use them rather than reading file
+        if triangles is not None:
+            self.triangles = triangles
+            self.size = len( triangles )
+            return
+
+        # read preprocessed mesh from cache if it has been cached
+        cache = self.CACHE
+        if cache is not None and self._read_cache( cache, stl_filename ):
+            return
+
         # open stl file and parse triangles
         stl_file = None
         try:
             stl_file = open( stl_filename, 'rb' )
-            self._parse_stl( stl_file )
+            if self._is_ascii( stl_file ):
+                self.mapped = False
+                self._parse_ascii_stl( stl_file )
+            elif self.mapped:
+                self._map_stl( stl_file )
+            else:
+                self._parse_stl( stl_file )
         finally:
-            stl_file.close()
+            if stl_file is not None:
+                stl_file.close()
+
+        # weld mesh and store it in cache, as float32 so the mesh is the same
+        # as one later mapped from cache
+        if cache is not None:
+            self.triangles = self.triangles.astype( 'f', copy=False )
+            if self.faces is None:
+                self.weld()
+            cache.store( stl_filename, self.WELD_TOLERANCE, self.triangles,
+                         self.vertices, self.faces, self.get_bounds() )
+
+    def close( self ):
+        """release memory map backing arrays of mapped mesh
+        """
+        if self._map is not None:
+            for name in self._mapped_arrays:
+                setattr( self, name, None )
+            self._mapped_arrays = ()
+            self._map.close()
+            self._map = None
+
+    def get_bounds( self ):
+        """return (min, max) coords containing mesh
+        """
+        if self.bounds is None:
+            if self.triangles is not None:
+                corners = self.triangles[:, 1:].reshape( -1, 3 )
+            else:
+                corners = self.vertices
+
+            if len( corners ) < 1:
+                self.bounds = ( (0.0, 0.0, 0.0), (0.0, 0.0, 0.0) )
+            else:
+                self.bounds = ( tuple(corners.min(0).tolist()),
+                                tuple(corners.max(0).tolist()) )
+
+        return self.bounds
+
+    def _read_cache( self, cache, stl_filename ):
+        """map triangles and indexed form of mesh from cache
+
+           returns false if mesh is not in cache
+        """
+        entry = cache.load( stl_filename, self.WELD_TOLERANCE )
+        if entry is None:
+            return False
+
+        self._map, self.triangles, self.vertices, self.faces, bounds = entry
+        self._mapped_arrays = ( "triangles", "vertices", "faces", "normals" )
+        self.mapped = True
+        self.size = len( self.triangles )
+        self.normals = self.triangles[:, 0]
+        self.bounds = bounds
+        return True
+
+    def weld( self, tolerance=None, discard=False ):
+        """build indexed form of mesh by welding together shared vertices
+
+           vertices are quantized to a grid of given tolerance and vertices
+           falling in the same grid cell are replaced by the first of them
+
+           if discard is true the triangle array is dropped afterwards, and
+           the mesh is drawn from the indexed form; welding again after that
+           welds the indexed form
+
+           returns dict of weld statistics
+        """
+        if tolerance is None:
+            tolerance = self.WELD_TOLERANCE
+
+        if self.triangles is not None:
+            corners = self.triangles[:, 1:].reshape( -1, 3 )
+            normals = self.triangles[:, 0]
+            triangle_bytes = self.triangles.nbytes
+        else:
+            corners = self.vertices[self.faces].reshape( -1, 3 )
+            normals = self.normals
+            triangle_bytes = corners.nbytes + normals.nbytes
+
+        # find unique quantized vertices and index of each triangle corner
+        # quantize in double precision so float32 and float64 triangles weld
+        # the same
+        cells = floor( corners.astype('d') / tolerance + 0.5 ).astype( 'q' )
+        cells, first, inverse = unique( cells, return_index=True,
+                                        return_inverse=True, axis=0 )
+
+        self.vertices = ascontiguousarray( corners[first], 'f' )
+        self.faces = inverse.astype( 'i' ).reshape( -1, 3 )
+        self.normals = ascontiguousarray( normals, 'f' )
+
+        # new indexed arrays are copies, not views into any memory map
+        self._mapped_arrays = tuple( n for n in self._mapped_arrays
+                                     if n == "triangles" )
+
+        # gather statistics before triangles are discarded
+        stats = { "corners": len( corners ),
+                  "vertices": len( self.vertices ),
+                  "ratio": len( corners ) / float( max(len(self.vertices), 1) ),
+                  "triangle_bytes": triangle_bytes,
+                  "indexed_bytes": ( self.vertices.nbytes + self.faces.nbytes
+                                     + self.normals.nbytes ) }
+
+        if discard:
+            self.close()
+            self.triangles = None
+
+        return stats
 
     def _make_list( self ):
         """generate opengl display list to draw triangles in mesh
@@ -51,24 +233,234 @@ class STL_Mesh( object ):
         glBegin( GL_TRIANGLES )
 
         # for each triangle give normal and 3 vertices
-        for triangle in self.triangles:
-            glNormal3f( *triangle[0] )
-            for i in range( 1, 4 ):
-                glVertex3f( *triangle[i] )
+        if self.triangles is not None:
+            for triangle in self.triangles:
+                glNormal3f( *triangle[0] )
+                for i in range( 1, 4 ):
+                    glVertex3f( *triangle[i] )
+
+        # if triangles have been discarded draw from indexed form
+        else:
+            for normal, face in zip( self.normals, self.faces ):
+                glNormal3f( *normal )
+                for i in face:
+                    glVertex3f( *self.vertices[i] )
         
         glEnd()
         glEndList()
 
-    def draw( self ):
-        """draw stl mesh by executing opengl display list
+    def _make_buffers( self ):
+        """upload triangles in mesh to opengl vertex buffer objects
+
+           normals and vertices are interleaved, with the normal of each
+           triangle repeated at its 3 corners
+
+           if triangles have been discarded the indexed form is expanded back
+           into triangles, so faces keep flat normals as in the display list
+        """
+        self.buffer_size = self.size * 3
+        interleaved = empty( (self.size, 3, 6), 'f' )
+        if self.triangles is not None:
+            interleaved[:, :, :3] = self.triangles[:, :1]
+            interleaved[:, :, 3:] = self.triangles[:, 1:]
+        else:
+            interleaved[:, :, :3] = self.normals[:, None]
+            interleaved[:, :, 3:] = self.vertices[self.faces]
+
+        # upload interleaved normals and vertices
+        self.vertex_buffer = glGenBuffers( 1 )
+        glBindBuffer( GL_ARRAY_BUFFER, self.vertex_buffer )
+        glBufferData( GL_ARRAY_BUFFER, ascontiguousarray(interleaved),
+                      GL_STATIC_DRAW )
+        glBindBuffer( GL_ARRAY_BUFFER, 0 )
+
+    def _draw_buffers( self ):
+        """draw triangles from vertex buffer objects in a single call
+        """
+        # set material
+        glMaterialfv( GL_FRONT, GL_SPECULAR, self.specular )
+        glMaterialfv( GL_FRONT, GL_SHININESS, self.shininess )
+        glMaterialfv( GL_FRONT, GL_DIFFUSE, self.diffuse )
+
+        # point normal and vertex arrays into interleaved buffer
+        glBindBuffer( GL_ARRAY_BUFFER, self.vertex_buffer )
+        glEnableClientState( GL_NORMAL_ARRAY )
+        glEnableClientState( GL_VERTEX_ARRAY )
+        glNormalPointer( GL_FLOAT, 24, c_void_p(0) )
+        glVertexPointer( 3, GL_FLOAT, 24, c_void_p(12) )
+
+        glDrawArrays( GL_TRIANGLES, 0, self.buffer_size )
+
+        glDisableClientState( GL_VERTEX_ARRAY )
+        glDisableClientState( GL_NORMAL_ARRAY )
+        glBindBuffer( GL_ARRAY_BUFFER, 0 )
+
+    def pick( self, near, far ):
+        """find nearest triangle of mesh hit by segment from near to far
+
+           returns ( <triangle index>, <distance from near>, (<u>, <v>) ) or
+           None if no triangle is hit
+        """
+        if self.bvh is None:
+            if self.triangles is not None:
+                self.bvh = Mesh_BVH( self.triangles[:, 1:] )
+            else:
+                self.bvh = Mesh_BVH( self.vertices[self.faces] )
+
+        direction = [ b - a for a, b in zip(near, far) ]
+        length = sqrt( sum(d * d for d in direction) )
+        return self.bvh.intersect( near, direction, length )
+
+    def make_levels( self, ratios=None ):
+        """generate coarser levels of detail of this mesh
+
+           each level keeps about the given fraction of triangles, by
+           clustering welded vertices on a grid
+
+           returns list of triangle counts of levels
+        """
+        if ratios is None:
+            ratios = self.LOD_RATIOS
+        if self.faces is None:
+            self.weld()
+
+        self.levels = []
+        for ratio in ratios:
+            vertices, faces = decimate.decimate( self.vertices, self.faces,
+                                                 int(self.size * ratio) )
+            self.levels.append(
+                STL_Mesh( None, triangles=decimate.triangles(vertices,
+                                                             faces) ) )
+
+        return [ level.size for level in self.levels ]
+
+    def pick_level( self, distance ):
+        """return index of level of detail to draw at given distance from eye
+
+           0 is this mesh, 1 is first level in levels, and so on
         """
+        bmin, bmax = self.get_bounds()
+        radius = sqrt( sum((b - a)**2 for a, b in zip(bmin, bmax)) ) / 2.0
+        size = radius / max( distance, 1e-9 )
+
+        level = 0
+        for threshold in self.LOD_SIZES[:len(self.levels)]:
+            if size >= threshold:
+                break
+            level += 1
+
+        return level
+
+    def draw( self, distance=None ):
+        """draw stl mesh from vertex buffer objects or opengl display list
+
+           if levels of detail have been made, the level is picked by given
+           distance from eye, or by the current modelview matrix if no
+           distance is given
+        """
+        if self.levels:
+            if distance is None:
+                distance = self._eye_distance()
+            level = self.pick_level( distance )
+            if level > 0:
+                mesh = self.levels[level - 1]
+                mesh.specular = self.specular
+                mesh.shininess = self.shininess
+                mesh.diffuse = self.diffuse
+                mesh.render = self.render
+                mesh.draw()
+                return
+
+        # fall back to display list if buffer objects are unavailable
+        if self.render == self.BUFFER and not glGenBuffers:
+            self.render = self.LIST
+
+        if self.render == self.BUFFER:
+            if self.vertex_buffer is None:
+                self._make_buffers()
+            self._draw_buffers()
+            return
+
         if self.list_name is None:
             self._make_list()
 
         glCallList( self.list_name )
 
+    def _eye_distance( self ):
+        """return distance from eye to centre of mesh under modelview matrix
+        """
+        bmin, bmax = self.get_bounds()
+        centre = [ (a + b) / 2.0 for a, b in zip(bmin, bmax) ] + [ 1.0 ]
+
+        # gl matrices are column major, so multiply row vector by matrix
+        eye = dot( centre, glGetDoublev(GL_MODELVIEW_MATRIX) )
+        return sqrt( (eye[:3]**2).sum() )
+
+    def _is_ascii( self, stl_file ):
+        """returns true if stl file is in ascii rather than binary format
+
+           binary files may also start with 'solid', so a file is only taken
+           to be ascii if its length doesn't match the declared triangle count
+        """
+        header = stl_file.read( 84 )
+        stl_file.seek( 0 )
+        if not header.lstrip().startswith( "solid" ):
+            return False
+
+        if len( header ) == 84:
+            size = unpack( "I", header[80:] )[0]
+            length = fstat( stl_file.fileno() ).st_size
+            if length == 84 + size * STL_TRIANGLE.itemsize:
+                return False
+
+        return True
+
+    def _parse_ascii_stl( self, stl_file ):
+        """parse triangles from ascii stl file
+
+           file is tokenized a chunk at a time, and the three coords after
+           each 'normal' and 'vertex' keyword are collected
+        """
+        # skip solid line so name isn't mistaken for keyword
+        stl_file.seek( 0 )
+        stl_file.readline()
+
+        coords = array( 'd' )
+        expected = 0 # number of coords expected after last keyword
+        partial = "" # token cut off at end of last chunk
+        while True:
+            chunk = stl_file.read( self.CHUNK_SIZE )
+            if not chunk:
+                break
+            tokens = ( partial + chunk ).split()
+
+            # if chunk doesn't end in whitespace hold last token for next
+            partial = ""
+            if tokens and not chunk[-1].isspace():
+                partial = tokens.pop()
+
+            for token in tokens:
+                if expected:
+                    coords.append( float(token) )
+                    expected -= 1
+                elif token == "normal" or token == "vertex":
+                    expected = 3
+
+        # file may end in a coord without trailing whitespace
+        if partial and expected:
+            coords.append( float(partial) )
+            expected -= 1
+
+        if expected or len( coords ) % 12 != 0:
+            raise ValueError( "ascii stl file ends in middle of facet" )
+
+        self.size = len( coords ) // 12
+        self.triangles = frombuffer( coords, 'd' ).reshape( self.size, 4, 3 )
+
     def _parse_stl( self, stl_file ):
         """parse triangles from stl file
+
+           reads whole body of file in one pass as array of triangle records
         """
         # skip header
         stl_file.seek( 80 )
@@ -76,18 +468,50 @@ class STL_Mesh( object ):
         # read number triangles
         self.size = unpack( "I", stl_file.read(4) )[0]
 
-        # make array to hold triangle data
+        # read triangle records
+        body = stl_file.read( self.size * STL_TRIANGLE.itemsize )
+        if len( body ) < self.size * STL_TRIANGLE.itemsize:
+            raise ValueError( "stl file truncated: expected %d triangles, "
+                              "found %d" % (self.size,
+                                            len(body) // STL_TRIANGLE.itemsize) )
+        records = frombuffer( body, STL_TRIANGLE, self.size )
+
+        # copy normal and vertex coords into triangle array
         self.triangles = zeros( (self.size, 4, 3), 'd' )
+        self.triangles[:, 0] = records["normal"]
+        self.triangles[:, 1:] = records["vertices"]
+
+        # report non-zero attribute byte counts all at once
+        flagged = flatnonzero( records["attribute"] )
+        if len( flagged ) > 0:
+            print "non-zero attribute byte count at %d triangles: %s" % (
+                len(flagged), str(flagged[:8].tolist()) )
+
+    def _map_stl( self, stl_file ):
+        """map triangles from stl file into memory without copying them
+
+           triangles are a (size, 4, 3) float32 view striding over the
+           triangle records in the file, so pages are only read from disk
+           when the triangles on them are drawn or queried
 
-        # read triangles
-        for i in range( self.size ):
+           attribute byte counts are not checked, as that would read every
+           page of the file
+        """
+        # skip header
+        stl_file.seek( 80 )
+
+        # read number triangles
+        self.size = unpack( "I", stl_file.read(4) )[0]
 
-            # read normal and vertex coords for triangle
-            for j in range( 4 ):
-                coords = unpack( "fff", stl_file.read(12) )
-                for k in range( 3 ):
-                    self.triangles[i][j][k] = coords[k]                
+        # check file is long enough to hold triangles
+        length = 84 + self.size * STL_TRIANGLE.itemsize
+        if fstat( stl_file.fileno() ).st_size < length:
+            raise ValueError( "stl file truncated: expected %d triangles"
+                              % self.size )
 
-            # read 2 byte int
-            if unpack( "H", stl_file.read(2) )[0] != 0:
-                print "non-zero attribute byte count at triangle %d: %d" % i
+        # map file and view normal and vertex coords of each record
+        self._map = mmap( stl_file.fileno(), 0, access=ACCESS_READ )
+        self.triangles = ndarray( (self.size, 4, 3), "<f4", self._map,
+                                  offset=84,
+                                  strides=(STL_TRIANGLE.itemsize, 12, 4) )
+        self._mapped_arrays = ( "triangles", )
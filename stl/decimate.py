@@ -0,0 +1,76 @@
+from numpy import ( floor, unique, bincount, zeros, sort, cross, sqrt, empty,
+                    log, exp )
+
+def cluster( vertices, faces, cell ):
+    """collapse vertices falling in the same grid cell into their mean
+
+       vertices - (n, 3) array of vertex coords
+       faces - (m, 3) array of vertex indices
+       cell - size of grid cell
+
+       returns new (vertices, faces) arrays, with faces that collapsed to a
+       line or point and duplicate faces removed
+    """
+    cells = floor( vertices / cell ).astype( 'q' )
+    cells, inverse = unique( cells, return_inverse=True, axis=0 )
+
+    # average vertices in each cell
+    counts = bincount( inverse ).astype( 'd' )
+    clustered = empty( (len(cells), 3), 'd' )
+    for i in range( 3 ):
+        clustered[:, i] = bincount( inverse, vertices[:, i] ) / counts
+
+    # remap faces and drop degenerate faces
+    faces = inverse[faces]
+    keep = ( (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2])
+             & (faces[:, 2] != faces[:, 0]) )
+    faces = faces[keep]
+
+    # drop faces sharing the same three vertices
+    if len( faces ) > 0:
+        first = unique( sort(faces, axis=1), return_index=True, axis=0 )[1]
+        faces = faces[sort(first)]
+
+    return clustered, faces
+
+def decimate( vertices, faces, target, steps=12 ):
+    """cluster vertices on a grid sized to leave about target faces
+
+       grid size is found by bisecting between the smallest and largest
+       useful cell sizes
+
+       returns new (vertices, faces) arrays
+    """
+    extent = ( vertices.max(0) - vertices.min(0) ).max()
+    if extent <= 0.0 or target >= len( faces ):
+        return vertices, faces
+
+    # bisect on log of cell size
+    low, high = log( extent * 1e-6 ), log( extent )
+    best = None
+    for i in range( steps ):
+        middle = ( low + high ) / 2.0
+        result = cluster( vertices, faces, exp(middle) )
+        if best is None or ( abs(len(result[1]) - target)
+                             < abs(len(best[1]) - target) ):
+            best = result
+        if len( result[1] ) > target:
+            low = middle
+        else:
+            high = middle
+
+    return best
+
+def triangles( vertices, faces ):
+    """build (m, 4, 3) array of normal and vertex coords of each face
+    """
+    result = zeros( (len(faces), 4, 3), 'd' )
+    result[:, 1:] = vertices[faces]
+
+    # normal is normalized cross product of edges
+    normals = cross( result[:, 2] - result[:, 1], result[:, 3] - result[:, 1] )
+    lengths = sqrt( (normals**2).sum(1) )
+    lengths[lengths == 0.0] = 1.0
+    result[:, 0] = normals / lengths[:, None]
+
+    return result
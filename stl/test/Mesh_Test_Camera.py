@@ -1,4 +1,5 @@
 from OpenGL.GL import *
+from OpenGL.GLU import gluUnProject
 
 from l33tC4D.gui.Gui import Gui
 from l33tC4D.gui.GL_Camera import GL_Camera
@@ -17,12 +18,19 @@ class Mesh_Test_Camera( GL_Camera ):
 
         self.eye = ( 0.0, 0.0, -200.0 )
 
+        # matrices hub was drawn with, to unproject clicks
+        self.matrices = None
+
     def handle_draw( self ):
         """draw stl mesh
         """
         # rotate hub 45 degrees
         glRotatef( 45.0, 0.0, 1.0, 0.0 )
 
+        self.matrices = ( glGetDoublev(GL_MODELVIEW_MATRIX),
+                          glGetDoublev(GL_PROJECTION_MATRIX),
+                          glGetIntegerv(GL_VIEWPORT) )
+
         self.one_hub_mesh.draw()
 
     def handle_press( self, x, y ):
@@ -30,6 +38,17 @@ class Mesh_Test_Camera( GL_Camera ):
         """
         print "button pressed at %d, %d" % (x, y)
 
+        if self.matrices is None:
+            return
+
+        # opengl calculates coords from lower left
+        width, height = self.size
+        y = height - y
+
+        near = gluUnProject( x, y, 0.0, *self.matrices )
+        far = gluUnProject( x, y, 1.0, *self.matrices )
+        print "picked triangle:", self.one_hub_mesh.pick( near, far )
+
 
 if __name__ == "__main__":
     gui = Gui()
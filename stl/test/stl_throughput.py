@@ -0,0 +1,49 @@
+###
+### compare parse throughput of binary and ascii stl loaders
+###
+import os
+import sys
+import tempfile
+from time import time
+
+from l33tC4D.stl.STL_Mesh import STL_Mesh
+from test_stl_mesh import HUB, write_ascii_stl
+
+def time_load( filename, repeat, **kwargs ):
+    """returns best time in seconds to load stl file out of repeat tries
+    """
+    best = None
+    for i in range( repeat ):
+        start = time()
+        mesh = STL_Mesh( filename, **kwargs )
+        elapsed = time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, mesh.size
+
+if __name__ == "__main__":
+    repeat = 5
+    if len( sys.argv ) > 1:
+        repeat = int( sys.argv[1] )
+
+    # write ascii copy of hub mesh
+    fd, ascii_filename = tempfile.mkstemp( suffix=".stl" )
+    try:
+        stl_file = os.fdopen( fd, 'w' )
+        try:
+            write_ascii_stl( STL_Mesh(HUB).triangles, stl_file )
+        finally:
+            stl_file.close()
+
+        print "%-8s %10s %12s %10s" % ( "loader", "seconds", "triangles/s",
+                                        "MB/s" )
+        for name, filename, kwargs in ( ("binary", HUB, {}),
+                                        ("mapped", HUB, {"mapped":True}),
+                                        ("ascii", ascii_filename, {}) ):
+            seconds, size = time_load( filename, repeat, **kwargs )
+            megabytes = os.path.getsize( filename ) / 2.0**20
+            print "%-8s %10.4f %12.0f %10.2f" % ( name, seconds,
+                                                  size / seconds,
+                                                  megabytes / seconds )
+    finally:
+        os.remove( ascii_filename )
@@ -0,0 +1,94 @@
+import unittest
+from numpy import cross, sqrt, inf
+from numpy.random import RandomState
+
+from l33tC4D.stl.STL_Mesh import STL_Mesh
+from l33tC4D.stl.Mesh_BVH import Mesh_BVH
+from test_stl_mesh import HUB
+
+def brute_intersect( triangles, origin, direction ):
+    """intersect ray with every triangle, returns (index, distance) or None
+    """
+    direction = direction / sqrt( (direction**2).sum() )
+    v0 = triangles[:, 0]
+    e1 = triangles[:, 1] - v0
+    e2 = triangles[:, 2] - v0
+    p = cross( direction, e2 )
+    determinant = ( e1 * p ).sum( 1 )
+    s = origin - v0
+    u = ( s * p ).sum( 1 ) / determinant
+    q = cross( s, e1 )
+    v = ( direction * q ).sum( 1 ) / determinant
+    t = ( e2 * q ).sum( 1 ) / determinant
+    hit = ( (abs(determinant) > 1e-12) & (u >= 0) & (v >= 0) & (u + v <= 1)
+            & (t >= 0) )
+    if not hit.any():
+        return None
+    t[~hit] = inf
+    return t.argmin(), t.min()
+
+class Test_Mesh_BVH( unittest.TestCase ):
+    """tests picking triangles of mesh with bounding volume hierarchy
+    """
+
+    def setUp( self ):
+        self.mesh = STL_Mesh( HUB )
+        self.bvh = Mesh_BVH( self.mesh.triangles[:, 1:] )
+
+        # hierarchy stores triangles as float32
+        self.triangles = self.mesh.triangles[:, 1:].astype( 'f' ).astype( 'd' )
+
+    def test_structure( self ):
+        """test every triangle is in exactly one leaf inside node bounds
+        """
+        leaves = self.bvh.child < 0
+        self.assertEqual( self.bvh.count[leaves].sum(), self.mesh.size )
+        self.assertEqual( sorted(self.bvh.order), range(self.mesh.size) )
+        for node in range( len(self.bvh.child) ):
+            first = self.bvh.start[node]
+            triangles = self.bvh.triangles[first:first + self.bvh.count[node]]
+            self.assert_( (triangles.min((0, 1))
+                           >= self.bvh.node_min[node]).all() )
+            self.assert_( (triangles.max((0, 1))
+                           <= self.bvh.node_max[node]).all() )
+
+    def test_intersect( self ):
+        """test random rays hit same triangles as testing every triangle
+        """
+        random = RandomState( 0 )
+        bmin, bmax = self.mesh.get_bounds()
+        hits = 0
+        for i in range( 100 ):
+            origin = random.uniform( -100, 100, 3 )
+            direction = random.uniform( bmin, bmax ) - origin
+            result = self.bvh.intersect( origin, direction )
+            expected = brute_intersect( self.triangles, origin, direction )
+
+            self.assertEqual( result is None, expected is None )
+            if result is not None:
+                hits += 1
+                self.assertEqual( result[0], expected[0] )
+                self.assertAlmostEqual( result[1], expected[1] )
+                u, v = result[2]
+                self.assert_( u >= 0 and v >= 0 and u + v <= 1 )
+        self.assert_( hits > 50 )
+
+    def test_pick( self ):
+        """test picking mesh with segment ignores hits beyond far end
+        """
+        centre = self.mesh.triangles[0, 1:].mean( 0 )
+        near = centre + [ 30.0, 40.0, 200.0 ]
+        direction = centre - near
+        expected = brute_intersect( self.triangles, near, direction )
+        self.assert_( expected is not None )
+
+        unit = direction / sqrt( (direction**2).sum() )
+        hit = self.mesh.pick( near, near + unit * (expected[1] + 1.0) )
+        self.assertEqual( hit[0], expected[0] )
+        self.assertAlmostEqual( hit[1], expected[1] )
+
+        self.assert_( self.mesh.pick(near, near + unit * (expected[1] - 1.0))
+                      is None )
+
+if __name__ == '__main__':
+    unittest.main()
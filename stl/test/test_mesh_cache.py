@@ -0,0 +1,117 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+from l33tC4D.stl.STL_Mesh import STL_Mesh
+from l33tC4D.stl.Mesh_Cache import Mesh_Cache
+from test_stl_mesh import HUB
+
+class Cached_Mesh( STL_Mesh ):
+    """reads meshes through test cache
+    """
+    CACHE = None
+
+class Test_Mesh_Cache( unittest.TestCase ):
+    """tests caching preprocessed meshes on disk
+    """
+
+    def setUp( self ):
+        self.directory = tempfile.mkdtemp()
+        Cached_Mesh.CACHE = Mesh_Cache( self.directory )
+        self.mesh = STL_Mesh( HUB )
+        self.mesh.weld()
+
+    def tearDown( self ):
+        Cached_Mesh.CACHE = None
+        shutil.rmtree( self.directory )
+
+    def entries( self ):
+        return [ name for name in os.listdir( self.directory )
+                 if name.endswith( Mesh_Cache.SUFFIX ) ]
+
+    def test_hit( self ):
+        """test second load maps mesh parsed by first load
+        """
+        missed = Cached_Mesh( HUB )
+        self.assertFalse( missed.mapped )
+        self.assertEqual( len(self.entries()), 1 )
+
+        hit = Cached_Mesh( HUB )
+        try:
+            self.assert_( hit.mapped )
+            self.assertEqual( hit.size, self.mesh.size )
+            for name in "triangles", "vertices", "faces", "normals":
+                self.assertEqual( getattr(hit, name).dtype,
+                                  getattr(missed, name).dtype )
+            self.assert_( (hit.triangles == missed.triangles).all() )
+            self.assert_( (hit.triangles == self.mesh.triangles).all() )
+            self.assert_( (hit.vertices == self.mesh.vertices).all() )
+            self.assert_( (hit.faces == self.mesh.faces).all() )
+            self.assert_( (hit.normals == self.mesh.normals).all() )
+            self.assertEqual( hit.get_bounds(), self.mesh.get_bounds() )
+        finally:
+            hit.close()
+        self.assert_( hit.faces is None )
+
+    def test_evict( self ):
+        """test least recently used entries are evicted over budget
+        """
+        cache = Cached_Mesh.CACHE
+        triangles = self.mesh.triangles
+        bounds = self.mesh.get_bounds()
+
+        # store copies of hub mesh as if parsed from three files
+        filenames = []
+        for i in range( 3 ):
+            fd, filename = tempfile.mkstemp( dir=self.directory )
+            os.write( fd, str(i) )
+            os.close( fd )
+            filenames.append( filename )
+            cache.store( filename, STL_Mesh.WELD_TOLERANCE, triangles,
+                         self.mesh.vertices, self.mesh.faces, bounds )
+            entry = cache._entry_filename( cache.key(filename),
+                                           STL_Mesh.WELD_TOLERANCE )
+            os.utime( entry, (i, i) )
+        self.assertEqual( len(self.entries()), 3 )
+        entry_size = os.path.getsize( entry )
+
+        # use first entry so second is least recently used
+        entry = cache.load( filenames[0], STL_Mesh.WELD_TOLERANCE )
+        entry[0].close()
+
+        cache.budget = entry_size * 2
+        cache.evict()
+        self.assertEqual( len(self.entries()), 2 )
+        self.assertEqual( len(os.listdir(cache._key_directory)), 2 )
+        self.assert_( cache.load(filenames[1], STL_Mesh.WELD_TOLERANCE)
+                      is None )
+
+    def test_tolerance( self ):
+        """test meshes welded with another tolerance are not served
+        """
+        Cached_Mesh( HUB )
+        Cached_Mesh.WELD_TOLERANCE = 1.0
+        try:
+            coarse = Cached_Mesh( HUB )
+            self.assertFalse( coarse.mapped )
+            self.assertEqual( len(self.entries()), 2 )
+            self.assert_( len(coarse.vertices) < len(self.mesh.vertices) )
+        finally:
+            del Cached_Mesh.WELD_TOLERANCE
+
+    def test_empty_entry( self ):
+        """test empty entry file is dropped rather than mapped
+        """
+        cache = Cached_Mesh.CACHE
+        open( cache._entry_filename(cache.key(HUB),
+                                    STL_Mesh.WELD_TOLERANCE), 'wb' ).close()
+        missed = Cached_Mesh( HUB )
+        self.assertFalse( missed.mapped )
+        hit = Cached_Mesh( HUB )
+        self.assert_( hit.mapped )
+        hit.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+###
+### render stl meshes in an offscreen mesa software context
+###
+import os
+os.environ.setdefault( "PYOPENGL_PLATFORM", "egl" )
+os.environ.setdefault( "EGL_PLATFORM", "surfaceless" )
+os.environ.setdefault( "LIBGL_ALWAYS_SOFTWARE", "1" )
+
+import unittest
+from ctypes import pointer
+
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+from l33tC4D.stl.STL_Mesh import STL_Mesh
+from test_stl_mesh import HUB
+
+SIZE = 64 # width and height of offscreen framebuffer
+BACKGROUND = "\xff" * 4 * SIZE * SIZE # pixels when nothing is drawn
+
+def make_context():
+    """make current a surfaceless egl context drawing to a framebuffer object
+
+       returns None if no egl context can be made
+    """
+    try:
+        from OpenGL import EGL
+        display = EGL.eglGetDisplay( EGL.EGL_DEFAULT_DISPLAY )
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize( display, pointer(major), pointer(minor) ):
+            return None
+
+        config, count = EGL.EGLConfig(), EGL.EGLint()
+        attributes = ( EGL.EGLint * 5 )( EGL.EGL_RENDERABLE_TYPE,
+                                         EGL.EGL_OPENGL_BIT,
+                                         EGL.EGL_SURFACE_TYPE,
+                                         EGL.EGL_PBUFFER_BIT, EGL.EGL_NONE )
+        EGL.eglChooseConfig( display, attributes, pointer(config), 1,
+                             pointer(count) )
+        if count.value < 1:
+            return None
+
+        EGL.eglBindAPI( EGL.EGL_OPENGL_API )
+        context = EGL.eglCreateContext( display, config, EGL.EGL_NO_CONTEXT,
+                                        None )
+        if not EGL.eglMakeCurrent( display, EGL.EGL_NO_SURFACE,
+                                   EGL.EGL_NO_SURFACE, context ):
+            return None
+    except Exception:
+        return None
+
+    # draw into color and depth renderbuffers
+    framebuffer = glGenFramebuffers( 1 )
+    glBindFramebuffer( GL_FRAMEBUFFER, framebuffer )
+    for storage, attachment in ( (GL_RGBA8, GL_COLOR_ATTACHMENT0),
+                                 (GL_DEPTH_COMPONENT24, GL_DEPTH_ATTACHMENT) ):
+        renderbuffer = glGenRenderbuffers( 1 )
+        glBindRenderbuffer( GL_RENDERBUFFER, renderbuffer )
+        glRenderbufferStorage( GL_RENDERBUFFER, storage, SIZE, SIZE )
+        glFramebufferRenderbuffer( GL_FRAMEBUFFER, attachment,
+                                   GL_RENDERBUFFER, renderbuffer )
+    glViewport( 0, 0, SIZE, SIZE )
+
+    return context
+
+CONTEXT = make_context()
+
+def render( mesh ):
+    """draw mesh in front of camera and return pixels
+    """
+    glEnable( GL_LIGHTING )
+    glEnable( GL_LIGHT0 )
+    glEnable( GL_DEPTH_TEST )
+    glClearColor( 1.0, 1.0, 1.0, 1.0 )
+    glClear( GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT )
+
+    glMatrixMode( GL_PROJECTION )
+    glLoadIdentity()
+    gluPerspective( 45.0, 1.0, 1.0, 1000.0 )
+    glMatrixMode( GL_MODELVIEW )
+    glLoadIdentity()
+    glTranslatef( 0.0, 0.0, -200.0 )
+    glRotatef( 45.0, 0.0, 1.0, 0.0 )
+
+    mesh.draw()
+    glFinish()
+
+    return glReadPixels( 0, 0, SIZE, SIZE, GL_RGBA, GL_UNSIGNED_BYTE )
+
+class Test_Mesh_Render( unittest.TestCase ):
+    """tests drawing stl meshes with display lists and buffer objects
+    """
+
+    def setUp( self ):
+        if CONTEXT is None:
+            self.skipTest( "no mesa software gl context" )
+
+    def test_buffers_match_list( self ):
+        """test buffer objects draw same pixels as display list
+        """
+        listed = STL_Mesh( HUB )
+        listed.render = STL_Mesh.LIST
+        buffered = STL_Mesh( HUB )
+
+        listed_pixels = render( listed )
+        buffered_pixels = render( buffered )
+
+        self.assert_( listed.list_name is not None )
+        self.assert_( buffered.vertex_buffer is not None )
+        self.assertNotEqual( listed_pixels, BACKGROUND )
+        self.assertEqual( listed_pixels, buffered_pixels )
+
+    def test_indexed_buffers( self ):
+        """test mesh drawn from indexed form keeps flat shading of list
+        """
+        listed = STL_Mesh( HUB )
+        listed.render = STL_Mesh.LIST
+        mesh = STL_Mesh( HUB )
+        mesh.weld( discard=True )
+        pixels = render( mesh )
+
+        self.assert_( mesh.triangles is None )
+        self.assertEqual( mesh.buffer_size, mesh.size * 3 )
+        self.assertEqual( glGetError(), GL_NO_ERROR )
+        self.assertNotEqual( pixels, BACKGROUND )
+        self.assertEqual( pixels, render(listed) )
+
+    def test_levels( self ):
+        """test distant mesh is drawn from coarser level of detail
+        """
+        mesh = STL_Mesh( HUB )
+        mesh.make_levels()
+
+        glMatrixMode( GL_MODELVIEW )
+        glLoadIdentity()
+        glTranslatef( 0.0, 0.0, -1e6 )
+        mesh.draw()
+
+        self.assert_( mesh.vertex_buffer is None )
+        self.assert_( mesh.levels[-1].vertex_buffer is not None )
+        self.assertNotEqual( render(mesh), BACKGROUND )
+        self.assert_( mesh.vertex_buffer is not None )
+
+
+if __name__ == '__main__':
+    unittest.main()
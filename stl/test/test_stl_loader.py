@@ -0,0 +1,91 @@
+import unittest
+import os
+import tempfile
+
+from l33tC4D.stl.STL_Mesh import STL_Mesh
+from l33tC4D.stl import STL_Loader as loader_module
+from l33tC4D.stl.STL_Loader import STL_Loader, load_meshes
+from test_stl_mesh import HUB, write_ascii_stl
+
+class Test_STL_Loader( unittest.TestCase ):
+    """tests parsing stl files in worker processes
+    """
+
+    def setUp( self ):
+        self.mesh = STL_Mesh( HUB )
+
+        # write ascii copy of part of hub
+        fd, self.ascii_filename = tempfile.mkstemp( suffix=".stl" )
+        stl_file = os.fdopen( fd, 'w' )
+        try:
+            write_ascii_stl( self.mesh.triangles[:50], stl_file )
+        finally:
+            stl_file.close()
+
+    def tearDown( self ):
+        os.remove( self.ascii_filename )
+
+    def test_load( self ):
+        """test meshes loaded in pool match meshes loaded directly
+        """
+        loaded = []
+        meshes = load_meshes( [HUB, self.ascii_filename], processes=2,
+                              callback=lambda f, m: loaded.append(f) )
+
+        self.assertEqual( sorted(loaded), sorted(meshes) )
+        self.assert_( (meshes[HUB].triangles == self.mesh.triangles).all() )
+        self.assert_( (meshes[self.ascii_filename].triangles
+                       == self.mesh.triangles[:50]).all() )
+
+    def test_error( self ):
+        """test loader raises error for missing file
+        """
+        loader = STL_Loader( processes=1 )
+        try:
+            loader.load( [HUB, self.ascii_filename + ".missing"] )
+            self.assertRaises( IOError, loader.wait )
+            self.assert_( HUB in loader.meshes )
+        finally:
+            loader.close()
+
+    def test_error_order( self ):
+        """test error of first file given is raised, whichever fails first
+        """
+        fd, truncated = tempfile.mkstemp( suffix=".stl" )
+        os.write( fd, "solid cut\n facet normal 0 0 1\n  outer loop\n"
+                      "   vertex 1 2 3\n" )
+        os.close( fd )
+        missing = self.ascii_filename + ".missing"
+        try:
+            for stl_filenames, error in ( ([truncated, missing], ValueError),
+                                          ([missing, truncated], IOError) ):
+                loader = STL_Loader( processes=2 )
+                try:
+                    loader.load( stl_filenames )
+                    self.assertRaises( error, loader.wait )
+                finally:
+                    loader.close()
+        finally:
+            os.remove( truncated )
+
+    def test_shared_cleanup( self ):
+        """test shared file is removed if triangles can't be written to it
+        """
+        class Unwritable_Mesh( STL_Mesh ):
+            def __init__( self, stl_filename ):
+                STL_Mesh.__init__( self, stl_filename )
+                self.triangles = None
+
+        shared_dir = tempfile.mkdtemp()
+        loader_module.STL_Mesh = Unwritable_Mesh
+        try:
+            result = loader_module._parse_shared( HUB, shared_dir )
+            self.assert_( result[1] is None )
+            self.assertEqual( os.listdir(shared_dir), [] )
+        finally:
+            loader_module.STL_Mesh = STL_Mesh
+            os.rmdir( shared_dir )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+import os
+import tempfile
+from struct import unpack
+
+from l33tC4D.stl.STL_Mesh import STL_Mesh
+
+HUB = os.path.join( os.path.dirname(os.path.abspath(__file__)),
+                    "solid_one_hub.stl" )
+
+def write_ascii_stl( triangles, stl_file ):
+    """write triangle array to open file as ascii stl
+    """
+    stl_file.write( "solid test\n" )
+    for triangle in triangles:
+        stl_file.write( "  facet normal %r %r %r\n" % tuple(triangle[0]) )
+        stl_file.write( "    outer loop\n" )
+        for vertex in triangle[1:]:
+            stl_file.write( "      vertex %r %r %r\n" % tuple(vertex) )
+        stl_file.write( "    endloop\n  endfacet\n" )
+    stl_file.write( "endsolid test\n" )
+
+class Small_Chunk_Mesh( STL_Mesh ):
+    """splits tokens across as many chunks as possible
+    """
+    CHUNK_SIZE = 7
+
+class Test_STL_Mesh( unittest.TestCase ):
+    """tests loading stl meshes
+    """
+
+    def setUp( self ):
+        self.mesh = STL_Mesh( HUB )
+
+    def test_bulk_parse( self ):
+        """test bulk loader gives same triangles as unpacking each float
+        """
+        stl_file = open( HUB, 'rb' )
+        try:
+            stl_file.seek( 80 )
+            size = unpack( "I", stl_file.read(4) )[0]
+            self.assertEqual( self.mesh.size, size )
+            self.assertEqual( self.mesh.triangles.shape, (size, 4, 3) )
+
+            for i in range( size ):
+                for j in range( 4 ):
+                    coords = unpack( "fff", stl_file.read(12) )
+                    for k in range( 3 ):
+                        self.assertEqual( self.mesh.triangles[i][j][k],
+                                          coords[k] )
+                stl_file.read( 2 )
+        finally:
+            stl_file.close()
+
+    def test_mapped( self ):
+        """test mapped mesh views same triangles without copying them
+        """
+        mapped = STL_Mesh( HUB, mapped=True )
+        try:
+            self.assertEqual( mapped.size, self.mesh.size )
+            self.assertEqual( mapped.triangles.dtype.itemsize, 4 )
+            self.assertFalse( mapped.triangles.flags.owndata )
+            self.assertFalse( mapped.triangles.flags.writeable )
+            self.assert_( (mapped.triangles == self.mesh.triangles).all() )
+        finally:
+            mapped.close()
+        self.assert_( mapped.triangles is None )
+
+    def test_ascii( self ):
+        """test ascii stl file gives same triangles as binary stl file
+        """
+        fd, filename = tempfile.mkstemp( suffix=".stl" )
+        try:
+            stl_file = os.fdopen( fd, 'w' )
+            try:
+                write_ascii_stl( self.mesh.triangles[:100], stl_file )
+            finally:
+                stl_file.close()
+
+            for mesh_class in STL_Mesh, Small_Chunk_Mesh:
+                mesh = mesh_class( filename )
+                self.assertEqual( mesh.size, 100 )
+                self.assert_( (mesh.triangles
+                               == self.mesh.triangles[:100]).all() )
+
+            # ascii files can't be mapped
+            mesh = STL_Mesh( filename, mapped=True )
+            self.assertFalse( mesh.mapped )
+            self.assertEqual( mesh.size, 100 )
+        finally:
+            os.remove( filename )
+
+    def test_weld( self ):
+        """test indexed form of mesh rebuilds triangles within tolerance
+        """
+        stats = self.mesh.weld( tolerance=1e-4 )
+        self.assertEqual( stats["corners"], self.mesh.size * 3 )
+        self.assertEqual( stats["vertices"], len(self.mesh.vertices) )
+        self.assert_( stats["vertices"] < stats["corners"] )
+        self.assert_( stats["indexed_bytes"] < stats["triangle_bytes"] )
+
+        self.assertEqual( self.mesh.faces.shape, (self.mesh.size, 3) )
+        self.assertEqual( self.mesh.faces.dtype.itemsize, 4 )
+        rebuilt = self.mesh.vertices[self.mesh.faces]
+        self.assert_( (abs(rebuilt - self.mesh.triangles[:, 1:])
+                       < 1e-4).all() )
+
+    def test_weld_again( self ):
+        """test welding again after triangles were discarded
+        """
+        self.mesh.weld( tolerance=1e-4, discard=True )
+        self.assertEqual( self.mesh.triangles, None )
+        vertices = self.mesh.vertices[self.mesh.faces]
+
+        stats = self.mesh.weld( tolerance=1e-4 )
+        self.assertEqual( stats["corners"], self.mesh.size * 3 )
+        self.assertEqual( self.mesh.faces.shape, (self.mesh.size, 3) )
+        self.assert_( (abs(self.mesh.vertices[self.mesh.faces] - vertices)
+                       < 1e-4).all() )
+
+    def test_levels( self ):
+        """test levels of detail get coarser and are picked by distance
+        """
+        sizes = self.mesh.make_levels()
+        self.assertEqual( len(sizes), len(STL_Mesh.LOD_RATIOS) )
+        for size, ratio in zip( sizes, STL_Mesh.LOD_RATIOS ):
+            target = self.mesh.size * ratio
+            self.assert_( target / 2.0 < size < target * 2.0 )
+
+        # normals of each level are unit length
+        for level in self.mesh.levels:
+            lengths = ( level.triangles[:, 0]**2 ).sum( 1 )
+            self.assert_( (abs(lengths - 1.0) < 1e-6).all() )
+
+        levels = [ self.mesh.pick_level( 10.0 ** i ) for i in range(8) ]
+        self.assertEqual( levels, sorted(levels) )
+        self.assertEqual( levels[0], 0 )
+        self.assertEqual( levels[-1], len(sizes) )
+
+
+if __name__ == '__main__':
+    unittest.main()
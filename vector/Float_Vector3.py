@@ -0,0 +1,255 @@
+import math
+
+class Float_Vector3( object ):
+    """3 dimensional vector storing coords as plain floats
+
+       same interface as numpy backed Vector3, without allocating a numpy
+       array per vector or calling into numpy for each operation
+    """
+    __slots__ = [ "_x", "_y", "_z" ] # instances only store 3 floats
+    EPSILON = 0.001 # +/- to be considered equal
+
+    def __init__( self, seed=(1, 0, 0) ):
+        """store x, y and z coordinates as floats
+        """
+        x, y, z = seed
+        self._x = float( x )
+        self._y = float( y )
+        self._z = float( z )
+
+    def __len__( self ):
+        return 3
+
+    def __getitem__( self, index ):
+        return ( self._x, self._y, self._z )[index]
+
+    def __setitem__( self, index, value ):
+        if index == 0 or index == -3:
+            self._x = float( value )
+        elif index == 1 or index == -2:
+            self._y = float( value )
+        elif index == 2 or index == -1:
+            self._z = float( value )
+        else:
+            raise IndexError( "vector3 index out of range: %d" % index )
+
+    def __iter__( self ):
+        yield self._x
+        yield self._y
+        yield self._z
+
+    def __repr__( self ):
+        return "<vector3 x=%.3f y=%.3f z=%.3f />" % tuple( self )
+
+    def copy( self ):
+        """return new vector with same coords
+        """
+        vector = self.__class__.__new__( self.__class__ )
+        vector._x, vector._y, vector._z = self._x, self._y, self._z
+        return vector
+
+    def set( self, x, y, z ):
+        """set coords of this vector
+        """
+        self._x = float( x )
+        self._y = float( y )
+        self._z = float( z )
+        return self
+
+    def add( self, vector3, out=None ):
+        """add given vector to this vector
+        """
+        if out is None:
+            out = self
+        out._x = self._x + vector3._x
+        out._y = self._y + vector3._y
+        out._z = self._z + vector3._z
+        return out
+
+    def __add__( self, vector3 ):
+        """a + b <==> new vector a.add( b )
+        """
+        return self.add( vector3, out=self.copy() )
+
+    def __iadd__( self, vector3 ):
+        """a += b <==> a.add( b )
+        """
+        return self.add( vector3 )
+
+    def subtract( self, vector3, out=None ):
+        """subtract given vector from this vector
+        """
+        if out is None:
+            out = self
+        out._x = self._x - vector3._x
+        out._y = self._y - vector3._y
+        out._z = self._z - vector3._z
+        return out
+
+    def __sub__( self, vector3 ):
+        """a - b <==> new vector a.subtract( b )
+        """
+        return self.subtract( vector3, out=self.copy() )
+
+    def __isub__( self, vector3 ):
+        """a -= b <==> a.subtract( b )
+        """
+        return self.subtract( vector3 )
+
+    def dot( self, vector3 ):
+        """returns scalar dot product of this vector and given vector
+        """
+        return ( self._x * vector3._x + self._y * vector3._y
+                 + self._z * vector3._z )
+
+    def cross( self, vector3, out=None ):
+        """cross this vector with given vector
+        """
+        if out is None:
+            out = self
+        x, y, z = self._x, self._y, self._z
+        out._x = y * vector3._z - z * vector3._y
+        out._y = z * vector3._x - x * vector3._z
+        out._z = x * vector3._y - y * vector3._x
+        return out
+
+    def multiply( self, scalar, out=None ):
+        """multiply this vector by given scalar
+        """
+        if out is None:
+            out = self
+        out._x = self._x * scalar
+        out._y = self._y * scalar
+        out._z = self._z * scalar
+        return out
+
+    def __imul__( self, scalar ):
+        return self.multiply( scalar )
+
+    def divide( self, scalar, out=None ):
+        """divide this vector by given scalar
+        """
+        # check we aren't dividing by 0
+        if abs(scalar) < self.EPSILON:
+            raise ZeroDivisionError( "can't divide vector by zero!" )
+        return self.multiply( 1.0 / scalar, out )
+
+    def __idiv__( self, scalar ):
+        return self.divide( scalar )
+
+    def normalize( self, out=None ):
+        """set magnitude to 1.0; raises ZeroDivisionError if magnitude is 0
+        """
+        return self.set_magnitude( 1.0, out )
+
+    def project( self, vector3, out=None ):
+        """project this vector onto given vector
+        """
+        if out is None:
+            out = self
+        scale = self.dot( vector3 ) / vector3.dot( vector3 )
+        return vector3.multiply( scale, out )
+
+    def distance( self, vector3 ):
+        """returns distance from this vector to given vector
+        """
+        x = self._x - vector3._x
+        y = self._y - vector3._y
+        z = self._z - vector3._z
+        return math.sqrt( x * x + y * y + z * z )
+
+    def angle_to( self, vector3 ):
+        """return angle from this vector to given vector in degrees
+        """
+        # make sure neither vector is zero-length
+        sm = self._get_magnitude()
+        vm = vector3._get_magnitude()
+        if abs(sm) < self.EPSILON or abs(vm) < self.EPSILON:
+            raise ZeroDivisionError(
+                "can't calculate angle between zero-length vectors!" )
+
+        # clip rounding errors outside domain of acos
+        cosine = max( -1.0, min(1.0, self.dot(vector3) / (sm * vm)) )
+        return math.degrees( math.acos(cosine) )
+
+    def rotate( self, degrees, axis, out=None ):
+        """rotate this vector around given axis vector
+        """
+        if out is None:
+            out = self
+
+        # normalized axis
+        m = axis._get_magnitude()
+        if m < self.EPSILON:
+            raise ZeroDivisionError(
+                "can't rotate around zero magnitude vector!" )
+        u, v, w = axis._x / m, axis._y / m, axis._z / m
+
+        # rodrigues' rotation formula
+        c = math.cos( math.radians(degrees) )
+        s = math.sin( math.radians(degrees) )
+        x, y, z = self._x, self._y, self._z
+        k = ( u * x + v * y + w * z ) * ( 1.0 - c )
+        out._x = x * c + ( v * z - w * y ) * s + u * k
+        out._y = y * c + ( w * x - u * z ) * s + v * k
+        out._z = z * c + ( u * y - v * x ) * s + w * k
+        return out
+
+    def transform( self, matrix3, out=None ):
+        """transform vector with 4x4 matrix
+        """
+        if out is None:
+            out = self
+        (a, b, c, d), (e, f, g, h), (i, j, k, l), w = \
+            matrix3._matrix.tolist()
+        x, y, z = self._x, self._y, self._z
+        out._x = a * x + b * y + c * z + d
+        out._y = e * x + f * y + g * z + h
+        out._z = i * x + j * y + k * z + l
+        return out
+
+    def set_magnitude( self, scalar, out=None ):
+        """scale this vector to given length
+        """
+        # assure magnitude is not zero
+        m = self._get_magnitude()
+        if m < self.EPSILON:
+            raise ZeroDivisionError(
+                "can't adjust magnitude of zero-length vector!" )
+        return self.multiply( scalar / m, out )
+
+    ###
+    ### getter and setter methods for properties
+    ###
+
+    def _get_x( self ):
+        return self._x
+    def _set_x( self, value ):
+        self._x = float( value )
+
+    def _get_y( self ):
+        return self._y
+    def _set_y( self, value ):
+        self._y = float( value )
+
+    def _get_z( self ):
+        return self._z
+    def _set_z( self, value ):
+        self._z = float( value )
+
+    def _get_magnitude( self ):
+        return math.sqrt( self._x * self._x + self._y * self._y
+                          + self._z * self._z )
+
+    def _get_array( self ):
+        return ( self._x, self._y, self._z )
+
+    ###
+    ### properties
+    ###
+
+    x = property( _get_x, _set_x, doc="x coordinate of vector" )
+    y = property( _get_y, _set_y, doc="y coordinate of vector" )
+    z = property( _get_z, _set_z, doc="z coordinate of vector" )
+    magnitude = property( _get_magnitude, doc="length of vector" )
+    array = property( _get_array, doc="coords as flat tuple" )
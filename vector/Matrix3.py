@@ -1,4 +1,4 @@
-from numpy import eye, matrix
+from numpy import eye, matrix, array, dot
 import math
 from Vector3 import Vector3
 
@@ -11,6 +11,9 @@ class Matrix3:
     def __init__( self, seed=None ):
         """default to 4x4 identity matrix
         """
+        # counts changes so cached products of this matrix can be checked
+        self.version = 0
+
         if seed is None:
             self._matrix = matrix( eye(4, 4) )
         else:
@@ -44,14 +47,16 @@ class Matrix3:
         x, y, z = (coord / magnitude for coord in axis)
         c = math.cos( math.radians(degrees) )
         s = math.sin( math.radians(degrees) )
-        m = matrix( [[(x*x*(1-c))+c, (x*y*(1-c))-(z*s), (x*z*(1-c))+(y*s), 0],
-                     [(y*x*(1-c))+(z*s), (y*y*(1-c))+c, (y*z*(1-c))-(x*s), 0],
-                     [(x*z*(1-c))-(y*s), (y*z*(1-c))+(x*s), (z*z*(1-c))+c, 0],
-                     [0, 0, 0, 1]],
-                    'd' )
+        r = array( [[(x*x*(1-c))+c, (x*y*(1-c))-(z*s), (x*z*(1-c))+(y*s)],
+                    [(y*x*(1-c))+(z*s), (y*y*(1-c))+c, (y*z*(1-c))-(x*s)],
+                    [(x*z*(1-c))-(y*s), (y*z*(1-c))+(x*s), (z*z*(1-c))+c]],
+                   'd' )
 
-        # multiply rotation matrix with current matrix
-        self._matrix *= m
+        # multiply rotation into current matrix in place, only the first
+        # three columns change
+        m = self._matrix.A
+        m[:, :3] = dot( m[:, :3], r )
+        self.version += 1
 
         return self
 
@@ -59,30 +64,19 @@ class Matrix3:
     def translate( self, vector3 ):
         """translate matrix by given vector
         """
-        # generate translation matrix
-        x, y, z = vector3
-        m = matrix( [[1, 0, 0, x],
-                     [0, 1, 0, y],
-                     [0, 0, 1, z],
-                     [0, 0, 0, 1]],
-                    'd' )
-
-        # multiply transformation matrix with current matrix
-        self._matrix *= m
+        # multiplying by a translation matrix only changes the last column
+        m = self._matrix.A
+        m[:, 3] += dot( m[:, :3], tuple(vector3) )
+        self.version += 1
 
         return self
        
     def scale( self, x, y, z ):
         """scale matrix by given coefficients
         """
-        m = matrix( [[x, 0, 0, 0],
-                     [0, y, 0, 0],
-                     [0, 0, z, 0],
-                     [0, 0, 0, 1]],
-                    'd' )
-
-        # multiply scale matrix with current matrix
-        self._matrix *= m
+        # multiplying by a scale matrix scales the first three columns
+        self._matrix.A[:, :3] *= ( x, y, z )
+        self.version += 1
 
         return self
 
@@ -90,14 +84,39 @@ class Matrix3:
         """multiply this transformation matrix by another
         """
         self._matrix *= matrix3._matrix
+        self.version += 1
         return self
 
     def invert( self ):
         """invert transformation matrix
+
+           affine matrices are inverted in closed form from the inverse of
+           their 3x3 part, anything else falls back to general inversion
         """
-        self._matrix = self._matrix.I
+        (a, b, c, x), (d, e, f, y), (g, h, i, z), w = self._matrix.tolist()
+        if w != [0.0, 0.0, 0.0, 1.0]:
+            self._matrix = self._matrix.I
+            self.version += 1
+            return self
+
+        # inverse of 3x3 part is its adjugate over its determinant
+        A, B, C = e*i - f*h, f*g - d*i, d*h - e*g
+        determinant = a*A + b*B + c*C
+        if abs( determinant ) < 1e-12:
+            raise ZeroDivisionError( "can't invert singular matrix!" )
+        r = 1.0 / determinant
+        rows = [ [A*r, (c*h - b*i)*r, (b*f - c*e)*r],
+                 [B*r, (a*i - c*g)*r, (c*d - a*f)*r],
+                 [C*r, (b*g - a*h)*r, (a*e - b*d)*r] ]
+
+        # translation of inverse undoes rotated translation
+        for row in rows:
+            row.append( -(row[0]*x + row[1]*y + row[2]*z) )
+        rows.append( w )
+        self._matrix = matrix( rows, 'd' )
+        self.version += 1
         return self
-    
+
     def __imul__( self, matrix3 ):
         return self.transform( matrix3 )
 
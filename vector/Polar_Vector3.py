@@ -4,7 +4,7 @@ from math import degrees, radians, cos, sin, asin, atan2
 class Polar_Vector3( Vector3 ):
     """polar interface to vector3
     """
-    __slots__ = "_coords" # instances only store numpy coords matrix
+    __slots__ = () # instances only store coords of vector3
     
     def __repr__( self ):
         return "<polar_vector3 lat=%.3f lon=%.3f radius=%.3f />" % (
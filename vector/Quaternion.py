@@ -0,0 +1,224 @@
+import math
+from numpy import asarray, dot
+
+from Matrix3 import Matrix3
+from Vector3 import Vector3
+from Vector3_Array import Vector3_Array
+
+class Quaternion( object ):
+    """unit quaternion representing a rotation in 3d
+
+       like Matrix3 methods modify this quaternion in place and return it,
+       rotations are composed in the same order as Matrix3 so the rotation
+       given last is applied to vectors first
+    """
+    __slots__ = [ "_w", "_x", "_y", "_z" ] # instances only store 4 floats
+    EPSILON = 0.001 # +/- to be considered equal
+
+    def __init__( self, seed=(1, 0, 0, 0) ):
+        """store w, x, y and z components, default to no rotation
+        """
+        w, x, y, z = seed
+        self._w = float( w )
+        self._x = float( x )
+        self._y = float( y )
+        self._z = float( z )
+
+    def __getitem__( self, index ):
+        return ( self._w, self._x, self._y, self._z )[index]
+
+    def __iter__( self ):
+        yield self._w
+        yield self._x
+        yield self._y
+        yield self._z
+
+    def __repr__( self ):
+        return "<quaternion w=%.3f x=%.3f y=%.3f z=%.3f />" % tuple( self )
+
+    def rotate( self, degrees, axis ):
+        """rotate by given degrees around given axis vector
+        """
+        magnitude = math.sqrt( sum(coord * coord for coord in axis) )
+        if abs( magnitude ) < self.EPSILON:
+            raise ZeroDivisionError(
+                "can't rotate around zero magnitude vector: %s!" % str(axis) )
+        half = math.radians( degrees ) / 2.0
+        s = math.sin( half ) / magnitude
+        x, y, z = axis
+        return self.compose( (math.cos(half), x * s, y * s, z * s) )
+
+    def compose( self, quaternion ):
+        """multiply this rotation by given rotation
+        """
+        aw, ax, ay, az = self._w, self._x, self._y, self._z
+        bw, bx, by, bz = quaternion
+        self._w = aw*bw - ax*bx - ay*by - az*bz
+        self._x = aw*bx + ax*bw + ay*bz - az*by
+        self._y = aw*by - ax*bz + ay*bw + az*bx
+        self._z = aw*bz + ax*by - ay*bx + az*bw
+        return self
+
+    def __imul__( self, quaternion ):
+        return self.compose( quaternion )
+
+    def normalize( self ):
+        """set magnitude to 1.0 so rounding errors don't add up to a scale
+        """
+        m = self._get_magnitude()
+        if m < self.EPSILON:
+            raise ZeroDivisionError( "can't normalize zero quaternion!" )
+        self._w /= m
+        self._x /= m
+        self._y /= m
+        self._z /= m
+        return self
+
+    def invert( self ):
+        """reverse rotation
+        """
+        self._x = -self._x
+        self._y = -self._y
+        self._z = -self._z
+        return self
+
+    def slerp( self, quaternion, t ):
+        """interpolate fraction t of the way to given rotation along the
+           shortest arc
+        """
+        bw, bx, by, bz = quaternion
+        cosine = self._w*bw + self._x*bx + self._y*by + self._z*bz
+
+        # q and -q are the same rotation, take the shorter way around
+        if cosine < 0.0:
+            bw, bx, by, bz = -bw, -bx, -by, -bz
+            cosine = -cosine
+
+        # close rotations interpolate linearly to avoid dividing by ~0
+        if cosine > 0.9995:
+            a, b = 1.0 - t, t
+        else:
+            angle = math.acos( cosine )
+            sine = math.sin( angle )
+            a = math.sin( (1.0 - t) * angle ) / sine
+            b = math.sin( t * angle ) / sine
+
+        self._w = a * self._w + b * bw
+        self._x = a * self._x + b * bx
+        self._y = a * self._y + b * by
+        self._z = a * self._z + b * bz
+        return self.normalize()
+
+    def apply( self, vectors ):
+        """rotate Vector3, Vector3_Array or n x 3 array
+
+           vector objects are rotated in place and returned, arrays of
+           coords are rotated into a new array
+        """
+        if isinstance( vectors, Vector3_Array ):
+            coords = vectors.array
+            coords[:] = dot( coords, asarray(self._rows()).T )
+            return vectors
+
+        if hasattr( vectors, "transform" ):
+            # v + 2w(u x v) + 2u x (u x v) with u the vector part
+            w, x, y, z = self._w, self._x, self._y, self._z
+            vx, vy, vz = vectors
+            cx = 2.0 * ( y*vz - z*vy )
+            cy = 2.0 * ( z*vx - x*vz )
+            cz = 2.0 * ( x*vy - y*vx )
+            return vectors.set( vx + w*cx + y*cz - z*cy,
+                                vy + w*cy + z*cx - x*cz,
+                                vz + w*cz + x*cy - y*cx )
+
+        # whole batch in one matrix product
+        return dot( asarray(vectors, 'd'), asarray(self._rows()).T )
+
+    def _rows( self ):
+        """returns rows of 3x3 rotation matrix
+        """
+        w, x, y, z = self._w, self._x, self._y, self._z
+        return [ [1 - 2*(y*y + z*z), 2*(x*y - w*z), 2*(x*z + w*y)],
+                 [2*(x*y + w*z), 1 - 2*(x*x + z*z), 2*(y*z - w*x)],
+                 [2*(x*z - w*y), 2*(y*z + w*x), 1 - 2*(x*x + y*y)] ]
+
+    ###
+    ### getter and setter methods for properties
+    ###
+
+    def _get_w( self ):
+        return self._w
+
+    def _get_x( self ):
+        return self._x
+
+    def _get_y( self ):
+        return self._y
+
+    def _get_z( self ):
+        return self._z
+
+    def _get_magnitude( self ):
+        return math.sqrt( self._w*self._w + self._x*self._x
+                          + self._y*self._y + self._z*self._z )
+
+    def _get_matrix3( self ):
+        a, b, c = self._rows()
+        return Matrix3( a + [0] + b + [0] + c + [0] + [0, 0, 0, 1] )
+
+    def _set_matrix3( self, matrix3 ):
+        # from http://www.euclideanspace.com/maths/geometry/rotations/conversions/matrixToQuaternion/
+        # pick largest diagonal term to divide by so result stays accurate
+        (m00, m01, m02, d), (m10, m11, m12, d), (m20, m21, m22, d), d = \
+            matrix3._matrix.tolist()
+        t = m00 + m11 + m22
+        if t > 0:
+            s = math.sqrt( t + 1.0 ) * 2.0
+            self._w = s / 4.0
+            self._x = ( m21 - m12 ) / s
+            self._y = ( m02 - m20 ) / s
+            self._z = ( m10 - m01 ) / s
+        elif m00 > m11 and m00 > m22:
+            s = math.sqrt( 1.0 + m00 - m11 - m22 ) * 2.0
+            self._w = ( m21 - m12 ) / s
+            self._x = s / 4.0
+            self._y = ( m01 + m10 ) / s
+            self._z = ( m02 + m20 ) / s
+        elif m11 > m22:
+            s = math.sqrt( 1.0 + m11 - m00 - m22 ) * 2.0
+            self._w = ( m02 - m20 ) / s
+            self._x = ( m01 + m10 ) / s
+            self._y = s / 4.0
+            self._z = ( m12 + m21 ) / s
+        else:
+            s = math.sqrt( 1.0 + m22 - m00 - m11 ) * 2.0
+            self._w = ( m10 - m01 ) / s
+            self._x = ( m02 + m20 ) / s
+            self._y = ( m12 + m21 ) / s
+            self._z = s / 4.0
+        self.normalize()
+
+    def _get_angle_axis( self ):
+        w = max( -1.0, min(1.0, self._w) )
+        s = math.sqrt( 1.0 - w * w )
+
+        # if angle is zero return zeros for axis, too
+        if s < self.EPSILON:
+            return( 0.0, Vector3((0.0, 0.0, 0.0)) )
+
+        angle = math.degrees( 2.0 * math.acos(w) )
+        return angle, Vector3( (self._x / s, self._y / s, self._z / s) )
+
+    ###
+    ### properties
+    ###
+
+    w = property( _get_w, doc="scalar part of quaternion" )
+    x = property( _get_x, doc="x of vector part" )
+    y = property( _get_y, doc="y of vector part" )
+    z = property( _get_z, doc="z of vector part" )
+    magnitude = property( _get_magnitude, doc="length of quaternion" )
+    matrix3 = property( _get_matrix3, _set_matrix3,
+                        doc="rotation as new Matrix3, set from Matrix3" )
+    angle_axis = property( _get_angle_axis,
+                           doc="current (a, x, y, z) rotation of quaternion" )
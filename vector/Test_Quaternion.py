@@ -0,0 +1,77 @@
+import unittest
+from numpy import allclose
+from numpy.random import RandomState
+
+from Vector3 import Vector3
+from Vector3_Array import Vector3_Array
+from Matrix3 import Matrix3
+from Quaternion import Quaternion
+
+class Test_Quaternion(unittest.TestCase):
+
+    def setUp(self):
+        self.points = RandomState( 0 ).uniform( -10, 10, (20, 3) )
+        self.axis = Vector3( (1, 2, 3) )
+        self.other = Vector3( (-2, 0, 1) )
+
+    def test_matrix3( self ):
+        """test rotations match Matrix3 and convert back from it
+        """
+        q = Quaternion().rotate( 30, self.axis ).rotate( 70, self.other )
+        m = Matrix3().rotate( 30, self.axis ).rotate( 70, self.other )
+        self.assert_( allclose(q.matrix3._matrix, m._matrix) )
+
+        # each branch of conversion from matrix
+        for degrees, axis in ( (30, self.axis), (179, (1, 0, 0)),
+                               (179, (0, 1, 0)), (179, (0, 0, 1)) ):
+            m = Matrix3().rotate( degrees, Vector3(axis) )
+            q = Quaternion()
+            q.matrix3 = m
+            self.assert_( allclose(q.matrix3._matrix, m._matrix) )
+
+        angle, axis = Quaternion().rotate( 30, self.axis ).angle_axis
+        self.assert_( abs(angle - 30) < 0.001 )
+        self.assert_( allclose(axis.array,
+                               Vector3(self.axis).normalize().array) )
+
+    def test_apply( self ):
+        """test single and batch rotation match rotating vector3
+        """
+        q = Quaternion().rotate( 40, self.axis )
+        rotated = q.apply( self.points )
+        batch = q.apply( Vector3_Array(self.points) )
+        self.assert_( allclose(batch.array, rotated) )
+
+        for point, coords in zip( self.points, rotated ):
+            expected = Vector3( point ).rotate( 40, self.axis )
+            self.assert_( allclose(expected.array, coords) )
+            self.assert_( allclose(q.apply(Vector3(point)).array, coords) )
+
+        q.invert()
+        self.assert_( allclose(q.apply(rotated), self.points) )
+
+    def test_slerp( self ):
+        """test slerp turns at constant rate along shortest arc
+        """
+        q = Quaternion().rotate( 10, self.axis )
+        for t in 0.0, 0.25, 0.5, 1.0:
+            half = Quaternion( q ).slerp( Quaternion().rotate(90, self.axis),
+                                          t )
+            expected = Quaternion().rotate( 10 + 80 * t, self.axis )
+            self.assert_( allclose(list(half), list(expected)) )
+
+        # negated quaternion is same rotation so nothing moves
+        same = Quaternion( q ).slerp( [-c for c in q], 0.5 )
+        self.assert_( allclose(same.matrix3._matrix, q.matrix3._matrix) )
+
+    def test_drift( self ):
+        """test many small composed rotations stay a pure rotation
+        """
+        q = Quaternion()
+        for i in range( 3600 ):
+            q.rotate( 0.1, self.axis ).rotate( 0.1, self.other ).normalize()
+        self.assert_( abs(q.magnitude - 1.0) < 1e-12 )
+
+if __name__ == "__main__":
+    suite = unittest.TestLoader().loadTestsFromTestCase(Test_Quaternion)
+    unittest.TextTestRunner(verbosity=2).run(suite)
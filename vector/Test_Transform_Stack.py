@@ -0,0 +1,96 @@
+import unittest
+from numpy import eye, allclose
+from numpy.random import RandomState
+
+from Vector3 import Vector3
+from Vector3_Array import Vector3_Array
+from Matrix3 import Matrix3
+from Transform_Stack import Transform_Stack
+
+class Test_Transform_Stack(unittest.TestCase):
+
+    def setUp(self):
+        self.points = RandomState( 0 ).uniform( -10, 10, (50, 3) )
+        self.axis = Vector3( (1, 2, 3) )
+        self.stack = Transform_Stack()
+        self.stack.push().translate( Vector3((1, -2, 3)) )
+        self.stack.push().rotate( 30, self.axis )
+        self.stack.push().scale( 2, 0.5, 3 )
+
+    def test_in_place( self ):
+        """test in place rotate, translate and scale match matrix products
+        """
+        m = Matrix3().rotate( 30, self.axis )
+        expected = m._matrix * Matrix3( (1, 0, 0, 1,  0, 1, 0, 2,
+                                         0, 0, 1, 3,  0, 0, 0, 1) )._matrix
+        m.translate( Vector3((1, 2, 3)) )
+        self.assert_( allclose(m._matrix, expected) )
+
+        expected = m._matrix * Matrix3( (2, 0, 0, 0,  0, 3, 0, 0,
+                                         0, 0, 4, 0,  0, 0, 0, 1) )._matrix
+        m.scale( 2, 3, 4 )
+        self.assert_( allclose(m._matrix, expected) )
+
+    def test_invert( self ):
+        """test closed form affine inverse matches general inverse
+        """
+        m = Matrix3( self.stack.composite )
+        expected = m._matrix.I
+        m.invert()
+        self.assert_( allclose(m._matrix, expected) )
+
+        self.assertRaises( ZeroDivisionError,
+                           Matrix3().scale(1, 0, 1).invert )
+
+    def test_apply( self ):
+        """test batch and single vectors match applying each component
+        """
+        points = self.stack.apply( self.points )
+        batch = self.stack.apply( Vector3_Array(self.points) )
+        self.assert_( allclose(batch.array, points) )
+
+        for point, coords in zip( self.points, points ):
+            v = Vector3( point )
+            for component in reversed( list(self.stack) ):
+                v.transform( component )
+            self.assert_( allclose(v.array, coords) )
+            self.assert_( allclose(self.stack.apply(Vector3(point)).array,
+                                   coords) )
+
+        self.assert_( allclose(self.stack.apply_inverse(points),
+                               self.points) )
+
+    def test_cache( self ):
+        """test composite is only recomputed when a component changes
+        """
+        composite = self.stack.composite
+        inverse = self.stack.inverse
+        self.assert_( self.stack.composite is composite )
+        self.assert_( self.stack.inverse is inverse )
+
+        self.stack[1].rotate( 10, self.axis )
+        self.assert_( self.stack.composite is not composite )
+        self.assert_( allclose(self.stack.composite._matrix
+                               * self.stack.inverse._matrix, eye(4)) )
+
+        composite = self.stack.composite
+        self.stack.pop()
+        self.assert_( self.stack.composite is not composite )
+        self.stack[0] = Matrix3()
+        self.assert_( allclose(self.stack.apply(self.points),
+                               Matrix3().rotate(40, self.axis)._matrix.A[:3, :3]
+                               .dot(self.points.T).T) )
+
+    def test_pop_push( self ):
+        """test component pushed after a pop is not taken for popped one
+        """
+        stack = Transform_Stack()
+        stack.push().translate( Vector3((1, 0, 0)) )
+        stack.composite
+        stack.pop()
+        stack.push().translate( Vector3((5, 0, 0)) )
+        self.assert_( allclose(stack.apply([(0, 0, 0)]), [(5, 0, 0)]) )
+
+if __name__ == "__main__":
+    suite = unittest.TestLoader().loadTestsFromTestCase(Test_Transform_Stack)
+    unittest.TextTestRunner(verbosity=2).run(suite)
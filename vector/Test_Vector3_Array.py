@@ -0,0 +1,70 @@
+import unittest
+from numpy.random import RandomState
+
+from Vector3 import Vector3
+from Vector3_Array import Vector3_Array
+from Matrix3 import Matrix3
+
+class Test_Vector3_Array(unittest.TestCase):
+
+    def setUp(self):
+        random = RandomState( 0 )
+        self.a = random.uniform( -10, 10, (20, 3) )
+        self.b = random.uniform( -10, 10, (20, 3) )
+        self.axis = Vector3( (1, 2, 3) )
+
+    def assert_matches( self, batch, vectors ):
+        """check each vector in batch ~= matching vector3
+        """
+        self.assertEqual( len(batch), len(vectors) )
+        for v, w in zip( batch, vectors ):
+            for cv, cw in zip( v, w ):
+                self.assert_( abs(cv - cw) < 0.001 )
+
+    def test_arithmetic( self ):
+        """test batch operations give same vectors as vector3 operations
+        """
+        for name, arg in ( ("add", self.axis), ("subtract", self.axis),
+                           ("cross", self.axis), ("project", self.axis),
+                           ("multiply", 2.5), ("divide", 2.5) ):
+            batch = getattr( Vector3_Array(self.a), name )( arg )
+            vectors = [ getattr( Vector3(a), name )( arg ) for a in self.a ]
+            self.assert_matches( batch, vectors )
+
+        batch = Vector3_Array( self.a ).add( Vector3_Array(self.b) )
+        vectors = [ Vector3(a).add( Vector3(b) )
+                    for a, b in zip( self.a, self.b ) ]
+        self.assert_matches( batch, vectors )
+
+    def test_scalars( self ):
+        """test dot, magnitude and angle match vector3 for each vector
+        """
+        batch = Vector3_Array( self.a )
+        other = Vector3_Array( self.b )
+        for i, (a, b) in enumerate( zip(self.a, self.b) ):
+            self.assert_( abs(batch.dot(other)[i]
+                              - Vector3(a).dot(Vector3(b))) < 0.001 )
+            self.assert_( abs(batch.magnitude[i] - Vector3(a).magnitude)
+                          < 0.001 )
+            self.assert_( abs(batch.angle_to(other)[i]
+                              - Vector3(a).angle_to(Vector3(b))) < 0.001 )
+
+        self.assert_( (abs(batch.normalize().magnitude - 1.0) < 0.001).all() )
+        self.assertRaises( ZeroDivisionError,
+                           Vector3_Array([(0, 0, 0)]).normalize )
+
+    def test_rotate_transform( self ):
+        """test rotating and transforming batch matches vector3
+        """
+        batch = Vector3_Array( self.a ).rotate( 30, self.axis )
+        vectors = [ Vector3(a).rotate( 30, self.axis ) for a in self.a ]
+        self.assert_matches( batch, vectors )
+
+        m = Matrix3().rotate( 30, self.axis ).translate( Vector3((1, 2, 3)) )
+        batch = Vector3_Array( self.a ).transform( m )
+        vectors = [ Vector3(a).transform( m ) for a in self.a ]
+        self.assert_matches( batch, vectors )
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(Test_Vector3_Array)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,77 @@
+import unittest
+from numpy import allclose
+
+from Vector3 import Numpy_Vector3
+from Float_Vector3 import Float_Vector3
+from Vector2 import Vector2
+from Matrix3 import Matrix3
+
+class Test_VectorX(unittest.TestCase):
+
+    def check_out( self, a, call, *args ):
+        """check method writes into out without changing a and matches in
+           place result
+        """
+        before = list( a )
+        out = a.copy()
+        out.set( *[0.0] * len(a) )
+        result = getattr( a, call )( *args, out=out )
+        self.assert_( result is out )
+        self.assertEqual( list(a), before )
+
+        in_place = getattr( a.copy(), call )( *args )
+        self.assert_( allclose(list(out), list(in_place)) )
+
+    def test_out( self ):
+        """test out variants of vector3 operations for both storages
+        """
+        for V in Numpy_Vector3, Float_Vector3:
+            a = V( (1.0, 2.0, 3.0) )
+            b = V( (0.6, -0.8, 0.0) )
+            m = Matrix3().rotate( 30, b ).translate( a )
+            for call, args in ( ("add", (b,)), ("subtract", (b,)),
+                                ("cross", (b,)), ("multiply", (2.5,)),
+                                ("divide", (2.5,)), ("normalize", ()),
+                                ("set_magnitude", (4.0,)),
+                                ("project", (b,)), ("rotate", (30.0, b)),
+                                ("transform", (m,)) ):
+                self.check_out( a, call, *args )
+
+    def test_storages_match( self ):
+        """test numpy and float storages give same results
+        """
+        results = []
+        for V in Numpy_Vector3, Float_Vector3:
+            a = V( (1.0, 2.0, 3.0) )
+            b = V( (0.6, -0.8, 0.0) )
+            c = a + b
+            d = a - b
+            a.cross( b ).rotate( 40.0, c ).project( d )
+            results.append( list(a) + list(c) + list(d)
+                            + [a.distance(b), a.dot(b), c.angle_to(d)] )
+        self.assert_( allclose(*results) )
+
+    def test_vector2( self ):
+        """test vector2 rotates in place and into out
+        """
+        a = Vector2( 1.0, 0.0 )
+        self.check_out( a, "rotate", 30.0 )
+        self.check_out( a, "cross" )
+        self.assert_( allclose(list(a.rotate(90.0)), [0.0, 1.0]) )
+        self.assert_( allclose(list(a + Vector2(1.0, 1.0)), [1.0, 2.0]) )
+
+    def test_zero( self ):
+        """test only zero is refused by vector2, while vector3 refuses tiny
+           magnitudes as it always has
+        """
+        a = Vector2( 1e-4, 0.0 )
+        self.assert_( allclose(list(a.copy().normalize()), [1.0, 0.0]) )
+        self.assert_( allclose(list(a.copy().divide(1e-4)), [1.0, 0.0]) )
+        self.assertRaises( ZeroDivisionError, a.divide, 0.0 )
+        self.assertRaises( ZeroDivisionError, Vector2(0.0, 0.0).normalize )
+        for V in Numpy_Vector3, Float_Vector3:
+            self.assertRaises( ZeroDivisionError, V((1e-4, 0, 0)).normalize )
+
+if __name__ == "__main__":
+    suite = unittest.TestLoader().loadTestsFromTestCase(Test_VectorX)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,112 @@
+from numpy import asarray, dot
+
+from Matrix3 import Matrix3
+
+class Transform_Stack( object ):
+    """chain of Matrix3 components applied as one cached composite matrix
+
+       the composite is the product of the components in order, so the last
+       component is applied to vectors first, as with the opengl matrix
+       stack; it is only recomputed after a component is changed, added or
+       removed
+    """
+
+    def __init__( self, components=() ):
+        self._components = list( components )
+        self._changes = 0 # bumped whenever components are added or replaced
+        self._versions = None # changes and versions of cached product
+        self._composite = None
+        self._inverse = None
+
+    def __len__( self ):
+        return len( self._components )
+
+    def __getitem__( self, index ):
+        return self._components[index]
+
+    def __setitem__( self, index, matrix3 ):
+        self._components[index] = matrix3
+        self._changes += 1
+
+    def __iter__( self ):
+        return iter( self._components )
+
+    def __repr__( self ):
+        return "<transform stack n=%d />" % len( self )
+
+    def push( self, matrix3=None ):
+        """add component to end of stack and return it
+
+           defaults to a new identity matrix
+        """
+        if matrix3 is None:
+            matrix3 = Matrix3()
+        self._components.append( matrix3 )
+        self._changes += 1
+        return matrix3
+
+    def pop( self ):
+        """remove and return last component of stack
+        """
+        self._changes += 1
+        return self._components.pop()
+
+    def apply( self, vectors ):
+        """transform Vector3, Vector3_Array or n x 3 array with composite
+
+           vector objects are transformed in place and returned, arrays of
+           coords are transformed into a new array
+        """
+        return self._apply( self.composite, vectors )
+
+    def apply_inverse( self, vectors ):
+        """transform vectors with inverse of composite
+        """
+        return self._apply( self.inverse, vectors )
+
+    def _apply( self, matrix3, vectors ):
+        if hasattr( vectors, "transform" ):
+            return vectors.transform( matrix3 )
+
+        # whole batch in one matrix product
+        m = matrix3._matrix.A
+        return dot( asarray(vectors, 'd'), m[:3, :3].T ) + m[:3, 3]
+
+    def _update( self ):
+        """recompute cached composite if any component has changed
+        """
+        # ids of components can be reused after one is freed, so swapped
+        # components are noticed by the stack change count instead
+        versions = ( self._changes, [c.version for c in self._components] )
+        if versions == self._versions:
+            return
+
+        composite = Matrix3()
+        for component in self._components:
+            composite.transform( component )
+        self._composite = composite
+        self._inverse = None
+        self._versions = versions
+
+    ###
+    ### getter methods for properties
+    ###
+
+    def _get_composite( self ):
+        self._update()
+        return self._composite
+
+    def _get_inverse( self ):
+        self._update()
+        if self._inverse is None:
+            self._inverse = Matrix3( self._composite ).invert()
+        return self._inverse
+
+    ###
+    ### properties
+    ###
+
+    composite = property( _get_composite,
+                          doc="product of components, don't modify" )
+    inverse = property( _get_inverse,
+                        doc="inverse of composite, don't modify" )
@@ -7,32 +7,38 @@ class Vector2( VectorX ):
     """2 dimensional vector using numpy library to implement storage and methods
     """
     # instances only store coords array
-    __slots__ = "_coords"
+    __slots__ = ()
     
     def __init__( self, x, y ):
         """store x, y and z coordinates in numpy array
         """
-        self._coords = numpy.array( [float(c) for c in (x, y)], 'd' )
+        self._coords = numpy.array( (x, y), 'd' )
 
     def __repr__( self ):
         return "<vector2 x=%.3f y=%.3f />" % tuple( self._coords )
 
-    def cross( self ):
+    def cross( self, out=None ):
         """rotate vector by 90 degrees
         """
-        return self.__class__( -self._coords[1], self._coords[0] )
+        if out is None:
+            out = self
+        x, y = self._coords.tolist()
+        out._coords[:] = ( -y, x )
+        return out
         
-    def rotate( self, degrees ):
-        """rotate this vector by given degrees and return as new vector
+    def rotate( self, degrees, out=None ):
+        """rotate this vector by given degrees
         """
-        # cosine vector is this vector multiplied by cosine of angle
-        cosine = self.multiply( cosdg(degrees) )
-
-        # sine vector is cross product of this vector and normalized given
-        # vector, multiplied by sine of angle
-        sine = self.cross().multiply( sindg(degrees) )
-
-        return cosine.add( sine )
+        if out is None:
+            out = self
+
+        # rotated vector is this vector multiplied by cosine of angle plus
+        # this vector crossed multiplied by sine of angle
+        c = cosdg( degrees )
+        s = sindg( degrees )
+        x, y = self._coords.tolist()
+        out._coords[:] = ( x * c - y * s, y * c + x * s )
+        return out
 
     ###
     ### getter and setter methods for properties
@@ -0,0 +1,190 @@
+from numpy import array, asarray, cross, sqrt, arccos, degrees, radians, cos, sin
+
+from Vector3 import Vector3
+
+class Vector3_Array( object ):
+    """batch of 3 dimensional vectors stored as one contiguous n x 3 array
+
+       methods mirror Vector3 and modify every vector in place at once;
+       vector arguments may be another batch of the same length, or a single
+       Vector3 or (x, y, z) sequence applied to every vector
+    """
+    __slots__ = [ "_coords" ] # instances only store n x 3 numpy array
+    EPSILON = Vector3.EPSILON # +/- to be considered equal
+
+    def __init__( self, seed=(), dtype='d' ):
+        """copy coords from sequence of (x, y, z) or n x 3 array
+        """
+        self._coords = array( seed, dtype ).reshape( -1, 3 )
+
+    def __len__( self ):
+        return len( self._coords )
+
+    def __getitem__( self, index ):
+        return Vector3( self._coords[index] )
+
+    def __setitem__( self, index, vector3 ):
+        self._coords[index] = tuple( vector3 )
+
+    def __iter__( self ):
+        for coords in self._coords:
+            yield Vector3( coords )
+
+    def __repr__( self ):
+        return "<vector3 array n=%d />" % len( self )
+
+    def _other( self, vector ):
+        """return coords of given batch or single vector for broadcasting
+        """
+        if isinstance( vector, Vector3_Array ):
+            return vector._coords
+        if isinstance( vector, Vector3 ):
+            return asarray( vector.array, 'd' )
+        return asarray( vector, 'd' )
+
+    def _scalars( self, scalar ):
+        """return scalar or array of scalars shaped to scale each vector
+        """
+        scalar = asarray( scalar, 'd' )
+        if scalar.ndim > 0:
+            return scalar.reshape( -1, 1 )
+        return scalar
+
+    def add( self, vector ):
+        """add given vector to each vector
+        """
+        self._coords += self._other( vector )
+        return self
+
+    def __iadd__( self, vector ):
+        return self.add( vector )
+
+    def subtract( self, vector ):
+        """subtract given vector from each vector
+        """
+        self._coords -= self._other( vector )
+        return self
+
+    def __isub__( self, vector ):
+        return self.subtract( vector )
+
+    def dot( self, vector ):
+        """returns array of dot products of each vector and given vector
+        """
+        return ( self._coords * self._other(vector) ).sum( -1 )
+
+    def cross( self, vector ):
+        """cross each vector with given vector
+        """
+        self._coords[:] = cross( self._coords, self._other(vector) )
+        return self
+
+    def multiply( self, scalar ):
+        """multiply each vector by given scalar or array of scalars
+        """
+        self._coords *= self._scalars( scalar )
+        return self
+
+    def __imul__( self, scalar ):
+        return self.multiply( scalar )
+
+    def divide( self, scalar ):
+        """divide each vector by given scalar or array of scalars
+        """
+        scalar = self._scalars( scalar )
+        if ( abs(scalar) < self.EPSILON ).any():
+            raise ZeroDivisionError( "can't divide vector by zero!" )
+        self._coords /= scalar
+        return self
+
+    def __idiv__( self, scalar ):
+        return self.divide( scalar )
+
+    def normalize( self ):
+        """set magnitude of each vector to 1.0
+
+           raises ZeroDivisionError if any magnitude is 0
+        """
+        self.set_magnitude( 1.0 )
+        return self
+
+    def set_magnitude( self, scalar ):
+        # assure no magnitude is zero
+        m = self._get_magnitude()
+        if ( m < self.EPSILON ).any():
+            raise ZeroDivisionError(
+                "can't adjust magnitude of zero-length vector!" )
+        self._coords *= self._scalars( scalar / m )
+
+    def project( self, vector ):
+        """project each vector onto given vector
+        """
+        other = self._other( vector )
+        scale = self.dot( vector ) / ( other * other ).sum( -1 )
+        self._coords[:] = other * self._scalars( scale )
+        return self
+
+    def angle_to( self, vector ):
+        """return array of angles from each vector to given vector in degrees
+        """
+        other = self._other( vector )
+        sm = self._get_magnitude()
+        vm = sqrt( (other * other).sum(-1) )
+        if ( sm < self.EPSILON ).any() or ( vm < self.EPSILON ).any():
+            raise ZeroDivisionError(
+                "can't calculate angle between zero-length vectors!" )
+
+        # clip rounding errors outside domain of arccos
+        cosine = ( self.dot(vector) / (sm * vm) ).clip( -1.0, 1.0 )
+        return degrees( arccos(cosine) )
+
+    def rotate( self, degrees, axis ):
+        """rotate each vector around given axis vector by given degrees
+
+           uses rodrigues' rotation formula
+        """
+        axis = self._other( axis )
+        axis = axis / self._scalars( sqrt((axis * axis).sum(-1)) )
+        angle = radians( self._scalars(degrees) )
+        c, s = cos( angle ), sin( angle )
+
+        stub = axis * self._scalars( (self._coords * axis).sum(-1) )
+        self._coords[:] = ( self._coords * c + cross(axis, self._coords) * s
+                            + stub * (1.0 - c) )
+        return self
+
+    def transform( self, matrix3 ):
+        """transform each vector with 4x4 matrix
+        """
+        m = matrix3._matrix.A
+        self._coords[:] = self._coords.dot( m[:3, :3].T ) + m[:3, 3]
+        return self
+
+    ###
+    ### getter and setter methods for properties
+    ###
+
+    def _get_x( self ):
+        return self._coords[:, 0]
+
+    def _get_y( self ):
+        return self._coords[:, 1]
+
+    def _get_z( self ):
+        return self._coords[:, 2]
+
+    def _get_magnitude( self ):
+        return sqrt( (self._coords * self._coords).sum(-1) )
+
+    def _get_array( self ):
+        return self._coords
+
+    ###
+    ### properties
+    ###
+
+    x = property( _get_x, doc="x coordinates of vectors" )
+    y = property( _get_y, doc="y coordinates of vectors" )
+    z = property( _get_z, doc="z coordinates of vectors" )
+    magnitude = property( _get_magnitude, doc="lengths of vectors" )
+    array = property( _get_array, doc="coords as n x 3 array" )
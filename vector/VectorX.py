@@ -1,111 +1,166 @@
 import numpy
-from math import acos, degrees
+import math
 
 class VectorX( object ):
     """abstract class implementing vector methods with numpy lib
 
-       subclasses must store coords as a numpy array named '_coords'
+       subclasses store coords as a flat numpy array named '_coords'
+
+       methods modify this vector in place and return it, or write the
+       result into vector given as out and return that, leaving this vector
+       unchanged; neither way allocates a new vector
     """
     # instances only store coords array
     __slots__ = "_coords"
+    EPSILON = 0.001 # +/- to be considered equal
+
+    # divisors and magnitudes below this can't be divided by, as can 0
+    ZERO = 0.0
+
+    def __len__( self ):
+        return len( self._coords )
 
     def __iter__( self ):
-        for coord in self._coords:
-            yield coord.item()
+        return iter( self._coords.tolist() )
 
     def __getitem__( self, index ):
-        return self._coords[index,0]
+        return self._coords[index]
 
     def __setitem__( self, index, value ):
-        self._coords[index,0] = value
+        self._coords[index] = value
+
+    def copy( self ):
+        """return new vector with same coords
+        """
+        vector = self.__class__.__new__( self.__class__ )
+        vector._coords = self._coords.copy()
+        return vector
+
+    def set( self, *coords ):
+        """set coords of this vector
+        """
+        self._coords[:] = coords
+        return self
 
-    def add( self, vector ):
-        """add given vector to this vector and return as new vector
+    def add( self, vector, out=None ):
+        """add given vector to this vector
         """
-        return self.__class__( *(c.item() for c in
-                                 numpy.add(self._coords, vector._coords)[:3]) )
+        if out is None:
+            out = self
+        numpy.add( self._coords, vector._coords, out._coords )
+        return out
 
     def __add__( self, vector ):
-        """a + b <==> a.add( b )
+        """a + b <==> new vector a.add( b )
+        """
+        return self.add( vector, out=self.copy() )
+
+    def __iadd__( self, vector ):
+        """a += b <==> a.add( b )
         """
         return self.add( vector )
 
-    def subtract( self, vector ):
-        """subtract given vector from this vector and return as new vector
+    def subtract( self, vector, out=None ):
+        """subtract given vector from this vector
         """
-        return self.__class__( *(c.item() for c in
-                                 numpy.subtract(self._coords,
-                                                vector._coords)[:3]) )
+        if out is None:
+            out = self
+        numpy.subtract( self._coords, vector._coords, out._coords )
+        return out
 
     def __sub__( self, vector ):
-        """a - b <==> a.subtract( b )
+        """a - b <==> new vector a.subtract( b )
+        """
+        return self.subtract( vector, out=self.copy() )
+
+    def __isub__( self, vector ):
+        """a -= b <==> a.subtract( b )
         """
         return self.subtract( vector )
 
     def dot( self, vector ):
         """returns scalar dot product of this vector and given vector
         """
-        return numpy.dot( self._coords[:3].transpose(),
-                          vector._coords[:3] ).item()
+        return float( numpy.dot(self._coords, vector._coords) )
 
-    def cross( self, vector ):
-        """cross this vector with given vector and return as new vector
+    def multiply( self, scalar, out=None ):
+        """multiply this vector by given scalar
         """
-        return self.__class__( *numpy.cross(self._coords.A1[:3],
-                                            vector._coords.A1[:3]) )
+        if out is None:
+            out = self
+        numpy.multiply( self._coords, scalar, out._coords )
+        return out
 
-    def multiply( self, scalar ):
-        """multiply this vector by given scalar and return as new vector
-        """
-        return self.__class__( *(c.item() for c in
-                                 numpy.multiply(self._coords,
-                                                float(scalar))[:3]) )
+    def __imul__( self, scalar ):
+        return self.multiply( scalar )
 
-    def divide( self, scalar ):
-        """divide this vector by given scalar and return as new vector
+    def divide( self, scalar, out=None ):
+        """divide this vector by given scalar
         """
         # check we aren't dividing by 0
-        if scalar == 0.0:
-            raise ZeroDivisionError( "attempted to divide vector by 0!" )
-        return self.__class__( *(c.item() for c in
-                                 numpy.divide(self._coords,
-                                              float(scalar))[:3]) )
-    
-    def normalize( self ):
-        """return new vector with same heading and magnitude of 1.0
-        """
-        # assure magnitude > 0
-        magnitude = self._get_magnitude()
-        if magnitude == 0.0:
-            raise ZeroDivisionError( "can't normalize vector of magnitude 0!" )
-        return self.divide( magnitude )
-
-    def project( self, vector ):
-        """project this vector onto given vector and return as new vector
-        """
-        return vector.multiply( self.dot(vector) /
-                                (vector._get_magnitude()**2) )
+        if scalar == 0.0 or abs( scalar ) < self.ZERO:
+            raise ZeroDivisionError( "can't divide vector by zero!" )
+        return self.multiply( 1.0 / scalar, out )
+
+    def __idiv__( self, scalar ):
+        return self.divide( scalar )
+
+    def normalize( self, out=None ):
+        """set magnitude to 1.0; raises ZeroDivisionError if magnitude is 0
+        """
+        return self.set_magnitude( 1.0, out )
+
+    def set_magnitude( self, scalar, out=None ):
+        """scale this vector to given length
+        """
+        # assure magnitude is not zero
+        m = self._get_magnitude()
+        if m == 0.0 or m < self.ZERO:
+            raise ZeroDivisionError(
+                "can't adjust magnitude of zero-length vector!" )
+        return self.multiply( scalar / m, out )
+
+    def project( self, vector, out=None ):
+        """project this vector onto given vector
+        """
+        if out is None:
+            out = self
+        return vector.multiply( self.dot(vector) / vector.dot(vector), out )
+
+    def distance( self, vector ):
+        """returns distance from this vector to given vector
+        """
+        return math.sqrt( sum((a - b) * (a - b) for a, b
+                              in zip(self._coords.tolist(),
+                                     vector._coords.tolist())) )
 
     def angle_to( self, vector ):
         """return angle from this vector to given vector in degrees
         """
-        try:
-            return degrees( acos(self.normalize().dot(vector.normalize())) )
-        except ValueError:
-            if self._get_magnitude() > 0 and vector._get_magnitude() > 0:
-                return 0.0
-            raise ValueError( "couldn't calculate angle from %s to %s!"
-                              % (self, vector) )
+        # make sure neither vector is zero-length
+        sm = self._get_magnitude()
+        vm = vector._get_magnitude()
+        if sm == 0.0 or vm == 0.0 or sm < self.ZERO or vm < self.ZERO:
+            raise ZeroDivisionError(
+                "can't calculate angle between zero-length vectors!" )
+
+        # clip rounding errors outside domain of acos
+        cosine = max( -1.0, min(1.0, self.dot(vector) / (sm * vm)) )
+        return math.degrees( math.acos(cosine) )
 
     ###
     ### getter and setter methods for properties
     ###
-    
+
     def _get_magnitude( self ):
-        return numpy.sqrt( sum(c**2 for c in self) )
+        return math.sqrt( numpy.dot(self._coords, self._coords) )
+
+    def _get_array( self ):
+        return self._coords
 
     ###
     ### properties
     ###
 
     magnitude = property( fget=_get_magnitude, doc="length of vector" )
+    array = property( fget=_get_array, doc="coords as flat array" )
@@ -0,0 +1,264 @@
+###
+### time vector package operations at scalar and batch sizes, count objects
+### each operation creates, and check results against an earlier run
+###
+### usage: python bench_vectors.py results.json [baseline.json [threshold]]
+###
+### results are written as json so runs from different commits can be
+### diffed; with a baseline the run exits with status 1 if a hot operation
+### got more than THRESHOLD slower or creates more objects than before
+###
+import sys
+import json
+from timeit import Timer
+
+# fraction slower than baseline counted as regression; timings of the same
+# tree can vary by a third between runs on a shared machine, lower it on a
+# quiet one
+THRESHOLD = 0.5
+MIN_TIME = 0.02 # seconds each timing repeat should run for
+REPEAT = 3 # timing repeats, best is kept
+PASSES = 3 # passes over whole suite, best of each operation is kept
+BATCH_SIZES = ( 100, 10000 ) # vectors per batch for batch benchmarks
+
+# names bound in every benchmark namespace
+IMPORTS = """
+from numpy.random import RandomState
+from Vector3 import Numpy_Vector3
+from Float_Vector3 import Float_Vector3
+from Polar_Vector3 import Polar_Vector3
+from Vector2 import Vector2
+from Vector3_Array import Vector3_Array
+from Matrix3 import Matrix3
+from Quaternion import Quaternion
+from Transform_Stack import Transform_Stack
+m = Matrix3().rotate( 1.0, Numpy_Vector3((0.0, 0.0, 1.0)) )
+q = Quaternion().rotate( 1.0, (0.0, 0.0, 1.0) )
+r = Quaternion().rotate( 90.0, (1.0, 2.0, 3.0) )
+"""
+
+# suite name, setup and (operation, statement) pairs; %(n)d in setup is
+# replaced with batch size for batch suites
+VECTOR3_OPERATIONS = [ ( "init", "V((1.0, 2.0, 3.0))" ),
+                       ( "add", "a.add( b )" ),
+                       ( "subtract", "a.subtract( b )" ),
+                       ( "dot", "a.dot( b )" ),
+                       ( "cross", "a.cross( b )" ),
+                       ( "magnitude", "a.magnitude" ),
+                       ( "iterate", "tuple( a )" ),
+                       ( "x", "a.x" ),
+                       ( "normalize", "a.normalize()" ),
+                       ( "project", "a.project( b )" ),
+                       ( "angle_to", "a.angle_to( b )" ),
+                       ( "rotate", "a.rotate( 30.0, b )" ),
+                       ( "transform", "a.transform( m )" ) ]
+
+SCALAR_SUITES = [
+    ( "vector3", """
+V = Numpy_Vector3
+a = V( (1.0, 2.0, 3.0) )
+b = V( (0.6, -0.8, 0.0) )
+""", VECTOR3_OPERATIONS ),
+    ( "float_vector3", """
+V = Float_Vector3
+a = V( (1.0, 2.0, 3.0) )
+b = V( (0.6, -0.8, 0.0) )
+""", VECTOR3_OPERATIONS ),
+    ( "polar_vector3", """
+a = Polar_Vector3( (1.0, 2.0, 3.0) )
+""", [ ( "set_heading", "a.set_heading( 30.0, 60.0, 2.0 )" ),
+       ( "lat", "a.lat" ),
+       ( "lon", "a.lon" ) ] ),
+    ( "vector2", """
+a = Vector2( 1.0, 2.0 )
+b = Vector2( 0.6, -0.8 )
+""", [ ( "init", "Vector2( 1.0, 2.0 )" ),
+       ( "add", "a.add( b )" ),
+       ( "dot", "a.dot( b )" ),
+       ( "magnitude", "a.magnitude" ),
+       ( "normalize", "a.normalize()" ),
+       ( "rotate", "a.rotate( 30.0 )" ) ] ),
+    ( "matrix3", """
+a = Matrix3()
+v = Numpy_Vector3( (1.0, 2.0, 3.0) )
+""", [ ( "init", "Matrix3()" ),
+       ( "rotate", "a.rotate( 1.0, v )" ),
+       ( "translate", "a.translate( v )" ),
+       ( "scale", "a.scale( 1.0, 1.0, 1.0 )" ),
+       ( "transform", "a.transform( m )" ),
+       ( "invert", "m.invert()" ),
+       ( "position", "a.position" ),
+       ( "gl", "a.gl" ) ] ),
+    ( "quaternion", """
+a = Quaternion()
+v = Float_Vector3( (1.0, 2.0, 3.0) )
+""", [ ( "rotate", "a.rotate( 1.0, (0.0, 0.0, 1.0) )" ),
+       ( "compose", "a.compose( q )" ),
+       ( "slerp", "Quaternion( q ).slerp( r, 0.5 )" ),
+       ( "matrix3", "r.matrix3" ),
+       ( "apply", "q.apply( v )" ) ] ),
+    ( "transform_stack", """
+s = Transform_Stack( [Matrix3(m), Matrix3(m), Matrix3(m)] )
+""", [ ( "composite", "s.composite" ),
+       ( "changed", "s[0].scale( 1.0, 1.0, 1.0 ); s.composite" ) ] ) ]
+
+BATCH_SUITES = [
+    ( "vector3_array", """
+random = RandomState( 0 )
+a = Vector3_Array( random.uniform(-1, 1, (%(n)d, 3)) )
+b = Vector3_Array( random.uniform(-1, 1, (%(n)d, 3)) ).normalize()
+""", [ ( "init", "Vector3_Array( b.array )" ),
+       ( "add", "a.add( b )" ),
+       ( "subtract", "a.subtract( b )" ),
+       ( "dot", "a.dot( b )" ),
+       ( "cross", "a.cross( b )" ),
+       ( "magnitude", "a.magnitude" ),
+       ( "normalize", "a.normalize()" ),
+       ( "project", "a.project( b )" ),
+       ( "rotate", "a.rotate( 30.0, (1.0, 2.0, 3.0) )" ),
+       ( "transform", "a.transform( m )" ) ] ),
+    ( "quaternion_batch", """
+a = Vector3_Array( RandomState(0).uniform(-1, 1, (%(n)d, 3)) )
+""", [ ( "apply", "q.apply( a )" ) ] ),
+    ( "transform_stack_batch", """
+s = Transform_Stack( [Matrix3(m), Matrix3(m), Matrix3(m)] )
+a = RandomState( 0 ).uniform( -1, 1, (%(n)d, 3) )
+""", [ ( "apply", "s.apply( a )" ) ] ) ]
+
+# operations checked for regressions against baseline
+HOT = set( [ "vector3.add", "vector3.subtract", "vector3.dot",
+             "vector3.cross", "vector3.magnitude", "vector3.transform",
+             "float_vector3.add", "float_vector3.subtract",
+             "float_vector3.dot", "float_vector3.cross",
+             "float_vector3.transform", "matrix3.rotate",
+             "matrix3.translate", "matrix3.transform", "quaternion.compose",
+             "quaternion.apply", "vector3_array.add",
+             "vector3_array.transform", "vector3_array.rotate",
+             "quaternion_batch.apply", "transform_stack_batch.apply" ] )
+
+# functions whose python level call means an object was created; covers
+# vector and matrix instances and each numpy.matrix made or viewed, plain
+# ndarrays are made in c and aren't seen
+CONSTRUCTORS = ( "__init__", "__array_finalize__" )
+
+def time_operation( setup, statement ):
+    """returns best microseconds per run of statement
+    """
+    timer = Timer( statement, IMPORTS + setup )
+
+    # scale number of runs so each repeat takes about MIN_TIME
+    number = 1
+    while timer.timeit( number ) < MIN_TIME:
+        number *= 4
+    return min( timer.repeat(REPEAT, number) ) * 1e6 / number
+
+def count_objects( setup, statement, number=20 ):
+    """returns objects created per run of statement
+    """
+    namespace = {}
+    exec IMPORTS + setup in namespace
+    code = compile( statement, "<benchmark>", "exec" )
+    exec code in namespace # first run may create cached objects
+
+    count = [ 0 ]
+    def profile( frame, event, arg ):
+        if event == "call" and frame.f_code.co_name in CONSTRUCTORS:
+            count[0] += 1
+
+    sys.setprofile( profile )
+    try:
+        for i in range( number ):
+            exec code in namespace
+    finally:
+        sys.setprofile( None )
+    return count[0] / float( number )
+
+def run_pass():
+    """returns results of every benchmark keyed by suite.operation
+    """
+    results = {}
+    for suite, setup, operations in SCALAR_SUITES:
+        for operation, statement in operations:
+            results["%s.%s" % (suite, operation)] = {
+                "size": 1,
+                "us": time_operation( setup, statement ),
+                "objects": count_objects( setup, statement ) }
+
+    for n in BATCH_SIZES:
+        for suite, setup, operations in BATCH_SUITES:
+            for operation, statement in operations:
+                us = time_operation( setup % {"n": n}, statement )
+                results["%s.%s.%d" % (suite, operation, n)] = {
+                    "size": n,
+                    "us": us,
+                    "us_per_vector": us / n,
+                    "objects": count_objects( setup % {"n": n}, statement ) }
+    return results
+
+def run( passes=PASSES ):
+    """returns best results of several passes
+
+       spreading repeats of an operation over the whole run keeps a
+       short burst of load on the machine from skewing it
+    """
+    results = run_pass()
+    for i in range( passes - 1 ):
+        for name, result in run_pass().items():
+            if result["us"] < results[name]["us"]:
+                results[name] = result
+    return results
+
+def is_hot( name ):
+    return name in HOT or name.rsplit( ".", 1 )[0] in HOT
+
+def regressions( results, baseline, threshold=THRESHOLD ):
+    """returns (name, baseline, result) for hot operations that got more
+       than threshold slower or create more objects than baseline
+    """
+    slower = []
+    for name in sorted( results ):
+        if name not in baseline or not is_hot( name ):
+            continue
+        old, new = baseline[name], results[name]
+        if ( new["us"] > old["us"] * (1.0 + threshold)
+             or new["objects"] > old["objects"] ):
+            slower.append( (name, old, new) )
+    return slower
+
+if __name__ == "__main__":
+    if len( sys.argv ) < 2:
+        print ( "usage: python bench_vectors.py results.json "
+                "[baseline.json [threshold]]" )
+        sys.exit( 2 )
+
+    results = run()
+
+    print "%-36s %8s %12s %10s" % ( "operation", "size", "us", "objects" )
+    for name in sorted( results ):
+        result = results[name]
+        print "%-36s %8d %12.3f %10.2f" % ( name, result["size"],
+                                            result["us"], result["objects"] )
+
+    results_file = open( sys.argv[1], 'w' )
+    try:
+        json.dump( results, results_file, indent=1, sort_keys=True )
+    finally:
+        results_file.close()
+
+    if len( sys.argv ) > 2:
+        baseline_file = open( sys.argv[2] )
+        try:
+            baseline = json.load( baseline_file )
+        finally:
+            baseline_file.close()
+
+        threshold = THRESHOLD
+        if len( sys.argv ) > 3:
+            threshold = float( sys.argv[3] )
+
+        slower = regressions( results, baseline, threshold )
+        for name, old, new in slower:
+            print "regression %s: %.3fus -> %.3fus, %.2f -> %.2f objects" % (
+                name, old["us"], new["us"], old["objects"], new["objects"] )
+        if slower:
+            sys.exit( 1 )